@@ -4,56 +4,58 @@ AI Analysis Fetch - Monthly
 
 import os
 import json
-import pandas as pd
 
 from dotenv import load_dotenv
-from pymongo import MongoClient
 
 from ai_analyzer.ai_data_analysis import data_analyzer
+from etl_functions.frame_staging import FrameStage
+from shared_functions.data_access import fetch_month_view
 
 ## Connect to environment variables
 load_dotenv()
-mongodb_uri = os.getenv('MONGODB_URI')
-
-# Create a MongoDB client
-client = MongoClient(mongodb_uri)
-# Access the 'deftify_research' database
-db = client.deftify_research
 
 # Read the month and year from the .txt file
 with open('month_year.txt', 'r') as f:
     month_year = f.read().strip()
 
 
-# Access the collections and load all documents into a pandas DataFrame
-collection_btc_1m_w_external = db[f"btc_1m_w_external_{month_year}"]
-collection_btc_1m_mempool_fee = db[f"btc_1m_mempool_fee_{month_year}"]
-collection_btc_1m_mempool_price = db[f"btc_1m_mempool_price_{month_year}"]
-collection_btc_1m_mempool_hashrate = db[f"btc_1m_mempool_hashrate_{month_year}"]
-collection_btc_mempool_mining_pools = db[f"btc_mempool_mining_pools_{month_year}"]
-collection_btc_1m_mempool_lightning = db[f"btc_1m_mempool_lightning_{month_year}"]
-collection_btc_1m_dune_fee_breakdown = db[f"btc_1m_dune_fee_breakdown_{month_year}"]
-
-collection_eth_1m_w_external = db[f"eth_1m_w_external_{month_year}"]
-collection_eth_1m_gas_fee = db[f"eth_1m_gas_fee_{month_year}"]
-collection_eth_1m_uniswap_data = db[f"eth_1m_uniswap_data_{month_year}"]
-collection_eth_1m_tvl = db[f"eth_1m_tvl_{month_year}"]
-collection_eth_1m_l2_bridge_all = db[f"eth_1m_l2_bridge_all_{month_year}"]
-
+# Load every dataframe from the columnar staging store that the ETL run wrote for this month
+# (a month that was never staged falls back to the month's range of the MongoDB time-series collections)
+FRAME_NAMES = [
+    'btc_1m_w_external',
+    'btc_1m_mempool_fee',
+    'btc_1m_mempool_price',
+    'btc_1m_mempool_hashrate',
+    'btc_mempool_mining_pools',
+    'btc_1m_mempool_lightning',
+    'btc_1m_dune_fee_breakdown',
+    'eth_1m_w_external',
+    'eth_1m_gas_fee',
+    'eth_1m_uniswap_data',
+    'eth_1m_tvl',
+    'eth_1m_l2_bridge_all',
+]
+
+stage = FrameStage(month_year)
+if all(stage.has(name) for name in FRAME_NAMES):
+    frames = {name: stage.read(name) for name in FRAME_NAMES}
+else:
+    print(f"No staged frames for {month_year}, reading the MongoDB collections instead")
+    frames = {name: fetch_month_view(name, month_year) for name in FRAME_NAMES}
 
-btc_1m_w_external = pd.DataFrame(list(collection_btc_1m_w_external.find()))
-btc_1m_mempool_fee = pd.DataFrame(list(collection_btc_1m_mempool_fee.find()))
-btc_1m_mempool_price = pd.DataFrame(list(collection_btc_1m_mempool_price.find()))
-btc_1m_mempool_hashrate = pd.DataFrame(list(collection_btc_1m_mempool_hashrate.find()))
-btc_mempool_mining_pools = pd.DataFrame(list(collection_btc_mempool_mining_pools.find()))
-btc_1m_mempool_lightning = pd.DataFrame(list(collection_btc_1m_mempool_lightning.find()))
-btc_1m_dune_fee_breakdown = pd.DataFrame(list(collection_btc_1m_dune_fee_breakdown.find()))
+btc_1m_w_external = frames['btc_1m_w_external']
+btc_1m_mempool_fee = frames['btc_1m_mempool_fee']
+btc_1m_mempool_price = frames['btc_1m_mempool_price']
+btc_1m_mempool_hashrate = frames['btc_1m_mempool_hashrate']
+btc_mempool_mining_pools = frames['btc_mempool_mining_pools']
+btc_1m_mempool_lightning = frames['btc_1m_mempool_lightning']
+btc_1m_dune_fee_breakdown = frames['btc_1m_dune_fee_breakdown']
 
-eth_1m_w_external = pd.DataFrame(list(collection_eth_1m_w_external.find()))
-eth_1m_gas_fee = pd.DataFrame(list(collection_eth_1m_gas_fee.find()))
-eth_1m_uniswap_data = pd.DataFrame(list(collection_eth_1m_uniswap_data.find()))
-eth_1m_tvl = pd.DataFrame(list(collection_eth_1m_tvl.find()))
-eth_1m_l2_bridge_all = pd.DataFrame(list(collection_eth_1m_l2_bridge_all.find()))
+eth_1m_w_external = frames['eth_1m_w_external']
+eth_1m_gas_fee = frames['eth_1m_gas_fee']
+eth_1m_uniswap_data = frames['eth_1m_uniswap_data']
+eth_1m_tvl = frames['eth_1m_tvl']
+eth_1m_l2_bridge_all = frames['eth_1m_l2_bridge_all']
 
 
 ## Extract the latest month and year from the 'btc_1m_mempool_fee' dataframe
@@ -74,7 +76,7 @@ def remove_after_last_period(text):
 
 ## Generate AI analysis texts
 # For the 'btc_1m_w_external' dataframe
-btc_1m_w_external_filtered = btc_1m_w_external.drop(columns=["target_block", "wbtc_price_in_eth", "eth_price_in_usd", "wbtc_price_in_usd", "paxg_price_in_usd", "paxg_price_in_eth"], errors='ignore')
+btc_1m_w_external_filtered = btc_1m_w_external.drop(columns=["time", "target_block", "wbtc_price_in_eth", "eth_price_in_usd", "wbtc_price_in_usd", "paxg_price_in_usd", "paxg_price_in_eth"], errors='ignore')
 
 text_to_analyze_btc_1m_w_external = ', '.join(f"{col}: {btc_1m_w_external_filtered[col].tolist()}" for col in btc_1m_w_external_filtered.columns)
 prompt_btc_1m_w_external = (
@@ -6,6 +6,8 @@ import os
 import json
 import requests
 
+from etl_functions.http_client import http_client
+
 def get_api_key():
     return os.getenv('OPENAI_API_KEY')
 
@@ -32,7 +34,7 @@ def data_analyzer(prompt):
     }
 
     try:
-        response = requests.post(url, data=json.dumps(data), headers=headers, timeout=10)
+        response = http_client.post(url, data=json.dumps(data), headers=headers, timeout=10)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         print(f"Request failed: {e}")
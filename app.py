@@ -13,10 +13,14 @@ from shared_functions.utils import header
 app = Dash(__name__, use_pages=True, external_stylesheets=[dbc.themes.BOOTSTRAP])
 app.title = "Deftify Monthly Cryptocurrency Analysis"
 
-app.layout = html.Div([
-    header(),
-    dash.page_container
-])
+# The layout is served per page load, so the header lists a newly reported month without restarting the app
+def serve_layout():
+    return html.Div([
+        header(),
+        dash.page_container
+    ])
+
+app.layout = serve_layout
 
 # Run the app for local testing
 if __name__ == '__main__':
@@ -6,16 +6,29 @@ ETL (Extract, Transform, Load) Script - Bitcoin
 
 ## Libraries
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from dune_client.client import DuneClient
-from gql import gql, Client
-from gql.transport.requests import RequestsHTTPTransport
-from pymongo import MongoClient
+from gql import gql
+
+from etl_functions.async_fetch import Endpoint, fetch_all
+from etl_functions.price_store import BtcPriceStore
+from etl_functions.http_client import RateLimitedHTTPTransport, report_latency
+from etl_functions.schema_cache import SchemaCachedClient
+from etl_functions.block_index import BlockIndex, JsonRpcBlockSource, SubgraphBlockSource
+from etl_functions.graphql_batch import WBTC_ADDRESS, PAXG_ADDRESS
+from etl_functions.price_oracle import PriceOracle
+from etl_functions.dune_fetch import DuneResultsClient, date_filter, dune_rows_to_frame
+from etl_functions.scheduler import Task, run_tasks
+from etl_functions.checkpoint import CheckpointStore, default_run_id
+from etl_functions.landing_zone import LandingZone, replay_args
+from etl_functions.frame_staging import stage_frames
+from etl_functions.mongo_loader import shared_loader
+from etl_functions.timeseries_store import TimeSeriesStore
+from shared_functions.figure_artifacts import publish_report_figures
 
 import os
+import sys
 import pandas as pd
-import requests
 
 # %%
 
@@ -25,122 +38,118 @@ load_dotenv()
 thegraph_api = os.environ.get('THEGRAPH_API')
 dune_api = os.environ.get('DUNE_API')
 mongodb_uri = os.getenv('MONGODB_URI')
+eth_rpc_url = os.environ.get('ETH_RPC_URL')
 
 # %%
 
 # Part 1: 30 days of Bitcoin and Gold Data (Normalized) with TheGraph's Subgraphs
-headers = {
-    "Authorization": f"Bearer {thegraph_api}",
-    "Content-Type": "application/json",
-}
-
-# Configure the GraphQL client for WBTC (BTC on Ethereum)
-transport_wbtc = RequestsHTTPTransport(
-    url="https://gateway-arbitrum.network.thegraph.com/api/{thegraph_api}/deployments/id/QmZeCuoZeadgHkGwLwMeguyqUKz1WPWQYKcKyMCeQqGhsF",
-    headers=headers,
-    use_json=True,
-    timeout=10,
-)
-client_wbtc = Client(
-    transport=transport_wbtc,
-    fetch_schema_from_transport=True,
-)
-
-# Configure the GraphQL client for PAXG (Gold on Ethereum)
-transport_paxg = RequestsHTTPTransport(
-    url="https://gateway-arbitrum.network.thegraph.com/api/{thegraph_api}/subgraphs/id/A3Np3RQbaBA6oKJgiwDJeo5T3zrYfGHPWFYayMwtNDum",
-    headers=headers,
-    use_json=True,
-    timeout=10,
-)
-client_paxg = Client(
-    transport=transport_paxg,
-    fetch_schema_from_transport=True,
-)
-
-# Get the current block number
-meta_query = """
-{
-  _meta {
-    block {
-      number
+def extract_btc_1m_w_external():
+    """Fetches the WBTC, ETH and PAXG prices at the first block of each of the past 30 days"""
+    headers = {
+        "Authorization": f"Bearer {thegraph_api}",
+        "Content-Type": "application/json",
     }
-  }
-}
-"""
 
-current_block_response = client_wbtc.execute(gql(meta_query))
-current_block = current_block_response['_meta']['block']['number']
-
-# we will use the block number from about 1 hour ago since very recent block might have indexing issue
-current_block_delayed = current_block - 300
-
-# Assuming ~12.06 seconds average per block on Ethereum daily
-seconds_per_day = 86400
-blocks_per_day = seconds_per_day // 12.06
-
-results = []
-
-# Loop through the past 30 days
-for days_ago in range(0, 30):
-    target_block = int(current_block_delayed - (blocks_per_day * days_ago))
-
-    # WBTC contract address
-    wbtc_query = f"""
-    query {{
-        token(id: "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599", block: {{ number: {target_block} }}) {{
-            id
-            symbol
-            name
-            derivedETH
-        }}
-        bundle(id: "1", block: {{ number: {target_block} }}) {{
-            ethPriceUSD
-        }}
-    }}
+    # Configure the GraphQL client for WBTC (BTC on Ethereum)
+    transport_wbtc = RateLimitedHTTPTransport(
+        url="https://gateway-arbitrum.network.thegraph.com/api/{thegraph_api}/deployments/id/QmZeCuoZeadgHkGwLwMeguyqUKz1WPWQYKcKyMCeQqGhsF",
+        headers=headers,
+        use_json=True,
+        timeout=10,
+    )
+    client_wbtc = SchemaCachedClient(
+        transport=transport_wbtc,
+    )
+
+    # Configure the GraphQL client for PAXG (Gold on Ethereum)
+    transport_paxg = RateLimitedHTTPTransport(
+        url="https://gateway-arbitrum.network.thegraph.com/api/{thegraph_api}/subgraphs/id/A3Np3RQbaBA6oKJgiwDJeo5T3zrYfGHPWFYayMwtNDum",
+        headers=headers,
+        use_json=True,
+        timeout=10,
+    )
+    client_paxg = SchemaCachedClient(
+        transport=transport_paxg,
+    )
+
+    # Get the current block number
+    meta_query = """
+    {
+      _meta {
+        block {
+          number
+        }
+      }
+    }
     """
 
-    # PAXG contract address
-    paxg_query = f"""
-    query {{
-        token(id: "0x45804880de22913dafe09f4980848ece6ecbaf78", block: {{ number: {target_block} }}) {{
-            id
-            symbol
-            name
-            derivedETH
-        }}
-    }}
-    """
+    current_block_response = client_wbtc.execute(gql(meta_query))
+    current_block = current_block_response['_meta']['block']['number']
+
+    # we will use the block number from about 1 hour ago since very recent block might have indexing issue
+    current_block_delayed = current_block - 300
+
+    # Block timestamps come from a local JSON-RPC node if one is configured, otherwise from the subgraph
+    block_source = JsonRpcBlockSource(eth_rpc_url) if eth_rpc_url else SubgraphBlockSource(client_wbtc)
+    block_index = BlockIndex()
+
+    # Sample the first block at 00:00 UTC for each of the past 30 days, starting from the latest indexed day
+    latest_block_time = datetime.fromtimestamp(block_index.timestamp_of(current_block_delayed, block_source), timezone.utc)
+    latest_midnight = latest_block_time.replace(hour=0, minute=0, second=0, microsecond=0)
+    day_starts = [int((latest_midnight - timedelta(days=days_ago)).timestamp()) for days_ago in range(0, 30)]
 
-    wbtc_response = None
-    paxg_response = None
+    # Resolved days are answered from the local index, only new days need a few batched lookups
+    day_blocks = block_index.resolve(day_starts, block_source, latest_block=current_block_delayed)
 
-    # Execute the queries
+    # Target blocks for the past 30 days
+    target_blocks = [day_blocks[day_start] for day_start in day_starts]
+
+    # The shared price oracle only runs a batched time-travel query for the blocks it has not seen yet
+    # (the WBTC prices are shared with the ETH pipeline, which uses the same deployment)
+    # A failed query fails the task, so that nothing is checkpointed and a retry fetches the prices again
     try:
-        wbtc_response = client_wbtc.execute(gql(wbtc_query))
+        wbtc_prices = PriceOracle(client_wbtc).prices_at_blocks(WBTC_ADDRESS, target_blocks, include_bundle=True)
     except Exception as e:
         print("Error executing wbtc_query:", e)
+        raise ValueError("Failed to fetch the WBTC prices from TheGraph") from e
 
     try:
-        paxg_response = client_paxg.execute(gql(paxg_query))
+        paxg_prices = PriceOracle(client_paxg).prices_at_blocks(PAXG_ADDRESS, target_blocks, include_bundle=False)
     except Exception as e:
         print("Error executing paxg_query:", e)
+        raise ValueError("Failed to fetch the PAXG prices from TheGraph") from e
+
+    # The prices are kept as lists in target block order, so that the raw output stays plain JSON for the landing zone
+    return {
+        'day_starts': day_starts,
+        'target_blocks': target_blocks,
+        'wbtc_prices': [wbtc_prices[block] for block in target_blocks],
+        'paxg_prices': [paxg_prices[block] for block in target_blocks],
+    }
 
-    wbtc_price_in_eth = float(wbtc_response['token']['derivedETH'])
-    eth_price_in_usd = float(wbtc_response['bundle']['ethPriceUSD'])
-    wbtc_price_in_usd = wbtc_price_in_eth * eth_price_in_usd
-    paxg_price_in_eth = float(paxg_response['token']['derivedETH'])
-    paxg_price_in_usd = paxg_price_in_eth * eth_price_in_usd
-
-    # Append the results
-    results.append({
-        'target_block': target_block,
-        'wbtc_price_in_eth': wbtc_price_in_eth,
-        'eth_price_in_usd': eth_price_in_usd,
-        'wbtc_price_in_usd': wbtc_price_in_usd,
-        'paxg_price_in_eth': paxg_price_in_eth,
-        'paxg_price_in_usd': paxg_price_in_usd,
-    })
+def transform_btc_1m_w_external(btc_thegraph_prices):
+    results = []
+
+    for day_start, target_block, wbtc_price, paxg_price in zip(btc_thegraph_prices['day_starts'],
+                                                               btc_thegraph_prices['target_blocks'],
+                                                               btc_thegraph_prices['wbtc_prices'],
+                                                               btc_thegraph_prices['paxg_prices']):
+        wbtc_price_in_eth = wbtc_price['derivedETH']
+        eth_price_in_usd = wbtc_price['ethPriceUSD']
+        wbtc_price_in_usd = wbtc_price_in_eth * eth_price_in_usd
+        paxg_price_in_eth = paxg_price['derivedETH']
+        paxg_price_in_usd = paxg_price_in_eth * eth_price_in_usd
+
+        # Append the results
+        results.append({
+            'time': pd.to_datetime(day_start, unit='s'),
+            'target_block': target_block,
+            'wbtc_price_in_eth': wbtc_price_in_eth,
+            'eth_price_in_usd': eth_price_in_usd,
+            'wbtc_price_in_usd': wbtc_price_in_usd,
+            'paxg_price_in_eth': paxg_price_in_eth,
+            'paxg_price_in_usd': paxg_price_in_usd,
+        })
 
     # Reverse the order of the results
     results_ordered = list(reversed(results))
@@ -148,161 +157,185 @@ for days_ago in range(0, 30):
     # Convert results to a pandas DataFrame
     btc_1m_w_external = pd.DataFrame(results_ordered)
 
-# Normalize the price between BTC and Gold
-btc_1m_w_external['btc_price_normalized'] = btc_1m_w_external['wbtc_price_in_usd'] \
-                                         / btc_1m_w_external['wbtc_price_in_usd'].iloc[0]
-btc_1m_w_external['gold_price_normalized'] = btc_1m_w_external['paxg_price_in_usd'] \
-                                         / btc_1m_w_external['paxg_price_in_usd'].iloc[0]
+    # Normalize the price between BTC and Gold
+    btc_1m_w_external['btc_price_normalized'] = btc_1m_w_external['wbtc_price_in_usd'] \
+                                             / btc_1m_w_external['wbtc_price_in_usd'].iloc[0]
+    btc_1m_w_external['gold_price_normalized'] = btc_1m_w_external['paxg_price_in_usd'] \
+                                             / btc_1m_w_external['paxg_price_in_usd'].iloc[0]
+
+    return btc_1m_w_external
 
 
 # %%
 
+# Parts 2-6 (Extract): Fetch all Mempool endpoints concurrently
+def extract_mempool(checkpoint=None):
+    """Fetches all Mempool endpoints concurrently and returns the decoded responses by endpoint name
+
+    On a retry, the endpoints that already succeeded are restored from the stage checkpoint.
+    """
+    mempool_endpoints = [
+        Endpoint('fee_rates', url="https://mempool.space/api/v1/mining/blocks/fee-rates/1m"),
+        Endpoint('mining_pools', url="https://mempool.space/api/v1/mining/pools/1m"),
+        Endpoint('lightning', url="https://mempool.space/api/v1/lightning/statistics/1m"),
+        Endpoint('hashrate', url="https://mempool.space/api/v1/mining/hashrate/1m"),
+    ]
+
+    # The BTC price history is kept locally and refreshed with one bulk pull, instead of one request per day
+    # (no request at all if the stored history is already up to date)
+    btc_price_url = BtcPriceStore().refresh_url()
+    if btc_price_url is not None:
+        mempool_endpoints.append(Endpoint('btc_prices', url=btc_price_url))
+
+    return fetch_all(mempool_endpoints, per_host_limit=4, timeout=10, checkpoint=checkpoint)
+
+# %%
+
 # Part 2: Median Tx Fee from Mempool for the Past 1 Month (each row represents a group of blocks - per 3 blocks)
-def mempool_get_1m_avg_fee():
-    """Fetches the average fee rates for the past 1 month"""
-    url = "https://mempool.space/api/v1/mining/blocks/fee-rates/1m"
-    response = requests.get(url, timeout=10)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        raise ValueError("Failed to fetch 1 Month average fee rates!")
+def transform_btc_1m_mempool_fee(btc_mempool_responses):
+    mempool_data_1m_btc_fee = btc_mempool_responses['fee_rates']
 
-mempool_data_1m_btc_fee = mempool_get_1m_avg_fee()
+    # Convert to DataFrame for easier handling and analysis
+    df_mempool_data_1m_btc_fee = pd.DataFrame(mempool_data_1m_btc_fee)
 
-# Convert to DataFrame for easier handling and analysis
-df_mempool_data_1m_btc_fee = pd.DataFrame(mempool_data_1m_btc_fee)
+    # Extract the median fee, which is 'avgFee_50', along with timestamps and average block heights for reference
+    btc_1m_mempool_fee = df_mempool_data_1m_btc_fee[['avgHeight', 'timestamp', 'avgFee_50']].copy()
 
-# Extract the median fee, which is 'avgFee_50', along with timestamps and average block heights for reference
-btc_1m_mempool_fee = df_mempool_data_1m_btc_fee[['avgHeight', 'timestamp', 'avgFee_50']].copy()
+    # Convert the timestamp to readable date format
+    btc_1m_mempool_fee['time'] = pd.to_datetime(btc_1m_mempool_fee['timestamp'], unit='s')
 
-# Convert the timestamp to readable date format
-btc_1m_mempool_fee['time'] = pd.to_datetime(btc_1m_mempool_fee['timestamp'], unit='s')
+    return btc_1m_mempool_fee
 
 
 # %%
 
 # Part 3: Historical BTC Price Data from Mempool
-def mempool_get_btc_historical_price(timestamp):
-    """Fetch Bitcoin historical price in USD"""
-    url = f"https://mempool.space/api/v1/historical-price?currency=USD&timestamp={timestamp}"
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json()['prices'][0]
-    except requests.HTTPError as http_err:
-        print(f"HTTP error occurred: {http_err}")
-    except Exception as err:
-        print(f"An error occurred: {err}")
-    return None
-
-# Use the 'timestamp' data from 'btc_1m_mempool_fee', then calculate the step for every 48 rows(every 1 day)
-# The [::-1] reverses the DataFrame order, then [::48] takes every 48th row
-timestamps = btc_1m_mempool_fee['timestamp'].iloc[::-1].iloc[::48]
-
-# Fetch the data
-btc_historical_prices = []
-for ts in timestamps:
-    price_data = mempool_get_btc_historical_price(ts)
-    if price_data:
-        btc_historical_prices.append(price_data)
-
-# Check if we get the data back
-if btc_historical_prices:
+def transform_btc_1m_mempool_price(btc_mempool_responses, btc_1m_mempool_fee):
+    btc_price_store = BtcPriceStore()
+    if 'btc_prices' in btc_mempool_responses:
+        btc_price_store.update(btc_mempool_responses['btc_prices'])
+        btc_price_store.save()
+
+    # Use the 'timestamp' data from 'btc_1m_mempool_fee', then calculate the step for every 48 rows(every 1 day)
+    # The [::-1] reverses the DataFrame order, then [::48] takes every 48th row
+    timestamps = btc_1m_mempool_fee['timestamp'].iloc[::-1].iloc[::48]
+
+    # Look up the prices in the local store instead of requesting each timestamp
+    # (a timestamp without a stored price close enough fails the stage, rather than using a stale price)
+    btc_historical_prices = btc_price_store.prices_at(list(timestamps))
+
+    # Check if we get the data back
+    if not btc_historical_prices:
+        raise ValueError("No price data is available in the BTC price store.")
+
     # Convert to DataFrame for easier handling and analysis
     btc_1m_mempool_price = pd.DataFrame(btc_historical_prices)
 
     # Convert 'time' to readable date format and sort the data
     btc_1m_mempool_price['date'] = pd.to_datetime(btc_1m_mempool_price['time'], unit='s')
     btc_1m_mempool_price.sort_values('date', inplace=True)
-else:
-    print("No data was returned from the API.")
+
+    return btc_1m_mempool_price
 
 # %%
 
 # Part 4: Mining Pools Data from Mempools
-mempool_bitcoin_mining = requests.get("https://mempool.space/api/v1/mining/pools/1m", timeout=10)
-mining_pools_data = mempool_bitcoin_mining.json()
+def transform_btc_mempool_mining_pools(btc_mempool_responses):
+    mining_pools_data = btc_mempool_responses['mining_pools']
 
-btc_mempool_mining_pools = pd.DataFrame(mining_pools_data['pools']).drop(columns=['poolId', 'poolUniqueId'])
+    return pd.DataFrame(mining_pools_data['pools']).drop(columns=['poolId', 'poolUniqueId'])
 
 # %%
 
 # Part 5: Lightning Network Data from Mempool
-response = requests.get("https://mempool.space/api/v1/lightning/statistics/1m", timeout=10)
-data = response.json()
+def transform_btc_1m_mempool_lightning(btc_mempool_responses):
+    data = btc_mempool_responses['lightning']
 
-# Convert JSON data to DataFrame and select relevant columns
-lightning_mempool_total_capacity = pd.DataFrame(data)[["added", "total_capacity", "channel_count"]]
+    # Convert JSON data to DataFrame and select relevant columns
+    lightning_mempool_total_capacity = pd.DataFrame(data)[["added", "total_capacity", "channel_count"]]
 
-# Fix UNIX time stamp
-lightning_mempool_total_capacity["added"] = pd.to_datetime(\
-                                     lightning_mempool_total_capacity["added"], \
-                                     unit='s', origin='unix', utc=True)
+    # Fix UNIX time stamp
+    lightning_mempool_total_capacity["added"] = pd.to_datetime(\
+                                         lightning_mempool_total_capacity["added"], \
+                                         unit='s', origin='unix', utc=True)
 
-# Check if values are 0 and delete the rows if they are
-lightning_mempool_total_capacity = lightning_mempool_total_capacity[\
-                                 (lightning_mempool_total_capacity[['total_capacity', \
-                                                                'channel_count']] != 0).all(axis=1)]
+    # Check if values are 0 and delete the rows if they are
+    lightning_mempool_total_capacity = lightning_mempool_total_capacity[\
+                                     (lightning_mempool_total_capacity[['total_capacity', \
+                                                                    'channel_count']] != 0).all(axis=1)]
 
-# Reverse the order of the DataFrame for easier analysis
-btc_1m_mempool_lightning = lightning_mempool_total_capacity.iloc[::-1]
+    # Reverse the order of the DataFrame for easier analysis
+    return lightning_mempool_total_capacity.iloc[::-1]
 
 # %%
 
 # Part 6: Hashrate Fluctuation Data From Mempool (1 month)
-def mempool_get_1m_hashrate():
-    """Fetch Bitcoin hashrate data for the past 1 month and return as a Dataframe"""
-    url = "https://mempool.space/api/v1/mining/hashrate/1m"
-    response = requests.get(url, timeout=10)
-    if response.status_code == 200:
-        hashrate_data = response.json()['hashrates']
-        df = pd.DataFrame(hashrate_data)
-        
-        # Format 'timestamp' to datetime and convert 'avgHashrate' to Exahashes per second (EH/s)
-        df['time'] = pd.to_datetime(df['timestamp'], unit='s')
-        df['avgHashrate_EHs'] = df['avgHashrate'] / 1e18
-        df = df.drop(columns=['avgHashrate'])
-        
-        return df
-    else:
-        raise ValueError("Failed to fetch 1 Month hashrate data!")
+def transform_btc_1m_mempool_hashrate(btc_mempool_responses):
+    """Convert the Bitcoin hashrate data for the past 1 month into a Dataframe"""
+    df = pd.DataFrame(btc_mempool_responses['hashrate']['hashrates'])
+
+    # Format 'timestamp' to datetime and convert 'avgHashrate' to Exahashes per second (EH/s)
+    df['time'] = pd.to_datetime(df['timestamp'], unit='s')
+    df['avgHashrate_EHs'] = df['avgHashrate'] / 1e18
+    df = df.drop(columns=['avgHashrate'])
 
-btc_1m_mempool_hashrate = mempool_get_1m_hashrate()
+    return df
 
 # %%
 
 # Part 7: Fee Breakdown (Ordinals, BRC-20, and standard BTC tx) - Dune Analytics 1 Month Data
-dune = DuneClient(dune_api, request_timeout=10)
-query_result = dune.get_latest_result(2432967)
-
-dune_rows = query_result.get_rows()
-
-# Convert the retrieved data into a DataFrame
-btc_1m_dune_fee_breakdown = pd.DataFrame(dune_rows)
-
-# Ensure that the 'Day' column is in datetime format
-btc_1m_dune_fee_breakdown['Day'] = pd.to_datetime(btc_1m_dune_fee_breakdown['Day'])
-
-# Get the current date and calculate the date for 31 days (1 month) ago
-current_date = datetime.now()
-date_1_month_ago = current_date - timedelta(days=31)
-
-# Filter the DataFrame to include only the last month
-btc_1m_dune_fee_breakdown = btc_1m_dune_fee_breakdown[btc_1m_dune_fee_breakdown['Day'] >= date_1_month_ago]
+def extract_btc_1m_dune_fee_breakdown():
+    # Get the current date and calculate the date for 31 days (1 month) ago
+    current_date = datetime.now()
+    date_1_month_ago = current_date - timedelta(days=31)
+
+    # Only the last month and the columns used by the report are transferred from Dune
+    dune = DuneResultsClient(dune_api, request_timeout=10)
+    dune_rows = dune.get_latest_rows(
+        2432967,
+        columns=['Day', 'BRC20_Tx', 'non_BRC20_Ordi_Tx', 'non_Odrdinal_Tx'],
+        filters=date_filter('Day', date_1_month_ago),
+    )
+
+    # The reporting window is landed with the raw rows, so that a replay cuts the same window
+    return {'since': date_1_month_ago.isoformat(), 'rows': dune_rows}
+
+def transform_btc_1m_dune_fee_breakdown(btc_dune_fee_rows):
+    # Keep the last month sorted from earliest to latest, without the last (incomplete) day
+    since = datetime.fromisoformat(btc_dune_fee_rows['since'])
+    return dune_rows_to_frame(btc_dune_fee_rows['rows'], date_column='Day', since=since)
 
-# Sort the DataFrame by the 'Day' column from earliest to latest, and drop the last row
-btc_1m_dune_fee_breakdown = btc_1m_dune_fee_breakdown.sort_values('Day')
-btc_1m_dune_fee_breakdown = btc_1m_dune_fee_breakdown.drop(btc_1m_dune_fee_breakdown.index[-1])
+# %%
 
-# Reset the index to have a clean 'row_num' column
-btc_1m_dune_fee_breakdown.reset_index(drop=True, inplace=True)
+# Part 8: Aggregated Series for the Report (computed once here, so the app only reads the small series)
+def transform_btc_1m_mempool_fee_daily(btc_1m_mempool_fee):
+    """Average of the median fee ('avgFee_50') per day"""
+    daily = btc_1m_mempool_fee.assign(date=btc_1m_mempool_fee['time'].dt.normalize())
+    return daily.groupby('date')['avgFee_50'].mean().reset_index().sort_values('date')
+
+def transform_btc_mempool_mining_pools_top(btc_mempool_mining_pools):
+    """The top 10 mining pools by block count, with the other pools grouped as "Others", and their share of blocks"""
+    top_10_pools = btc_mempool_mining_pools.sort_values(by='blockCount', ascending=False).head(10)
+    other_pools = btc_mempool_mining_pools[~btc_mempool_mining_pools['name'].isin(top_10_pools['name'])]
+    other_pools = pd.DataFrame({'name': ['Others'], 'blockCount': [other_pools['blockCount'].sum()]})
+
+    pools = pd.concat([top_10_pools[['name', 'blockCount']], other_pools], ignore_index=True)
+    pools['percentage'] = pools['blockCount'] / pools['blockCount'].sum() * 100
+    return pools
+
+def transform_btc_1m_hashrate_vs_price(btc_1m_mempool_hashrate, btc_1m_mempool_price):
+    """The daily hashrate and price, joined on their day"""
+    hashrate = btc_1m_mempool_hashrate.assign(date=btc_1m_mempool_hashrate['time'].dt.normalize())
+    price = btc_1m_mempool_price.assign(date=btc_1m_mempool_price['date'].dt.normalize())
+    joined = pd.merge(hashrate[['date', 'avgHashrate_EHs']], price[['date', 'USD']], on='date', how='inner')
+    return joined.sort_values('date').reset_index(drop=True)
 
 # %%
 
-# Part 8: Load Dataframes to MongoDB
+# Part 9: Load Dataframes to MongoDB
 def load_to_mongodb(df, df_name, date_df, uri):
-    client = MongoClient(uri)
-    db = client['deftify_research']
+    # Every metric has one time-series collection, where the rows of this run are upserted by their time key
+    store = TimeSeriesStore(shared_loader(uri))
 
     # Check if 'time' exists in date_df
     if 'time' in date_df.columns:
@@ -315,32 +348,76 @@ def load_to_mongodb(df, df_name, date_df, uri):
     else:
         print(f"'time' column doesn't exist in date_df: {date_df.columns}")
 
-    # Create the collection name based on the latest month and year from 'date_df'
-    collection_name = f"{df_name}_{month}_{year}"
-
-    # Check if the collection already exists
-    if collection_name in db.list_collection_names():
-        print(f"Collection '{collection_name}' already exists. Skipping data upload.")
-        return
-
-    collection = db[collection_name]
-
-    # Convert DataFrame to dict
-    data_dict = df.to_dict("records")
-
-    # Insert each record in the DataFrame into the collection
-    collection.insert_many(data_dict)
+    # Snapshot metrics (e.g. the mining pools ranking) are stored at the last day of the period
+    # Only the rows that are new or changed since the last run are written
+    counts = store.write(df_name, df, snapshot_time=latest_date.normalize(), run_id=default_run_id())
+    print(f"{df_name}: {counts['inserted']} inserted, {counts['updated']} updated, {counts['skipped']} skipped")
 
     # Write the month and year to a .txt file to be recognized by the other scripts
     with open('month_year.txt', 'w') as f:
         f.write(f"{month}_{year}")
 
-# Store all the transformed dataframes into MongoDB collections, with 'btc_1m_mempool_fee' as 'date_df'
-load_to_mongodb(btc_1m_w_external, 'btc_1m_w_external', btc_1m_mempool_fee, mongodb_uri)
-load_to_mongodb(btc_1m_mempool_fee, 'btc_1m_mempool_fee', btc_1m_mempool_fee, mongodb_uri)
-load_to_mongodb(btc_1m_mempool_price, 'btc_1m_mempool_price', btc_1m_mempool_fee, mongodb_uri)
-load_to_mongodb(btc_mempool_mining_pools, 'btc_mempool_mining_pools', btc_1m_mempool_fee, mongodb_uri)
-load_to_mongodb(btc_1m_mempool_lightning, 'btc_1m_mempool_lightning', btc_1m_mempool_fee, mongodb_uri)
-load_to_mongodb(btc_1m_mempool_hashrate, 'btc_1m_mempool_hashrate', btc_1m_mempool_fee, mongodb_uri)
-load_to_mongodb(btc_1m_dune_fee_breakdown, 'btc_1m_dune_fee_breakdown', btc_1m_mempool_fee, mongodb_uri)
+def load_btc(**frames):
+    """Stores all the transformed dataframes into their time-series collections in MongoDB, with 'btc_1m_mempool_fee' as 'date_df'"""
+    for df_name, df in frames.items():
+        load_to_mongodb(df, df_name, frames['btc_1m_mempool_fee'], mongodb_uri)
 
+def stage_btc(**frames):
+    """Writes all the transformed dataframes to the columnar staging store, with 'btc_1m_mempool_fee' as the report period"""
+    return stage_frames(frames, frames['btc_1m_mempool_fee'], 'time', run_id=default_run_id())
+
+def publish_btc(btc_load, btc_stage):
+    """Renders the report figures of the loaded month (the staged report period) to a figure artifact for the app,
+    and renders again the artifacts of the earlier months whose data the load changed"""
+    return publish_report_figures('btc', [btc_stage], shared_loader(mongodb_uri).db)
+
+# %%
+
+# Pipeline: every Part above is a task, and each task only waits for the tasks it takes as inputs
+BTC_FRAMES = [
+    'btc_1m_w_external',
+    'btc_1m_mempool_fee',
+    'btc_1m_mempool_price',
+    'btc_mempool_mining_pools',
+    'btc_1m_mempool_lightning',
+    'btc_1m_mempool_hashrate',
+    'btc_1m_dune_fee_breakdown',
+    'btc_1m_mempool_fee_daily',
+    'btc_mempool_mining_pools_top',
+    'btc_1m_hashrate_vs_price',
+]
+
+BTC_TASKS = [
+    Task('btc_thegraph_prices', extract_btc_1m_w_external, kind='extract', source='thegraph'),
+    Task('btc_1m_w_external', transform_btc_1m_w_external, inputs=['btc_thegraph_prices']),
+    Task('btc_mempool_responses', extract_mempool, kind='extract', resumable=True, source='mempool'),
+    Task('btc_1m_mempool_fee', transform_btc_1m_mempool_fee, inputs=['btc_mempool_responses']),
+    Task('btc_1m_mempool_price', transform_btc_1m_mempool_price,
+         inputs=['btc_mempool_responses', 'btc_1m_mempool_fee']),
+    Task('btc_mempool_mining_pools', transform_btc_mempool_mining_pools, inputs=['btc_mempool_responses']),
+    Task('btc_1m_mempool_lightning', transform_btc_1m_mempool_lightning, inputs=['btc_mempool_responses']),
+    Task('btc_1m_mempool_hashrate', transform_btc_1m_mempool_hashrate, inputs=['btc_mempool_responses']),
+    Task('btc_dune_fee_rows', extract_btc_1m_dune_fee_breakdown, kind='extract', source='dune'),
+    Task('btc_1m_dune_fee_breakdown', transform_btc_1m_dune_fee_breakdown, inputs=['btc_dune_fee_rows']),
+    Task('btc_1m_mempool_fee_daily', transform_btc_1m_mempool_fee_daily, inputs=['btc_1m_mempool_fee']),
+    Task('btc_mempool_mining_pools_top', transform_btc_mempool_mining_pools_top, inputs=['btc_mempool_mining_pools']),
+    Task('btc_1m_hashrate_vs_price', transform_btc_1m_hashrate_vs_price,
+         inputs=['btc_1m_mempool_hashrate', 'btc_1m_mempool_price']),
+    Task('btc_load', load_btc, inputs=BTC_FRAMES, kind='load'),
+    Task('btc_stage', stage_btc, inputs=BTC_FRAMES, kind='stage'),
+    Task('btc_publish', publish_btc, inputs=['btc_load', 'btc_stage'], kind='publish'),
+]
+
+if __name__ == '__main__':
+    replay, replay_date = replay_args(sys.argv[1:])
+    if replay:
+        # Re-runs the transforms and loads from the landed responses, without any network
+        run_tasks(BTC_TASKS, landing=LandingZone(replay_date), replay=True)
+    else:
+        # A retry with the same run ID resumes from the first stage without a checkpoint
+        checkpoints = CheckpointStore(f"btc-{default_run_id()}")
+        try:
+            run_tasks(BTC_TASKS, checkpoints=checkpoints, landing=LandingZone())
+        finally:
+            report_latency()
+        checkpoints.clear()
@@ -6,18 +6,30 @@ ETL (Extract, Transform, Load) Script - Ethereum
 
 ## Libraries
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from dune_client.client import DuneClient
-from gql import gql, Client
-from gql.transport.requests import RequestsHTTPTransport
-from pymongo import MongoClient
+from gql import gql
+
+from etl_functions.http_client import RateLimitedHTTPTransport, http_client, report_latency
+from etl_functions.schema_cache import SchemaCachedClient
+from etl_functions.block_index import BlockIndex, JsonRpcBlockSource, SubgraphBlockSource
+from etl_functions.graphql_batch import WBTC_ADDRESS
+from etl_functions.price_oracle import PriceOracle
+from etl_functions.subgraph_sources import TVL_SOURCES, fetch_subgraph_responses
+from etl_functions.dune_fetch import DuneResultsClient, date_filter, dune_rows_to_frame, fetch_dune_rows
+from etl_functions.scheduler import Task, run_tasks
+from etl_functions.checkpoint import CheckpointStore, default_run_id
+from etl_functions.landing_zone import LandingZone, replay_args
+from etl_functions.frame_staging import stage_frames
+from etl_functions.mongo_loader import shared_loader
+from etl_functions.timeseries_store import TimeSeriesStore
+from shared_functions.figure_artifacts import publish_report_figures
 
 import os
+import sys
 import json
 import numpy as np
 import pandas as pd
-import requests
 import pytz
 
 # %%
@@ -28,90 +40,99 @@ load_dotenv()
 thegraph_api = os.environ.get('THEGRAPH_API')
 dune_api = os.environ.get('DUNE_API')
 mongodb_uri = os.getenv('MONGODB_URI')
+eth_rpc_url = os.environ.get('ETH_RPC_URL')
 
 OWLRACLE_API_KEY = os.environ.get("OWLRACLE_API")
 
 # %%
 
 # Part 1: 30 days of Ethereum and Bitcoin Price (Normalized) with TheGraph's Subgraph
-headers = {
-    "Authorization": f"Bearer {thegraph_api}",
-    "Content-Type": "application/json",
-}
-
-# We will use the same GraphQL client for both WBTC and ETH data
-transport = RequestsHTTPTransport(
-    url="https://gateway-arbitrum.network.thegraph.com/api/{thegraph_api}/deployments/id/QmZeCuoZeadgHkGwLwMeguyqUKz1WPWQYKcKyMCeQqGhsF",
-    headers=headers,
-    use_json=True,
-    timeout=10,
-)
-client = Client(
-    transport=transport,
-    fetch_schema_from_transport=True,
-)
-
-# Get the current block number
-meta_query = """
-{
-  _meta {
-    block {
-      number
+def uniswap_client():
+    """We will use the same GraphQL client for both WBTC and ETH data, and for the Uniswap data in Part 3"""
+    headers = {
+        "Authorization": f"Bearer {thegraph_api}",
+        "Content-Type": "application/json",
     }
-  }
-}
-"""
 
-current_block_response = client.execute(gql(meta_query))
-current_block = current_block_response['_meta']['block']['number']
-
-# we will use the block number from about 1 hour ago since very recent block might have indexing issue
-current_block_delayed = current_block - 300
-
-# Assuming ~12.06 seconds average per block on Ethereum daily
-seconds_per_day = 86400
-blocks_per_day = seconds_per_day // 12.06
-
-results = []
-
-# Loop through the past 30 days
-for days_ago in range(0, 30):
-    target_block = int(current_block_delayed - (blocks_per_day * days_ago))
-
-    # WBTC contract address
-    wbtc_query = f"""
-    query {{
-        token(id: "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599", block: {{ number: {target_block} }}) {{
-            id
-            symbol
-            name
-            derivedETH
-        }}
-        bundle(id: "1", block: {{ number: {target_block} }}) {{
-            ethPriceUSD
-        }}
-    }}
+    transport = RateLimitedHTTPTransport(
+        url="https://gateway-arbitrum.network.thegraph.com/api/{thegraph_api}/deployments/id/QmZeCuoZeadgHkGwLwMeguyqUKz1WPWQYKcKyMCeQqGhsF",
+        headers=headers,
+        use_json=True,
+        timeout=10,
+    )
+    return SchemaCachedClient(
+        transport=transport,
+    )
+
+def extract_eth_1m_w_external():
+    """Fetches the WBTC and ETH prices at the first block of each of the past 30 days"""
+    client = uniswap_client()
+
+    # Get the current block number
+    meta_query = """
+    {
+      _meta {
+        block {
+          number
+        }
+      }
+    }
     """
 
-    wbtc_response = None
+    current_block_response = client.execute(gql(meta_query))
+    current_block = current_block_response['_meta']['block']['number']
+
+    # we will use the block number from about 1 hour ago since very recent block might have indexing issue
+    current_block_delayed = current_block - 300
+
+    # Block timestamps come from a local JSON-RPC node if one is configured, otherwise from the subgraph
+    block_source = JsonRpcBlockSource(eth_rpc_url) if eth_rpc_url else SubgraphBlockSource(client)
+    block_index = BlockIndex()
+
+    # Sample the first block at 00:00 UTC for each of the past 30 days, starting from the latest indexed day
+    latest_block_time = datetime.fromtimestamp(block_index.timestamp_of(current_block_delayed, block_source), timezone.utc)
+    latest_midnight = latest_block_time.replace(hour=0, minute=0, second=0, microsecond=0)
+    day_starts = [int((latest_midnight - timedelta(days=days_ago)).timestamp()) for days_ago in range(0, 30)]
 
-    # Execute the WBTC query
+    # Resolved days are answered from the local index, only new days need a few batched lookups
+    day_blocks = block_index.resolve(day_starts, block_source, latest_block=current_block_delayed)
+
+    # Target blocks for the past 30 days
+    target_blocks = [day_blocks[day_start] for day_start in day_starts]
+
+    # The shared price oracle reuses the WBTC prices that the BTC pipeline already fetched for these blocks
+    # A failed query fails the task, so that nothing is checkpointed and a retry fetches the prices again
     try:
-        wbtc_response = client.execute(gql(wbtc_query))
+        wbtc_prices = PriceOracle(client).prices_at_blocks(WBTC_ADDRESS, target_blocks, include_bundle=True)
     except Exception as e:
         print("Error executing wbtc_query:", e)
+        raise ValueError("Failed to fetch the WBTC prices from TheGraph") from e
 
-    wbtc_price_in_eth = float(wbtc_response['token']['derivedETH'])
-    eth_price_in_usd = float(wbtc_response['bundle']['ethPriceUSD'])
-    wbtc_price_in_usd = wbtc_price_in_eth * eth_price_in_usd
+    # The prices are kept as a list in target block order, so that the raw output stays plain JSON for the landing zone
+    return {
+        'day_starts': day_starts,
+        'target_blocks': target_blocks,
+        'wbtc_prices': [wbtc_prices[block] for block in target_blocks],
+    }
 
-    # Append the results with ETH data instead of PAXG
-    results.append({
-        'target_block': target_block,
-        'wbtc_price_in_eth': wbtc_price_in_eth,
-        'eth_price_in_usd': eth_price_in_usd,
-        'wbtc_price_in_usd': wbtc_price_in_usd,
-    })
+def transform_eth_1m_w_external(eth_thegraph_prices):
+    results = []
+
+    for day_start, target_block, wbtc_price in zip(eth_thegraph_prices['day_starts'],
+                                                   eth_thegraph_prices['target_blocks'],
+                                                   eth_thegraph_prices['wbtc_prices']):
+        wbtc_price_in_eth = wbtc_price['derivedETH']
+        eth_price_in_usd = wbtc_price['ethPriceUSD']
+        wbtc_price_in_usd = wbtc_price_in_eth * eth_price_in_usd
+
+        # Append the results with ETH data instead of PAXG
+        results.append({
+            'time': pd.to_datetime(day_start, unit='s'),
+            'target_block': target_block,
+            'wbtc_price_in_eth': wbtc_price_in_eth,
+            'eth_price_in_usd': eth_price_in_usd,
+            'wbtc_price_in_usd': wbtc_price_in_usd,
+        })
 
     # Reverse the order of the results
     results_ordered = list(reversed(results))
@@ -119,61 +140,71 @@ for days_ago in range(0, 30):
     # Convert results to a pandas DataFrame
     eth_1m_w_external = pd.DataFrame(results_ordered)
 
-# Normalize the price between BTC and ETH
-eth_1m_w_external['eth_price_normalized'] = eth_1m_w_external['eth_price_in_usd'] \
-                                         / eth_1m_w_external['eth_price_in_usd'].iloc[0]
-eth_1m_w_external['btc_price_normalized'] = eth_1m_w_external['wbtc_price_in_usd'] \
-                                         / eth_1m_w_external['wbtc_price_in_usd'].iloc[0]
+    # Normalize the price between BTC and ETH
+    eth_1m_w_external['eth_price_normalized'] = eth_1m_w_external['eth_price_in_usd'] \
+                                             / eth_1m_w_external['eth_price_in_usd'].iloc[0]
+    eth_1m_w_external['btc_price_normalized'] = eth_1m_w_external['wbtc_price_in_usd'] \
+                                             / eth_1m_w_external['wbtc_price_in_usd'].iloc[0]
 
-# for 30 days of Ethereum price, simply use the 'eth_price_in_usd' column
+    # for 30 days of Ethereum price, simply use the 'eth_price_in_usd' column
+    return eth_1m_w_external
 
 # %%
 
 # Part 2: Average Gas Fee History from Owlracle for the Past 30 Days
 #  Documentation: https://owlracle.info/docs#endpoint-history
-response = requests.get(f"https://api.owlracle.info/v4/eth/history?apikey={OWLRACLE_API_KEY}&candles=30&timeframe=1440", \
-                        timeout=30)
+def extract_eth_1m_gas_fee():
+    response = http_client.get(f"https://api.owlracle.info/v4/eth/history?apikey={OWLRACLE_API_KEY}&candles=30&timeframe=1440", \
+                            timeout=30)
 
-content = response.content
-data = json.loads(content)
+    content = response.content
+    return json.loads(content)
 
-eth_1m_gas_fee = pd.DataFrame(data['candles'], columns=['gasPrice', 'samples', 'timestamp'])
+def transform_eth_1m_gas_fee(eth_owlracle_history):
+    eth_1m_gas_fee = pd.DataFrame(eth_owlracle_history['candles'], columns=['gasPrice', 'samples', 'timestamp'])
 
-# Unnest the 'gasPrice' column to get 'high', and drop the original gasPrice column
-eth_1m_gas_fee['gasPrice_close'] = eth_1m_gas_fee['gasPrice'].apply(lambda x: x['close'])
-eth_1m_gas_fee.drop('gasPrice', axis=1, inplace=True)
+    # Unnest the 'gasPrice' column to get 'high', and drop the original gasPrice column
+    eth_1m_gas_fee['gasPrice_close'] = eth_1m_gas_fee['gasPrice'].apply(lambda x: x['close'])
+    eth_1m_gas_fee.drop('gasPrice', axis=1, inplace=True)
 
-# Convert the 'timestamp' column to a datetime format
-eth_1m_gas_fee['timestamp'] = pd.to_datetime(eth_1m_gas_fee['timestamp'])
+    # Convert the 'timestamp' column to a datetime format
+    eth_1m_gas_fee['timestamp'] = pd.to_datetime(eth_1m_gas_fee['timestamp'])
+
+    return eth_1m_gas_fee
 
 
 # %%
 
 # Part 3: Fetch TVL and Fees from Uniswap for the Past Month with TheGraph's Subgraph
+def extract_eth_1m_uniswap_data():
+    # GraphQL query to fetch Uniswap data
+    uniswap_query = """
+    {
+      uniswapDayDatas(orderBy: date, orderDirection: desc, first: 31) {
+        date
+        feesUSD
+        tvlUSD
+        txCount
+        volumeUSD
+      }
+    }
+    """
 
-# GraphQL query to fetch Uniswap data
-uniswap_query = """
-{
-  uniswapDayDatas(orderBy: date, orderDirection: desc, first: 31) {
-    date
-    feesUSD
-    tvlUSD
-    txCount
-    volumeUSD
-  }
-}
-"""
+    # Execute the query using the same GraphQL client as Part 1
+    try:
+        uniswap_response = uniswap_client().execute(gql(uniswap_query))
+    except Exception as e:
+        print("Error executing uniswap_query:", e)
+        uniswap_response = None
+
+    if not uniswap_response:
+        raise ValueError("Failed to fetch Uniswap data from TheGraph")
 
-# Execute the query using the same GraphQL client as before
-try:
-    uniswap_response = client.execute(gql(uniswap_query))
-except Exception as e:
-    print("Error executing uniswap_query:", e)
-    uniswap_response = None
+    return uniswap_response
 
-if uniswap_response:
+def transform_eth_1m_uniswap_data(eth_uniswap_response):
     # Extract the data from the response and convert it to a DataFrame
-    uniswap_data = uniswap_response['uniswapDayDatas']
+    uniswap_data = eth_uniswap_response['uniswapDayDatas']
     eth_1m_uniswap_data = pd.DataFrame(uniswap_data)
 
     # Convert the 'date' column from UNIX timestamp
@@ -185,313 +216,160 @@ if uniswap_response:
     eth_1m_uniswap_data['volumeUSD'] = eth_1m_uniswap_data['volumeUSD'].astype(float)
     eth_1m_uniswap_data['txCount'] = eth_1m_uniswap_data['txCount'].astype(int)
 
-else:
-    print("Failed to fetch Uniswap data from TheGraph")
-
-
-# %%
-
-# Part 4: Fetch TVL from Lido with TheGraph's Subgraph
-
-# GraphQL query to fetch Lido data
-lido_query = """
-{
-  financialsDailySnapshots(orderBy: timestamp, orderDirection: desc, first: 31) {
-    totalValueLockedUSD
-    timestamp
-  }
-}
-"""
-
-# Different client for Lido data
-transport_lido = RequestsHTTPTransport(
-    url="https://gateway-arbitrum.network.thegraph.com/api/{thegraph_api}/subgraphs/id/F7qb71hWab6SuRL5sf6LQLTpNahmqMsBnnweYHzLGUyG",
-    headers=headers,
-    use_json=True,
-    timeout=10,
-)
-client_lido = Client(
-    transport=transport_lido,
-    fetch_schema_from_transport=True,
-)
-
-# Execute the query
-try:
-    lido_response = client_lido.execute(gql(lido_query))
-except Exception as e:
-    print("Error executing lido_query:", e)
-    lido_response = None
-
-if lido_response:
-    # Extract the data from the response and convert it to a DataFrame
-    lido_data = lido_response['financialsDailySnapshots']
-    eth_1m_lido_data = pd.DataFrame(lido_data)
-
-    # Convert the columns to the appropriate data types
-    eth_1m_lido_data['totalValueLockedUSD'] = eth_1m_lido_data['totalValueLockedUSD'].astype(float)
-    eth_1m_lido_data['timestamp'] = pd.to_datetime(eth_1m_lido_data['timestamp'], unit='s')
-
-else:
-    print("Failed to fetch Lido data from TheGraph")
-
+    return eth_1m_uniswap_data
 
 
 # %%
 
-# Part 5: Fetch TVL from Aave with TheGraph's Subgraph
-
-# GraphQL query to fetch Aave data
-aave_query = """
-{
-  financialsDailySnapshots(orderBy: timestamp, orderDirection: desc, first: 31) {
-    totalValueLockedUSD
-    timestamp
-  }
-}
-"""
-
-# Different client for Aave data
-transport_aave = RequestsHTTPTransport(
-    url="https://gateway-arbitrum.network.thegraph.com/api/{thegraph_api}/subgraphs/id/C2zniPn45RnLDGzVeGZCx2Sw3GXrbc9gL4ZfL8B8Em2j",
-    headers=headers,
-    use_json=True,
-    timeout=10,
-)
-client_aave = Client(
-    transport=transport_aave,
-    fetch_schema_from_transport=True,
-)
-
-# Execute the query
-try:
-    aave_response = client_aave.execute(gql(aave_query))
-except Exception as e:
-    print("Error executing aave_query:", e)
-    aave_response = None
-
-if aave_response:
-    # Extract the data from the response and convert it to a DataFrame
-    aave_data = aave_response['financialsDailySnapshots']
-    eth_1m_aave_data = pd.DataFrame(aave_data)
-
-    # Convert the columns to the appropriate data types
-    eth_1m_aave_data['totalValueLockedUSD'] = eth_1m_aave_data['totalValueLockedUSD'].astype(float)
-    eth_1m_aave_data['timestamp'] = pd.to_datetime(eth_1m_aave_data['timestamp'], unit='s')
-
-else:
-    print("Failed to fetch Aave data from TheGraph")
-
-
-# %%
-
-# Part 6: Fetch TVL from Makerdao with TheGraph's Subgraph
-
-# GraphQL query to fetch Makerdao data
-makerdao_query = """
-{
-  financialsDailySnapshots(orderBy: timestamp, orderDirection: desc, first: 31) {
-    totalValueLockedUSD
-    timestamp
-  }
-}
-"""
-
-# Different client for makerdao data
-transport_makerdao = RequestsHTTPTransport(
-    url="https://gateway-arbitrum.network.thegraph.com/api/{thegraph_api}/subgraphs/id/8sE6rTNkPhzZXZC6c8UQy2ghFTu5PPdGauwUBm4t7HZ1",
-    headers=headers,
-    use_json=True,
-    timeout=10,
-)
-client_makerdao = Client(
-    transport=transport_makerdao,
-    fetch_schema_from_transport=True,
-)
-
-# Execute the query
-try:
-    makerdao_response = client_makerdao.execute(gql(makerdao_query))
-except Exception as e:
-    print("Error executing makerdao_query:", e)
-    makerdao_response = None
-
-if makerdao_response:
-    # Extract the data from the response and convert it to a DataFrame
-    makerdao_data = makerdao_response['financialsDailySnapshots']
-    eth_1m_makerdao_data = pd.DataFrame(makerdao_data)
-
-    # Convert the columns to the appropriate data types
-    eth_1m_makerdao_data['totalValueLockedUSD'] = eth_1m_makerdao_data['totalValueLockedUSD'].astype(float)
-    eth_1m_makerdao_data['timestamp'] = pd.to_numeric(eth_1m_makerdao_data['timestamp'])
-    eth_1m_makerdao_data['timestamp'] = pd.to_datetime(eth_1m_makerdao_data['timestamp'], unit='s')
-
-else:
-    print("Failed to fetch Makerdao data from TheGraph")
+# Parts 4-6: Fetch TVL from Lido, Aave and MakerDAO with TheGraph's Subgraphs
+def extract_eth_tvl_sources():
+    """Every protocol is declared in TVL_SOURCES (deployment ID and field types), and all of them are fetched concurrently"""
+    try:
+        return fetch_subgraph_responses(TVL_SOURCES, thegraph_api)
+    except Exception as e:
+        print("Error executing the TVL subgraph queries:", e)
+        raise ValueError("Failed to fetch Lido, Aave and MakerDAO data from TheGraph") from e
 
 # %%
 # Part 7: Merge Non-Uniswap Protocol Dataframes
-eth_1m_aave_data = eth_1m_aave_data.rename(columns={'totalValueLockedUSD': 'tvl_aave'})
-eth_1m_lido_data = eth_1m_lido_data.rename(columns={'totalValueLockedUSD': 'tvl_lido'})
-eth_1m_makerdao_data = eth_1m_makerdao_data.rename(columns={'totalValueLockedUSD': 'tvl_makerdao'})
+def transform_eth_1m_tvl(eth_tvl_sources):
+    frames = {source.name: source.to_frame(eth_tvl_sources[source.name]) for source in TVL_SOURCES}
+    eth_1m_aave_data = frames['aave'].rename(columns={'totalValueLockedUSD': 'tvl_aave'})
+    # The rows are matched by position (one daily snapshot per row), and the Aave snapshot time is kept as the day
+    eth_1m_lido_data = frames['lido'].rename(columns={'totalValueLockedUSD': 'tvl_lido'}).drop(columns=['timestamp'])
+    eth_1m_makerdao_data = frames['makerdao'].rename(columns={'totalValueLockedUSD': 'tvl_makerdao'}).drop(columns=['timestamp'])
 
-eth_1m_aave_data['row_index'] = np.arange(len(eth_1m_aave_data))
-eth_1m_lido_data['row_index'] = np.arange(len(eth_1m_lido_data))
-eth_1m_makerdao_data['row_index'] = np.arange(len(eth_1m_makerdao_data))
+    eth_1m_aave_data['row_index'] = np.arange(len(eth_1m_aave_data))
+    eth_1m_lido_data['row_index'] = np.arange(len(eth_1m_lido_data))
+    eth_1m_makerdao_data['row_index'] = np.arange(len(eth_1m_makerdao_data))
 
-eth_1m_tvl = pd.merge(eth_1m_aave_data, eth_1m_lido_data, on='row_index', how='left')
-eth_1m_tvl = pd.merge(eth_1m_tvl, eth_1m_makerdao_data, on='row_index', how='left')
+    eth_1m_tvl = pd.merge(eth_1m_aave_data, eth_1m_lido_data, on='row_index', how='left')
+    eth_1m_tvl = pd.merge(eth_1m_tvl, eth_1m_makerdao_data, on='row_index', how='left')
 
-eth_1m_tvl['day_num'] = eth_1m_tvl['row_index'].max() - eth_1m_tvl['row_index']
+    eth_1m_tvl['day_num'] = eth_1m_tvl['row_index'].max() - eth_1m_tvl['row_index']
 
-columns_to_keep = ['row_index', 'day_num', 'tvl_aave', 'tvl_lido', 'tvl_makerdao']
-eth_1m_tvl = eth_1m_tvl[columns_to_keep]
+    columns_to_keep = ['row_index', 'day_num', 'timestamp', 'tvl_aave', 'tvl_lido', 'tvl_makerdao']
+    return eth_1m_tvl[columns_to_keep]
 
 # %%
 
 # Part 8: L2 Bridge Stats From Dune Analytics
-# Get the current date and calculate the date for 31 days (1 month) ago
-current_date = datetime.now(pytz.utc)
-date_1_month_ago = current_date - timedelta(days=31)
-
-# ZKSync Stats
-dune = DuneClient(dune_api, request_timeout=10)
-query_result_zksync = dune.get_latest_result(784184)
-dune_rows_zksync = query_result_zksync.get_rows()
-
-eth_1m_l2_bridge_zksync = pd.DataFrame(dune_rows_zksync)
-
-eth_1m_l2_bridge_zksync['day'] = pd.to_datetime(eth_1m_l2_bridge_zksync['day'])
-
-eth_1m_l2_bridge_zksync = eth_1m_l2_bridge_zksync[eth_1m_l2_bridge_zksync['day'] >= date_1_month_ago]
-
-eth_1m_l2_bridge_zksync = eth_1m_l2_bridge_zksync.sort_values('day')
-
-# Remove the last row since the data might not be complete for the current day
-eth_1m_l2_bridge_zksync = eth_1m_l2_bridge_zksync.drop(eth_1m_l2_bridge_zksync.index[-1])
-# Reset the index to have a clean 'row_num' column
-eth_1m_l2_bridge_zksync.reset_index(drop=True, inplace=True)
-
-# Starknet Stats
-query_result_starknet = dune.get_latest_result(831568)
-dune_rows_starknet = query_result_starknet.get_rows()
-
-eth_1m_l2_bridge_starknet = pd.DataFrame(dune_rows_starknet)
-
-eth_1m_l2_bridge_starknet['day'] = pd.to_datetime(eth_1m_l2_bridge_starknet['day'])
-
-eth_1m_l2_bridge_starknet = eth_1m_l2_bridge_starknet[eth_1m_l2_bridge_starknet['day'] >= date_1_month_ago]
-
-eth_1m_l2_bridge_starknet = eth_1m_l2_bridge_starknet.sort_values('day')
-
-# Remove the last row since the data might not be complete for the current day
-eth_1m_l2_bridge_starknet = eth_1m_l2_bridge_starknet.drop(eth_1m_l2_bridge_starknet.index[-1])
-# Reset the index to have a clean 'row_num' column
-eth_1m_l2_bridge_starknet.reset_index(drop=True, inplace=True)
-
-# Arbitrum Stats
-query_result_arbitrum = dune.get_latest_result(784216)
-dune_rows_arbitrum = query_result_arbitrum.get_rows()
-
-eth_1m_l2_bridge_arbitrum = pd.DataFrame(dune_rows_arbitrum)
-
-eth_1m_l2_bridge_arbitrum['day'] = pd.to_datetime(eth_1m_l2_bridge_arbitrum['day'])
-
-eth_1m_l2_bridge_arbitrum = eth_1m_l2_bridge_arbitrum[eth_1m_l2_bridge_arbitrum['day'] >= date_1_month_ago]
-
-eth_1m_l2_bridge_arbitrum = eth_1m_l2_bridge_arbitrum.sort_values('day')
-
-# Remove the last row since the data might not be complete for the current day
-eth_1m_l2_bridge_arbitrum = eth_1m_l2_bridge_arbitrum.drop(eth_1m_l2_bridge_arbitrum.index[-1])
-# Reset the index to have a clean 'row_num' column
-eth_1m_l2_bridge_arbitrum.reset_index(drop=True, inplace=True)
-
-# Optimism Stats
-query_result_optimism = dune.get_latest_result(784244)
-dune_rows_optimism = query_result_optimism.get_rows()
-
-eth_1m_l2_bridge_optimism = pd.DataFrame(dune_rows_optimism)
-
-eth_1m_l2_bridge_optimism['day'] = pd.to_datetime(eth_1m_l2_bridge_optimism['day'])
-
-eth_1m_l2_bridge_optimism = eth_1m_l2_bridge_optimism[eth_1m_l2_bridge_optimism['day'] >= date_1_month_ago]
-
-eth_1m_l2_bridge_optimism = eth_1m_l2_bridge_optimism.sort_values('day')
-
-# Remove the last row since the data might not be complete for the current day
-eth_1m_l2_bridge_optimism = eth_1m_l2_bridge_optimism.drop(eth_1m_l2_bridge_optimism.index[-1])
-# Reset the index to have a clean 'row_num' column
-eth_1m_l2_bridge_optimism.reset_index(drop=True, inplace=True)
-
-# Base Stats
-query_result_base = dune.get_latest_result(2896672)
-dune_rows_base = query_result_base.get_rows()
-
-eth_1m_l2_bridge_base = pd.DataFrame(dune_rows_base)
-
-eth_1m_l2_bridge_base['day'] = pd.to_datetime(eth_1m_l2_bridge_base['day'])
+def extract_eth_l2_bridges():
+    # Get the current date and calculate the date for 31 days (1 month) ago
+    current_date = datetime.now(pytz.utc)
+    date_1_month_ago = current_date - timedelta(days=31)
+
+    # All five L2 bridge queries are retrieved concurrently and share the same post-processing
+    # Only the reporting window and the columns we keep are transferred from Dune
+    l2_bridge_queries = {
+        'zksync': 784184,
+        'starknet': 831568,
+        'arbitrum': 784216,
+        'optimism': 784244,
+        'base': 2896672,
+    }
 
-eth_1m_l2_bridge_base = eth_1m_l2_bridge_base[eth_1m_l2_bridge_base['day'] >= date_1_month_ago]
+    dune = DuneResultsClient(dune_api, request_timeout=10)
+    rows = fetch_dune_rows(dune, l2_bridge_queries.values(), columns=['day', 'users'],
+                           filters=date_filter('day', date_1_month_ago))
 
-eth_1m_l2_bridge_base = eth_1m_l2_bridge_base.sort_values('day')
+    # The reporting window is landed with the raw rows, so that a replay cuts the same window
+    return {
+        'since': date_1_month_ago.isoformat(),
+        'rows': {name: rows[query_id] for name, query_id in l2_bridge_queries.items()},
+    }
 
-# Remove the last row since the data might not be complete for the current day
-eth_1m_l2_bridge_base = eth_1m_l2_bridge_base.drop(eth_1m_l2_bridge_base.index[-1])
-# Reset the index to have a clean 'row_num' column
-eth_1m_l2_bridge_base.reset_index(drop=True, inplace=True)
+def transform_eth_1m_l2_bridge_all(eth_l2_bridges):
+    since = datetime.fromisoformat(eth_l2_bridges['since'])
+    frames = {name: dune_rows_to_frame(rows, date_column='day', since=since)
+              for name, rows in eth_l2_bridges['rows'].items()}
 
-# Merge all the L2 bridge dataframes
-eth_1m_l2_bridge_arbitrum = eth_1m_l2_bridge_arbitrum.rename(columns={'users': 'users_arbitrum'})
-eth_1m_l2_bridge_base = eth_1m_l2_bridge_base.rename(columns={'total': 'total_base', 'users': 'users_base'})
-eth_1m_l2_bridge_optimism = eth_1m_l2_bridge_optimism.rename(columns={'total': 'total_optimism', 'users': 'users_optimism'})
-eth_1m_l2_bridge_starknet = eth_1m_l2_bridge_starknet.rename(columns={'total': 'total_starknet', 'users': 'users_starknet'})
-eth_1m_l2_bridge_zksync = eth_1m_l2_bridge_zksync.rename(columns={'total': 'total_zksync', 'users': 'users_zksync'})
+    # Merge all the L2 bridge dataframes
+    eth_1m_l2_bridge_arbitrum = frames['arbitrum'].rename(columns={'users': 'users_arbitrum'})
+    eth_1m_l2_bridge_base = frames['base'].rename(columns={'total': 'total_base', 'users': 'users_base'})
+    eth_1m_l2_bridge_optimism = frames['optimism'].rename(columns={'total': 'total_optimism', 'users': 'users_optimism'})
+    eth_1m_l2_bridge_starknet = frames['starknet'].rename(columns={'total': 'total_starknet', 'users': 'users_starknet'})
+    eth_1m_l2_bridge_zksync = frames['zksync'].rename(columns={'total': 'total_zksync', 'users': 'users_zksync'})
 
-eth_1m_l2_bridge_all = pd.merge(eth_1m_l2_bridge_zksync, eth_1m_l2_bridge_starknet, on='day', how='left')
-eth_1m_l2_bridge_all = pd.merge(eth_1m_l2_bridge_all, eth_1m_l2_bridge_arbitrum, on='day', how='left')
-eth_1m_l2_bridge_all = pd.merge(eth_1m_l2_bridge_all, eth_1m_l2_bridge_optimism, on='day', how='left')
-eth_1m_l2_bridge_all = pd.merge(eth_1m_l2_bridge_all, eth_1m_l2_bridge_base, on='day', how='left')
+    eth_1m_l2_bridge_all = pd.merge(eth_1m_l2_bridge_zksync, eth_1m_l2_bridge_starknet, on='day', how='left')
+    eth_1m_l2_bridge_all = pd.merge(eth_1m_l2_bridge_all, eth_1m_l2_bridge_arbitrum, on='day', how='left')
+    eth_1m_l2_bridge_all = pd.merge(eth_1m_l2_bridge_all, eth_1m_l2_bridge_optimism, on='day', how='left')
+    eth_1m_l2_bridge_all = pd.merge(eth_1m_l2_bridge_all, eth_1m_l2_bridge_base, on='day', how='left')
 
-columns_to_keep = ['users_arbitrum', 'users_base', 'users_optimism', 'users_starknet', 'users_zksync', 'day']
-eth_1m_l2_bridge_all = eth_1m_l2_bridge_all[columns_to_keep]
+    columns_to_keep = ['users_arbitrum', 'users_base', 'users_optimism', 'users_starknet', 'users_zksync', 'day']
+    return eth_1m_l2_bridge_all[columns_to_keep]
 
 
 # %%
 
 # Part 9: Load Dataframes to MongoDB
 def load_to_mongodb(df, df_name, date_df, uri):
-    client = MongoClient(uri)
-    db = client['deftify_research']
+    # Every metric has one time-series collection, where the rows of this run are upserted by their time key
+    store = TimeSeriesStore(shared_loader(uri))
 
     # Check if 'timestamp' exists in date_df
     if 'timestamp' in date_df.columns:
         # Get the latest date from the 'timestamp' column of 'date_df'
         latest_date = date_df['timestamp'].max()
-
-        # Extract the month and year from the latest date
-        month = latest_date.strftime('%B').lower()
-        year = latest_date.year
     else:
         print(f"'timestamp' column doesn't exist in date_df: {date_df.columns}")
 
-    # Create the collection name based on the latest month and year from 'date_df'
-    collection_name = f"{df_name}_{month}_{year}"
+    # Snapshot metrics (e.g. the mining pools ranking) are stored at the last day of the period
+    # Only the rows that are new or changed since the last run are written
+    counts = store.write(df_name, df, snapshot_time=latest_date.normalize(), run_id=default_run_id())
+    print(f"{df_name}: {counts['inserted']} inserted, {counts['updated']} updated, {counts['skipped']} skipped")
 
-    # Check if the collection already exists
-    if collection_name in db.list_collection_names():
-        print(f"Collection '{collection_name}' already exists. Skipping data upload.")
-        return
+def load_eth(**frames):
+    """Stores all the transformed dataframes into their time-series collections in MongoDB, with 'eth_1m_gas_fee' as 'date_df'"""
+    for df_name, df in frames.items():
+        load_to_mongodb(df, df_name, frames['eth_1m_gas_fee'], mongodb_uri)
 
-    collection = db[collection_name]
+def stage_eth(**frames):
+    """Writes all the transformed dataframes to the columnar staging store, with 'eth_1m_gas_fee' as the report period"""
+    return stage_frames(frames, frames['eth_1m_gas_fee'], 'timestamp', run_id=default_run_id())
 
-    # Convert DataFrame to dict
-    data_dict = df.to_dict("records")
+def publish_eth(eth_load, eth_stage):
+    """Renders the report figures of the loaded month (the staged report period) to a figure artifact for the app,
+    and renders again the artifacts of the earlier months whose data the load changed"""
+    return publish_report_figures('eth', [eth_stage], shared_loader(mongodb_uri).db)
 
-    # Insert each record in the DataFrame into the collection
-    collection.insert_many(data_dict)
+# %%
 
-# Store all the transformed dataframes into MongoDB collections, with 'eth_1m_gas_fee' as 'date_df'
-load_to_mongodb(eth_1m_w_external, 'eth_1m_w_external', eth_1m_gas_fee, mongodb_uri)
-load_to_mongodb(eth_1m_gas_fee, 'eth_1m_gas_fee', eth_1m_gas_fee, mongodb_uri)
-load_to_mongodb(eth_1m_uniswap_data, 'eth_1m_uniswap_data', eth_1m_gas_fee, mongodb_uri)
-load_to_mongodb(eth_1m_tvl, 'eth_1m_tvl', eth_1m_gas_fee, mongodb_uri)
-load_to_mongodb(eth_1m_l2_bridge_all, 'eth_1m_l2_bridge_all', eth_1m_gas_fee, mongodb_uri)
+# Pipeline: every Part above is a task, and each task only waits for the tasks it takes as inputs
+ETH_FRAMES = [
+    'eth_1m_w_external',
+    'eth_1m_gas_fee',
+    'eth_1m_uniswap_data',
+    'eth_1m_tvl',
+    'eth_1m_l2_bridge_all',
+]
+
+ETH_TASKS = [
+    Task('eth_thegraph_prices', extract_eth_1m_w_external, kind='extract', source='thegraph'),
+    Task('eth_1m_w_external', transform_eth_1m_w_external, inputs=['eth_thegraph_prices']),
+    Task('eth_owlracle_history', extract_eth_1m_gas_fee, kind='extract', source='owlracle'),
+    Task('eth_1m_gas_fee', transform_eth_1m_gas_fee, inputs=['eth_owlracle_history']),
+    Task('eth_uniswap_response', extract_eth_1m_uniswap_data, kind='extract', source='thegraph'),
+    Task('eth_1m_uniswap_data', transform_eth_1m_uniswap_data, inputs=['eth_uniswap_response']),
+    Task('eth_tvl_sources', extract_eth_tvl_sources, kind='extract', source='thegraph'),
+    Task('eth_1m_tvl', transform_eth_1m_tvl, inputs=['eth_tvl_sources']),
+    Task('eth_l2_bridges', extract_eth_l2_bridges, kind='extract', source='dune'),
+    Task('eth_1m_l2_bridge_all', transform_eth_1m_l2_bridge_all, inputs=['eth_l2_bridges']),
+    Task('eth_load', load_eth, inputs=ETH_FRAMES, kind='load'),
+    Task('eth_stage', stage_eth, inputs=ETH_FRAMES, kind='stage'),
+    Task('eth_publish', publish_eth, inputs=['eth_load', 'eth_stage'], kind='publish'),
+]
+
+if __name__ == '__main__':
+    replay, replay_date = replay_args(sys.argv[1:])
+    if replay:
+        # Re-runs the transforms and loads from the landed responses, without any network
+        run_tasks(ETH_TASKS, landing=LandingZone(replay_date), replay=True)
+    else:
+        # A retry with the same run ID resumes from the first stage without a checkpoint
+        checkpoints = CheckpointStore(f"eth-{default_run_id()}")
+        try:
+            run_tasks(ETH_TASKS, checkpoints=checkpoints, landing=LandingZone())
+        finally:
+            report_latency()
+        checkpoints.clear()
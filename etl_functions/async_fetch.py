@@ -0,0 +1,155 @@
+"""
+This module contains the asyncio-based fetch layer that runs a declared graph of HTTP endpoints concurrently.
+"""
+
+import time
+import asyncio
+from urllib.parse import urlparse
+
+import aiohttp
+
+from etl_functions.http_client import (
+    DEFAULT_MAX_RETRIES, RETRY_STATUSES, histogram_for, limiter_for, parse_retry_after, retry_delay,
+)
+
+DEFAULT_PER_HOST_LIMIT = 4
+DEFAULT_TIMEOUT = 10
+
+
+class Endpoint:
+    """A JSON endpoint in the fetch graph
+
+    Use 'url' for a single request, or 'urls' for a callable that receives the responses of the
+    endpoints in 'depends_on' and returns the list of URLs to fetch (fan-out), which fails as a whole if any
+    of its requests fails, so that a partial result is never stored. Endpoints with a
+    'payload' are sent as a JSON POST (e.g. GraphQL queries).
+    """
+
+    def __init__(self, name, url=None, urls=None, depends_on=(), payload=None, headers=None):
+        if (url is None) == (urls is None):
+            raise ValueError(f"Endpoint '{name}' needs exactly one of 'url' or 'urls'")
+        self.name = name
+        self.url = url
+        self.urls = urls
+        self.depends_on = tuple(depends_on)
+        self.payload = payload
+        self.headers = headers
+
+
+class AsyncFetcher:
+    """Runs endpoints as soon as their dependencies resolve, with one connection pool and concurrency limit per host"""
+
+    def __init__(self, per_host_limit=DEFAULT_PER_HOST_LIMIT, timeout=DEFAULT_TIMEOUT):
+        self.per_host_limit = per_host_limit
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.sessions = {}
+        self.semaphores = {}
+
+    def _session_for(self, url):
+        host = urlparse(url).netloc
+        if host not in self.sessions:
+            connector = aiohttp.TCPConnector(limit_per_host=self.per_host_limit)
+            self.sessions[host] = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self.semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self.sessions[host], self.semaphores[host]
+
+    async def get_json(self, url, payload=None, headers=None):
+        """Requests through the host's shared rate limiter, retrying 429/5xx with backoff and jitter"""
+        session, semaphore = self._session_for(url)
+        limiter = limiter_for(url)
+        histogram = histogram_for(url)
+        method = 'POST' if payload is not None else 'GET'
+
+        for attempt in range(DEFAULT_MAX_RETRIES + 1):
+            await limiter.acquire_async()
+            histogram.count_request()
+            try:
+                async with semaphore:
+                    start = time.monotonic()
+                    async with session.request(method, url, json=payload, headers=headers) as response:
+                        # Only recorded, so that these hosts show up in the latency report; hedging is for the synchronous client
+                        histogram.record(time.monotonic() - start)
+                        if response.status in RETRY_STATUSES and attempt < DEFAULT_MAX_RETRIES:
+                            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                            if response.status == 429:
+                                limiter.throttled(retry_after)
+                            delay = retry_delay(attempt, retry_after)
+                        else:
+                            response.raise_for_status()
+                            limiter.succeeded()
+                            return await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == DEFAULT_MAX_RETRIES:
+                    raise
+                delay = retry_delay(attempt)
+
+            # Sleep outside the semaphore, so that other requests to the host can go ahead
+            await asyncio.sleep(delay)
+
+    async def _run_endpoint(self, endpoint, tasks):
+        dependencies = {name: await tasks[name] for name in endpoint.depends_on}
+
+        try:
+            if endpoint.url is not None:
+                return await self.get_json(endpoint.url, endpoint.payload, endpoint.headers)
+            urls = endpoint.urls(dependencies)
+            return await asyncio.gather(*(self.get_json(url, endpoint.payload, endpoint.headers) for url in urls))
+        except Exception as err:
+            raise ValueError(f"Failed to fetch '{endpoint.name}': {err}") from err
+
+    async def run(self, endpoints, on_result=None, resolved=None):
+        """Returns a dict of endpoint name to decoded JSON (or a list of JSON for fan-out endpoints)
+
+        'on_result(name, response)' is called for every endpoint as soon as it succeeds, even if another fails.
+        'resolved' holds responses that are already known (e.g. restored from a checkpoint).
+        """
+        resolved = resolved or {}
+        names = {endpoint.name for endpoint in endpoints} | set(resolved)
+        for endpoint in endpoints:
+            missing = set(endpoint.depends_on) - names
+            if missing:
+                raise ValueError(f"Endpoint '{endpoint.name}' depends on unknown endpoints: {missing}")
+
+        tasks = {}
+        try:
+            # Every endpoint is scheduled up front, and awaits its own dependencies before fetching
+            loop = asyncio.get_running_loop()
+            futures = {endpoint.name: loop.create_future() for endpoint in endpoints}
+            for name, response in resolved.items():
+                futures[name] = loop.create_future()
+                futures[name].set_result(response)
+
+            async def resolve(endpoint):
+                try:
+                    result = await self._run_endpoint(endpoint, futures)
+                    if on_result is not None:
+                        on_result(endpoint.name, result)
+                    futures[endpoint.name].set_result(result)
+                except Exception as err:
+                    futures[endpoint.name].set_exception(err)
+
+            tasks = {endpoint.name: asyncio.create_task(resolve(endpoint)) for endpoint in endpoints}
+            await asyncio.gather(*tasks.values())
+            return {name: future.result() for name, future in futures.items()}
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*(session.close() for session in self.sessions.values()))
+            self.sessions = {}
+            self.semaphores = {}
+
+
+def fetch_all(endpoints, per_host_limit=DEFAULT_PER_HOST_LIMIT, timeout=DEFAULT_TIMEOUT, checkpoint=None):
+    """Synchronous entry point for the ETL scripts
+
+    With a StageCheckpoint, endpoints that already succeeded in a previous attempt are not fetched again.
+    """
+    responses = {}
+    if checkpoint is not None:
+        responses = {endpoint.name: checkpoint.get(endpoint.name) for endpoint in endpoints if checkpoint.has(endpoint.name)}
+
+    remaining = [endpoint for endpoint in endpoints if endpoint.name not in responses]
+    on_result = checkpoint.put if checkpoint is not None else None
+    if remaining:
+        responses = asyncio.run(AsyncFetcher(per_host_limit, timeout).run(remaining, on_result, resolved=responses))
+    return responses
@@ -0,0 +1,146 @@
+"""
+This module contains the persisted block height <-> timestamp index used to resolve daily sample blocks.
+"""
+
+import os
+import json
+import threading
+from bisect import bisect_left
+
+from gql import gql
+
+from etl_functions.http_client import http_client
+
+BLOCK_INDEX_PATH = os.path.join('cache', 'eth_block_index.json')
+
+# Both ETL pipelines resolve the same days, so concurrent resolutions in one process are serialized
+_resolve_lock = threading.Lock()
+
+# Only used to place the first probe below an unknown lower bound, never for the final answer
+ESTIMATED_SECONDS_PER_BLOCK = 12
+
+
+class SubgraphBlockSource:
+    """Reads block timestamps through time-travel '_meta' lookups, batched into one aliased query"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def block_timestamps(self, blocks):
+        fields = "".join(
+            f"""
+        meta_{block}: _meta(block: {{ number: {block} }}) {{
+            block {{
+                number
+                timestamp
+            }}
+        }}"""
+            for block in blocks
+        )
+        response = self.client.execute(gql("query {" + fields + "\n    }"))
+        return {block: int(response[f"meta_{block}"]['block']['timestamp']) for block in blocks}
+
+
+class JsonRpcBlockSource:
+    """Reads block timestamps from an Ethereum JSON-RPC endpoint with one batched request"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def block_timestamps(self, blocks):
+        payload = [
+            {'jsonrpc': '2.0', 'id': block, 'method': 'eth_getBlockByNumber', 'params': [hex(block), False]}
+            for block in blocks
+        ]
+        response = http_client.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return {item['id']: int(item['result']['timestamp'], 16) for item in response.json()}
+
+
+class BlockIndex:
+    """Sorted (block, timestamp) samples; a timestamp is resolved once its two neighbouring samples are consecutive blocks"""
+
+    def __init__(self, path=BLOCK_INDEX_PATH):
+        self.path = path
+        self.blocks = []
+        self.timestamps = []
+        self.load()
+
+    def load(self):
+        """Merges the samples saved on disk (possibly by another pipeline) into this index"""
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                samples = json.load(f)
+            for block, timestamp in samples:
+                self.add(block, timestamp)
+
+    def add(self, block, timestamp):
+        index = bisect_left(self.blocks, block)
+        if index < len(self.blocks) and self.blocks[index] == block:
+            return
+        self.blocks.insert(index, block)
+        self.timestamps.insert(index, timestamp)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(list(zip(self.blocks, self.timestamps)), f)
+        os.replace(tmp_path, self.path)
+
+    def bracket(self, timestamp):
+        """Returns the samples just before and at/after the timestamp (either may be None)"""
+        index = bisect_left(self.timestamps, timestamp)
+        lower = (self.blocks[index - 1], self.timestamps[index - 1]) if index > 0 else None
+        upper = (self.blocks[index], self.timestamps[index]) if index < len(self.blocks) else None
+        return lower, upper
+
+    def lookup(self, timestamp):
+        """Returns the first block at or after the timestamp if it is already known locally, else None"""
+        lower, upper = self.bracket(timestamp)
+        if lower is not None and upper is not None and upper[0] - lower[0] == 1:
+            return upper[0]
+        return None
+
+    def _next_probe(self, timestamp):
+        lower, upper = self.bracket(timestamp)
+        if lower is None:
+            # Step below the target with a generous margin, so that the next round has a lower bound
+            distance = (upper[1] - timestamp) // ESTIMATED_SECONDS_PER_BLOCK
+            return max(upper[0] - int(distance * 1.1) - 100, 0)
+
+        # Interpolate inside the bracket, but always shrink it so that a bad guess still converges
+        low_block, low_ts = lower
+        high_block, high_ts = upper
+        span = high_block - low_block
+        guess = low_block + (timestamp - low_ts) * span // max(high_ts - low_ts, 1)
+        margin = max(span // 16, 1)
+        return min(max(guess, low_block + margin), high_block - margin)
+
+    def timestamp_of(self, block, source):
+        """Returns the timestamp of a block, fetching and indexing it if it is not a known sample"""
+        index = bisect_left(self.blocks, block)
+        if index < len(self.blocks) and self.blocks[index] == block:
+            return self.timestamps[index]
+        timestamp = source.block_timestamps([block])[block]
+        self.add(block, timestamp)
+        return timestamp
+
+    def resolve(self, timestamps, source, latest_block):
+        """Resolves the first block at or after each timestamp, probing the source in batched rounds, and saves the index"""
+        with _resolve_lock:
+            self.load()
+            latest_timestamp = self.timestamp_of(latest_block, source)
+            if max(timestamps) > latest_timestamp:
+                raise ValueError(f"Cannot resolve timestamps after the latest indexed block {latest_block}!")
+
+            pending = [ts for ts in timestamps if self.lookup(ts) is None]
+            while pending:
+                probes = sorted({self._next_probe(ts) for ts in pending})
+                for block, timestamp in source.block_timestamps(probes).items():
+                    self.add(block, timestamp)
+                pending = [ts for ts in pending if self.lookup(ts) is None]
+
+            self.save()
+            return {ts: self.lookup(ts) for ts in timestamps}
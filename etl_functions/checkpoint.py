@@ -0,0 +1,89 @@
+"""
+This module contains the per-stage checkpoint store that lets a retried pipeline resume from its first failed stage.
+"""
+
+import os
+import json
+import pickle
+import shutil
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+CHECKPOINT_DIR = os.path.join('cache', 'checkpoints')
+
+
+def default_run_id():
+    """Retries share a run ID through PIPELINE_RUN_ID, otherwise all runs on the same UTC day share one"""
+    return os.environ.get('PIPELINE_RUN_ID') or datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+
+class CheckpointStore:
+    """Pickled stage outputs under cache/checkpoints/<run_id>/, with a manifest of their SHA-256 content hashes"""
+
+    def __init__(self, run_id=None, checkpoint_dir=CHECKPOINT_DIR):
+        self.run_id = run_id or default_run_id()
+        self.run_dir = os.path.join(checkpoint_dir, self.run_id)
+        self.manifest_path = os.path.join(self.run_dir, 'manifest.json')
+        self.lock = threading.Lock()
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as f:
+                self.manifest = json.load(f)
+
+    def _path(self, key):
+        return os.path.join(self.run_dir, f"{key}.pkl")
+
+    def has(self, key):
+        return key in self.manifest and os.path.exists(self._path(key))
+
+    def load(self, key):
+        """Returns the stored output, or raises KeyError if it is missing or its content hash does not match"""
+        if not self.has(key):
+            raise KeyError(key)
+        with open(self._path(key), 'rb') as f:
+            payload = f.read()
+        if hashlib.sha256(payload).hexdigest() != self.manifest[key]:
+            raise KeyError(f"Checkpoint '{key}' is corrupted (content hash mismatch)")
+        return pickle.loads(payload)
+
+    def save(self, key, output):
+        payload = pickle.dumps(output)
+        with self.lock:
+            os.makedirs(self.run_dir, exist_ok=True)
+            with open(self._path(key), 'wb') as f:
+                f.write(payload)
+            self.manifest[key] = hashlib.sha256(payload).hexdigest()
+
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+
+    def stage(self, name):
+        return StageCheckpoint(self, name)
+
+    def clear(self):
+        """Removes the checkpoints of this run once it has completed"""
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        self.manifest = {}
+
+
+class StageCheckpoint:
+    """Partial outputs of one stage (e.g. each endpoint of an extract), so that a retry only repeats what failed"""
+
+    def __init__(self, store, stage_name):
+        self.store = store
+        self.stage_name = stage_name
+
+    def _key(self, key):
+        return f"{self.stage_name}.{key}"
+
+    def has(self, key):
+        return self.store.has(self._key(key))
+
+    def get(self, key):
+        return self.store.load(self._key(key))
+
+    def put(self, key, value):
+        self.store.save(self._key(key), value)
@@ -0,0 +1,147 @@
+"""
+This module contains the functions that retrieve Dune Analytics query results concurrently and post-process them.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from etl_functions.http_client import http_client
+
+DUNE_API_URL = "https://api.dune.com/api/v1"
+DUNE_CACHE_DIR = os.path.join('cache', 'dune_results')
+
+DEFAULT_MAX_WORKERS = 5
+DEFAULT_PAGE_SIZE = 1000
+
+
+class DuneResultCache:
+    """Decoded result rows stored as gzipped JSON, keyed by query ID, execution ID and request options"""
+
+    def __init__(self, cache_dir=DUNE_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, query_id, execution_id, options):
+        options_hash = hashlib.sha256(json.dumps(options, sort_keys=True).encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, str(query_id), f"{execution_id}-{options_hash}.json.gz")
+
+    def load(self, query_id, execution_id, options):
+        path = self._path(query_id, execution_id, options)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rt') as f:
+            return json.load(f)
+
+    def save(self, query_id, execution_id, options, rows):
+        """Stores the rows and drops the files of older executions of the same query"""
+        path = self._path(query_id, execution_id, options)
+        query_dir = os.path.dirname(path)
+        os.makedirs(query_dir, exist_ok=True)
+
+        for filename in os.listdir(query_dir):
+            if not filename.startswith(f"{execution_id}-"):
+                os.remove(os.path.join(query_dir, filename))
+
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wt') as f:
+            json.dump(rows, f)
+        os.replace(tmp_path, path)
+
+
+class DuneResultsClient:
+    """Reads the latest query results with filters, column selection and row limits applied on Dune's side"""
+
+    def __init__(self, api_key, request_timeout=10, base_url=DUNE_API_URL, cache=None):
+        self.api_key = api_key
+        self.request_timeout = request_timeout
+        self.base_url = base_url
+        self.cache = cache if cache is not None else DuneResultCache()
+
+    def _get_results_page(self, query_id, params):
+        url = f"{self.base_url}/query/{query_id}/results"
+        headers = {'X-Dune-API-Key': self.api_key}
+        response = http_client.get(url, headers=headers, params=params, timeout=self.request_timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def latest_execution_id(self, query_id):
+        """Cheap metadata check: a one-row page is enough to read the ID of the latest execution"""
+        return self._get_results_page(query_id, {'limit': 1})['execution_id']
+
+    def get_latest_rows(self, query_id, columns=None, filters=None, sort_by=None, limit=None,
+                        page_size=DEFAULT_PAGE_SIZE):
+        """Returns the requested rows of the latest result, from the local cache if the execution has not changed"""
+        options = {'columns': columns, 'filters': filters, 'sort_by': sort_by, 'limit': limit}
+
+        execution_id = self.latest_execution_id(query_id)
+        rows = self.cache.load(query_id, execution_id, options)
+        if rows is not None:
+            print(f"Dune query {query_id} is unchanged (execution {execution_id}), using the cached result.")
+            return rows
+
+        execution_id, rows = self._download_rows(query_id, columns, filters, sort_by, limit, page_size)
+        self.cache.save(query_id, execution_id, options, rows)
+        return rows
+
+    def _download_rows(self, query_id, columns, filters, sort_by, limit, page_size):
+        """Pages through the latest result of a query and returns its execution ID with the requested rows"""
+        params = {'limit': page_size if limit is None else min(page_size, limit), 'offset': 0}
+        if columns:
+            params['columns'] = ",".join(columns)
+        if filters:
+            params['filters'] = filters
+        if sort_by:
+            params['sort_by'] = sort_by
+
+        rows = []
+        execution_id = None
+        while True:
+            content = self._get_results_page(query_id, params)
+            execution_id = execution_id or content['execution_id']
+            rows.extend(content['result']['rows'])
+
+            next_offset = content.get('next_offset')
+            if next_offset is None or (limit is not None and len(rows) >= limit):
+                break
+            params['offset'] = next_offset
+
+        return execution_id, rows if limit is None else rows[:limit]
+
+
+def date_filter(date_column, since):
+    """Builds a Dune results filter that keeps the rows from the first day of the month of 'since'
+
+    The filter is part of the result cache key, so it only moves at the month boundary: every run on the same
+    execution hits the cache, whatever the day. The exact cut-off is applied locally by dune_rows_to_frame.
+    """
+    return f"\"{date_column}\" >= '{since.strftime('%Y-%m-01')}'"
+
+
+def fetch_dune_rows(dune, query_ids, max_workers=DEFAULT_MAX_WORKERS, **options):
+    """Retrieves the latest result rows of every query ID through a bounded worker pool"""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {query_id: executor.submit(dune.get_latest_rows, query_id, **options) for query_id in query_ids}
+        return {query_id: future.result() for query_id, future in futures.items()}
+
+
+def dune_rows_to_frame(rows, date_column, since):
+    """Keeps the rows since the given date, sorted by date, without the last (possibly incomplete) day"""
+    df = pd.DataFrame(rows)
+
+    # Ensure that the date column is in datetime format
+    df[date_column] = pd.to_datetime(df[date_column])
+
+    df = df[df[date_column] >= since]
+    df = df.sort_values(date_column)
+
+    # Remove the last row since the data might not be complete for the current day
+    df = df.drop(df.index[-1])
+    # Reset the index to have a clean 'row_num' column
+    df.reset_index(drop=True, inplace=True)
+
+    return df
+
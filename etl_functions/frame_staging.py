@@ -0,0 +1,93 @@
+"""
+This module contains the columnar staging store where every run keeps its transformed dataframes as Parquet files with a manifest.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STAGING_DIR = os.path.join('cache', 'staging')
+
+_manifest_lock = threading.Lock()
+
+
+def month_year_of(dates):
+    """The report period of a date column, in the same 'june_2024' form as the MongoDB collection names"""
+    latest_date = dates.max()
+    return f"{latest_date.strftime('%B').lower()}_{latest_date.year}"
+
+
+class FrameStage:
+    """Typed Parquet files under cache/staging/<month_year>/<frame>.parquet, described by a manifest.json
+
+    The manifest keeps every frame's row count, Arrow schema and SHA-256 content hash, so that the AI analysis,
+    the dashboard or a notebook can read exactly the columns they need without going through MongoDB.
+    """
+
+    def __init__(self, month_year, staging_dir=STAGING_DIR):
+        self.month_year = month_year
+        self.stage_dir = os.path.join(staging_dir, month_year)
+        self.manifest_path = os.path.join(self.stage_dir, 'manifest.json')
+
+    def _path(self, name):
+        return os.path.join(self.stage_dir, f"{name}.parquet")
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+
+    def has(self, name):
+        return name in self.manifest() and os.path.exists(self._path(name))
+
+    def write(self, name, df, run_id=None):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        os.makedirs(self.stage_dir, exist_ok=True)
+
+        path = self._path(name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(table, tmp_path, compression='zstd')
+        with open(tmp_path, 'rb') as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+        os.replace(tmp_path, path)
+
+        entry = {
+            'file': os.path.basename(path),
+            'rows': table.num_rows,
+            'schema': {field.name: str(field.type) for field in table.schema},
+            'sha256': content_hash,
+            'run_id': run_id,
+            'written_at': datetime.now(timezone.utc).isoformat(),
+        }
+
+        # The BTC and ETH stages write to the same manifest, so it is merged with what is on disk
+        with _manifest_lock:
+            manifest = self.manifest()
+            manifest[name] = entry
+            tmp_manifest = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(tmp_manifest, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_manifest, self.manifest_path)
+
+    def read_table(self, name, columns=None):
+        """Returns the staged frame as an Arrow table (memory-mapped), or raises KeyError if it was not staged"""
+        if not self.has(name):
+            raise KeyError(f"Frame '{name}' is not staged for {self.month_year}")
+        return pq.read_table(self._path(name), columns=columns, memory_map=True)
+
+    def read(self, name, columns=None):
+        return self.read_table(name, columns).to_pandas()
+
+
+def stage_frames(frames, date_df, date_column, run_id=None):
+    """Writes every transformed frame of a run to the stage of the report period of 'date_df' and returns it"""
+    stage = FrameStage(month_year_of(date_df[date_column]))
+    for name, df in frames.items():
+        stage.write(name, df, run_id=run_id)
+    return stage.month_year
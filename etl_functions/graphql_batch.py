@@ -0,0 +1,49 @@
+"""
+This module contains the functions that batch TheGraph time-travel lookups into aliased GraphQL queries.
+"""
+
+from gql import gql
+
+# WBTC and PAXG contract addresses on Ethereum
+WBTC_ADDRESS = "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599"
+PAXG_ADDRESS = "0x45804880de22913dafe09f4980848ece6ecbaf78"
+
+# TheGraph gateway rejects overly complex documents, so very long windows are split into chunks
+DEFAULT_CHUNK_SIZE = 50
+
+def build_time_travel_query(token_id, target_blocks, include_bundle=True):
+    """Builds one aliased query that looks up a token (and optionally the ETH bundle) at every target block"""
+    fields = []
+    for block in target_blocks:
+        fields.append(f"""
+        token_{block}: token(id: "{token_id}", block: {{ number: {block} }}) {{
+            derivedETH
+        }}""")
+        if include_bundle:
+            fields.append(f"""
+        bundle_{block}: bundle(id: "1", block: {{ number: {block} }}) {{
+            ethPriceUSD
+        }}""")
+
+    return "query {" + "".join(fields) + "\n    }"
+
+def fetch_prices_at_blocks(client, token_id, target_blocks, include_bundle=True, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Executes the batched time-travel query and splits the aliased response back per block"""
+    prices = {}
+    blocks = list(dict.fromkeys(int(block) for block in target_blocks))
+
+    for start in range(0, len(blocks), chunk_size):
+        chunk = blocks[start:start + chunk_size]
+        response = client.execute(gql(build_time_travel_query(token_id, chunk, include_bundle)))
+
+        for block in chunk:
+            token = response.get(f"token_{block}")
+            if token is None:
+                raise ValueError(f"Token {token_id} is not indexed at block {block}!")
+
+            price = {'derivedETH': float(token['derivedETH'])}
+            if include_bundle:
+                price['ethPriceUSD'] = float(response[f"bundle_{block}"]['ethPriceUSD'])
+            prices[block] = price
+
+    return prices
@@ -0,0 +1,379 @@
+"""
+This module contains the shared HTTP client layer: per-host adaptive rate limiting, retries with backoff and jitter, and opt-in hedged requests.
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from gql.transport.exceptions import TransportConnectionFailed, TransportServerError
+from gql.transport.requests import RequestsHTTPTransport
+
+# Statuses that are worth retrying: rate limited, or a transient upstream failure
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 30
+
+# Starting request rates (requests per second) per host; the limiter adapts them to what each host allows
+HOST_RATES = {
+    'mempool.space': 10,
+    'gateway-arbitrum.network.thegraph.com': 10,
+    'api.dune.com': 5,
+    'api.owlracle.info': 2,
+    'api.openai.com': 5,
+}
+DEFAULT_RATE = 5
+
+
+class AdaptiveTokenBucket:
+    """Token bucket whose rate halves when the host throttles us and grows back slowly on success"""
+
+    def __init__(self, rate, capacity=None, min_rate=0.2):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        """Takes one token and returns how long the caller has to wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = 0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.blocked_until - now)
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def throttled(self, retry_after=None):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def succeeded(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def host_of(url):
+    return urlparse(url).netloc or url
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def limiter_for(url):
+    """Returns the process-wide limiter of the URL's host"""
+    host = host_of(url)
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = AdaptiveTokenBucket(HOST_RATES.get(host, DEFAULT_RATE))
+        return _limiters[host]
+
+
+def parse_retry_after(value):
+    """Retry-After is either a number of seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt, retry_after=None):
+    """Honours Retry-After if the server sent one, otherwise exponential backoff with full jitter"""
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_CAP_SECONDS)
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+# Hedging is opt-in: set HTTP_HEDGING=1 to race a duplicate request when a response is slower than usual
+LATENCY_STATS_PATH = os.path.join('cache', 'http_latency.json')
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class HedgePolicy:
+    """Sends a duplicate request once the first one is slower than the host's given latency percentile.
+
+    Hedges are spent from a token bucket, which starts with 'burst' tokens and gains 'budget' tokens per request
+    (up to 'burst'). The slow hosts only get a handful of requests per run, so the burst lets them hedge from
+    the first slow one, while the budget still caps the duplicates of a busy host to a fraction of its requests.
+    """
+
+    def __init__(self, percentile=95, budget=0.05, burst=2, min_samples=20):
+        self.percentile = percentile
+        self.budget = budget
+        self.burst = burst
+        self.min_samples = min_samples
+
+
+# The slow upstreams: TheGraph gateway time-travel queries and the Owlracle history
+HEDGE_POLICIES = {
+    'gateway-arbitrum.network.thegraph.com': HedgePolicy(percentile=95, budget=0.05, burst=3),
+    'api.owlracle.info': HedgePolicy(percentile=90, budget=0.1, burst=1, min_samples=5),
+}
+
+def hedging_enabled():
+    return os.getenv('HTTP_HEDGING', '').lower() in ('1', 'true', 'yes')
+
+
+class LatencyHistogram:
+    """Recent response latencies of a host, which drive its hedge threshold"""
+
+    def __init__(self, samples=()):
+        self.samples = deque(samples, maxlen=500)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedge_tokens = None
+        self.refilled_at = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p):
+        with self.lock:
+            samples = sorted(self.samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+
+    def hedge_delay(self, policy):
+        """Returns how long to wait before hedging, or None if there isn't enough history yet"""
+        if len(self.samples) < policy.min_samples:
+            return None
+        return self.percentile(policy.percentile)
+
+    def count_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def take_hedge(self, policy):
+        """Spends one hedge token, if there's any left (see HedgePolicy)"""
+        with self.lock:
+            if self.hedge_tokens is None:
+                self.hedge_tokens = policy.burst
+            else:
+                refill = policy.budget * (self.requests - self.refilled_at)
+                self.hedge_tokens = min(policy.burst, self.hedge_tokens + refill)
+            self.refilled_at = self.requests
+            if self.hedge_tokens < 1:
+                return False
+            self.hedge_tokens -= 1
+            self.hedges += 1
+            return True
+
+    def bucket_counts(self):
+        with self.lock:
+            samples = list(self.samples)
+        counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        for seconds in samples:
+            counts[next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))] += 1
+        return counts
+
+
+_histograms = None
+_histograms_lock = threading.Lock()
+
+def _load_histograms():
+    """Starts from the latencies of previous runs, so that hedging works from the first request"""
+    try:
+        with open(LATENCY_STATS_PATH) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        stored = {}
+    return {host: LatencyHistogram(samples) for host, samples in stored.items()}
+
+def histogram_for(url):
+    global _histograms
+    host = host_of(url)
+    with _histograms_lock:
+        if _histograms is None:
+            _histograms = _load_histograms()
+        if host not in _histograms:
+            _histograms[host] = LatencyHistogram()
+        return _histograms[host]
+
+
+def report_latency():
+    """Prints the latency histogram and hedge counts of every host, and saves the samples for the next run"""
+    with _histograms_lock:
+        histograms = dict(_histograms or {})
+    if not histograms:
+        return
+
+    labels = [f"<={bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+    print("\nHTTP latency by host:")
+    for host, histogram in sorted(histograms.items()):
+        if not histogram.samples:
+            continue
+        p50, p90, p99 = (histogram.percentile(p) for p in (50, 90, 99))
+        print(f"  {host}: {histogram.requests} requests, p50 {p50:.2f}s, p90 {p90:.2f}s, p99 {p99:.2f}s, "
+              f"{histogram.hedges} hedged ({histogram.hedge_wins} won)")
+        for label, count in zip(labels, histogram.bucket_counts()):
+            if count:
+                print(f"    {label:>8} {'#' * min(count, 60)} {count}")
+
+    os.makedirs(os.path.dirname(LATENCY_STATS_PATH), exist_ok=True)
+    tmp_path = f"{LATENCY_STATS_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({host: list(histogram.samples) for host, histogram in histograms.items()}, f)
+    os.replace(tmp_path, LATENCY_STATS_PATH)
+
+
+# Hedged attempts run here, so that the caller can wait for whichever finishes first
+# The pool is started by the first hedged request, so that importing this module starts no threads
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+def hedge_executor():
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='hedge')
+        return _hedge_executor
+
+def _timed_call(url, func):
+    limiter_for(url).acquire()
+    start = time.monotonic()
+    result = func()
+    histogram_for(url).record(time.monotonic() - start)
+    return result
+
+def hedged_call(url, func):
+    """Runs one request attempt, racing a duplicate if hedging is enabled for the host and the first one is slow"""
+    histogram = histogram_for(url)
+    histogram.count_request()
+    policy = HEDGE_POLICIES.get(host_of(url)) if hedging_enabled() else None
+    delay = histogram.hedge_delay(policy) if policy else None
+    if delay is None:
+        return _timed_call(url, func)
+
+    primary = hedge_executor().submit(_timed_call, url, func)
+    done, _ = wait([primary], timeout=delay)
+    if done or not histogram.take_hedge(policy):
+        return primary.result()
+
+    hedge = hedge_executor().submit(_timed_call, url, func)
+    pending = {primary, hedge}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    with histogram.lock:
+                        histogram.hedge_wins += 1
+                return future.result()
+
+    # Both attempts failed, so surface the first one's error
+    return primary.result()
+
+
+class HttpClient:
+    """requests-based client with one pooled session, per-host rate limiting and retries on 429/5xx"""
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES):
+        self.max_retries = max_retries
+        self.session = requests.Session()
+
+    def request(self, method, url, **kwargs):
+        limiter = limiter_for(url)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = hedged_call(url, lambda: self.session.request(method, url, **kwargs))
+            except (TransportConnectionFailed, requests.ConnectionError, requests.Timeout):
+                # gql wraps connection errors and timeouts in TransportConnectionFailed (older versions raised them as is)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(retry_delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if response.status_code == 429:
+                    limiter.throttled(retry_after)
+                time.sleep(retry_delay(attempt, retry_after))
+                continue
+
+            limiter.succeeded()
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+# Shared by every synchronous call in the ETL scripts and the AI analysis
+http_client = HttpClient()
+
+
+class RateLimitedHTTPTransport(RequestsHTTPTransport):
+    """gql transport that goes through the gateway's limiter and retries throttled or failed queries"""
+
+    def __init__(self, *args, max_retries=DEFAULT_MAX_RETRIES, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retries = max_retries
+
+    def _retry_after(self, err):
+        """Reads Retry-After from the failed response, which gql keeps on the HTTPError it wraps
+        (or, failing that, on the transport's latest response headers)"""
+        response = getattr(err.__cause__, 'response', None)
+        headers = response.headers if response is not None else getattr(self, 'response_headers', None)
+        return parse_retry_after((headers or {}).get('Retry-After'))
+
+    def execute(self, *args, **kwargs):
+        limiter = limiter_for(self.url)
+        execute = super().execute
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = hedged_call(self.url, lambda: execute(*args, **kwargs))
+            except TransportServerError as err:
+                if err.code not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise
+                retry_after = self._retry_after(err)
+                if err.code == 429:
+                    limiter.throttled(retry_after)
+                time.sleep(retry_delay(attempt, retry_after))
+                continue
+            except (TransportConnectionFailed, requests.ConnectionError, requests.Timeout):
+                # gql wraps connection errors and timeouts in TransportConnectionFailed (older versions raised them as is)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(retry_delay(attempt))
+                continue
+
+            limiter.succeeded()
+            return result
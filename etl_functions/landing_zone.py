@@ -0,0 +1,79 @@
+"""
+This module contains the landing zone that keeps the raw API responses of every extract stage, and replays them without any network.
+"""
+
+import io
+import os
+import json
+import threading
+from datetime import datetime, timezone
+
+import zstandard
+
+LANDING_DIR = os.path.join('cache', 'landing')
+ZSTD_LEVEL = 10
+
+
+def replay_args(argv):
+    """'--replay' replays the latest landed responses, '--replay=YYYY-MM-DD' the ones of a given run date"""
+    for arg in argv:
+        if arg == '--replay':
+            return True, None
+        if arg.startswith('--replay='):
+            return True, arg.split('=', 1)[1]
+    return False, None
+
+
+class LandingZone:
+    """zstd-compressed JSONL files under cache/landing/<source>/<run_date>/<stage>.jsonl.zst, one response per line"""
+
+    def __init__(self, run_date=None, landing_dir=LANDING_DIR):
+        # Without a pinned run date, writes go to today's partition and reads come from the latest one
+        self.pinned = run_date is not None
+        self.run_date = run_date or datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        self.landing_dir = landing_dir
+        self.lock = threading.Lock()
+
+    def _path(self, source, stage, run_date):
+        return os.path.join(self.landing_dir, source, run_date, f"{stage}.jsonl.zst")
+
+    def latest_run_date(self, source, stage):
+        source_dir = os.path.join(self.landing_dir, source)
+        if not os.path.isdir(source_dir):
+            return None
+        run_dates = [run_date for run_date in os.listdir(source_dir)
+                     if os.path.exists(self._path(source, stage, run_date))]
+        return max(run_dates) if run_dates else None
+
+    def write(self, source, stage, output):
+        """Lands a stage output: a dict of responses is written one key per line, anything else as a single line"""
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        if isinstance(output, dict):
+            records = [{'key': key, 'response': response} for key, response in output.items()]
+        else:
+            records = [{'key': None, 'response': output}]
+
+        path = self._path(source, stage, self.run_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            with zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(f) as compressed:
+                with io.TextIOWrapper(compressed, encoding='utf-8') as text:
+                    for record in records:
+                        record.update(stage=stage, fetched_at=fetched_at)
+                        text.write(json.dumps(record, default=str) + '\n')
+        os.replace(tmp_path, path)
+
+    def read(self, source, stage):
+        """Rebuilds a landed stage output, or raises KeyError if the stage was never landed"""
+        run_date = self.run_date if self.pinned else self.latest_run_date(source, stage)
+        if run_date is None or not os.path.exists(self._path(source, stage, run_date)):
+            raise KeyError(f"No landed responses for '{source}/{stage}'")
+
+        with open(self._path(source, stage, run_date), 'rb') as f:
+            with zstandard.ZstdDecompressor().stream_reader(f) as decompressed:
+                records = [json.loads(line) for line in io.TextIOWrapper(decompressed, encoding='utf-8')]
+
+        if len(records) == 1 and records[0]['key'] is None:
+            return records[0]['response']
+        return {record['key']: record['response'] for record in records}
@@ -0,0 +1,187 @@
+"""
+This module contains the MongoDB loader that shares one pooled client per run, bulk-writes BSON batches, and publishes verified changes through a staging collection.
+"""
+
+import os
+import hashlib
+import struct
+import threading
+from itertools import islice
+
+import bson
+import numpy as np
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient
+
+MONGO_DB_NAME = 'deftify_research'
+DEFAULT_BATCH_SIZE = 1000
+# One document per run, listing every collection that the run wrote with its row count and content hash
+PUBLISH_MANIFEST_COLLECTION = 'publish_manifests'
+# One document per collection, whose version is bumped every time a run changes its data, with a version per month
+# of data as well (read by the app's cache and the figure artifacts, which only depend on their own month)
+SERIES_VERSION_COLLECTION = 'series_versions'
+STAGING_SUFFIX = '__staging'
+# Wire compression, in order of preference (the server picks the first one it supports)
+MONGO_COMPRESSORS = 'zstd,zlib'
+# Connection pool and timeouts of the shared client (the pool size can be tuned with MONGO_POOL_SIZE)
+DEFAULT_POOL_SIZE = 10
+MONGO_TIMEOUTS = {
+    'serverSelectionTimeoutMS': 10000,
+    'connectTimeoutMS': 10000,
+    'socketTimeoutMS': 60000,
+    'maxIdleTimeMS': 300000,
+}
+
+_clients = {}
+_loaders = {}
+_lock = threading.Lock()
+
+
+def shared_client(uri):
+    """One pooled MongoClient per URI for the whole process, instead of a new pool and handshake per collection"""
+    with _lock:
+        if uri not in _clients:
+            _clients[uri] = MongoClient(
+                uri,
+                compressors=MONGO_COMPRESSORS,
+                maxPoolSize=int(os.environ.get('MONGO_POOL_SIZE') or DEFAULT_POOL_SIZE),
+                **MONGO_TIMEOUTS,
+            )
+        return _clients[uri]
+
+
+def _native(value):
+    # numpy scalars are not BSON-encodable, so they are unboxed to the matching Python type
+    if isinstance(value, dict):
+        return {key: _native(item) for key, item in value.items()}
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def encode_document(document):
+    """Encodes a document straight to BSON, so that batches hold compact bytes rather than Python dicts"""
+    return RawBSONDocument(bson.encode(_native(document)))
+
+
+def append_field(document, key, value):
+    """Adds a field to an encoded document by appending its BSON element, instead of encoding the whole document again"""
+    element = bson.encode({key: _native(value)})[4:-1]
+    body = document.raw[4:-1] + element
+    # A BSON document is its int32 length (which counts itself and the trailing NUL), the elements, then a NUL
+    return RawBSONDocument(struct.pack('<i', len(body) + 5) + body + b'\x00')
+
+
+def documents_hash(digests):
+    """Order-independent hash of a set of documents, since unordered batches may be stored in any order"""
+    return hashlib.sha256(b''.join(sorted(digests))).hexdigest()
+
+
+class MongoLoader:
+    """Writes into a database over the shared client, and caches its collection names and created indexes"""
+
+    def __init__(self, uri, db_name=MONGO_DB_NAME, batch_size=None):
+        self.db = shared_client(uri)[db_name]
+        # The batch size can be tuned with MONGO_BATCH_SIZE
+        self.batch_size = batch_size or int(os.environ.get('MONGO_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+        self.lock = threading.Lock()
+        self._collection_names = None
+        self._indexes = set()
+
+    def collection_names(self):
+        with self.lock:
+            if self._collection_names is None:
+                self._collection_names = set(self.db.list_collection_names())
+            return self._collection_names
+
+    def ensure_index(self, collection, keys, **options):
+        """Creates the index once per run (create_index is a no-op on the server, but still a round trip)
+
+        The collection argument isn't called 'name', since that is the index name option of create_index.
+        """
+        key = (collection, tuple(keys))
+        with self.lock:
+            if key in self._indexes:
+                return
+        self.db[collection].create_index(keys, **options)
+        with self.lock:
+            self._indexes.add(key)
+            if self._collection_names is not None:
+                self._collection_names.add(collection)
+
+    def bulk_write(self, name, operations):
+        """Runs the operations in unordered batches, so that memory stays flat and the server can apply each batch in any order"""
+        collection = self.db[name]
+        totals = {'inserted': 0, 'upserted': 0, 'matched': 0, 'modified': 0}
+        while True:
+            batch = list(islice(operations, self.batch_size))
+            if not batch:
+                break
+            result = collection.bulk_write(batch, ordered=False)
+            totals['inserted'] += result.inserted_count
+            totals['upserted'] += result.upserted_count
+            totals['matched'] += result.matched_count
+            totals['modified'] += result.modified_count
+        return totals
+
+    def stage(self, name, index_keys, index_name):
+        return StagedPublish(self, name, index_keys, index_name)
+
+    def record_publish(self, run_id, name, entry):
+        self.db[PUBLISH_MANIFEST_COLLECTION].update_one(
+            {'_id': run_id}, {'$set': {f"collections.{name}": entry}}, upsert=True,
+        )
+
+    def bump_version(self, name, updated_at, months=()):
+        increments = {'version': 1, **{f"months.{month}": 1 for month in months}}
+        self.db[SERIES_VERSION_COLLECTION].update_one(
+            {'_id': name}, {'$inc': increments, '$set': {'updated_at': updated_at}}, upsert=True,
+        )
+
+
+class StagedPublish:
+    """Writes a run's changed documents to a staging collection, verifies them, and merges them into the live one
+
+    Only the changed documents are staged, so a publish costs as much as the run's new data, not the collection's
+    history. Readers keep seeing the previous documents until the merge. A run that dies before the merge only
+    leaves a staging collection behind, which the retry drops and rebuilds; a merge that dies halfway leaves
+    some documents merged, which the retry finds unchanged (same content hash) and skips, so it merges the rest.
+    """
+
+    def __init__(self, loader, name, index_keys, index_name):
+        self.loader = loader
+        self.name = name
+        self.key_fields = [field for field, _ in index_keys]
+        self.staging = loader.db[f"{name}{STAGING_SUFFIX}"]
+        self.staged_rows = 0
+
+        self.staging.drop()
+        # The same unique index as the live collection, so that a run can't stage a key twice
+        self.staging.create_index(index_keys, unique=True, name=index_name)
+
+    def write(self, operations, hash_field, hashes):
+        """Runs the operations on the staging collection, and checks that the documents with these hashes were stored"""
+        totals = self.loader.bulk_write(self.staging.name, iter(operations))
+        self.staged_rows += totals['upserted'] + totals['inserted']
+        stored = self.staging.count_documents({hash_field: {'$in': list(hashes)}})
+        if stored != len(hashes):
+            raise RuntimeError(f"Staging collection for '{self.name}' has {stored} of the {len(hashes)} written documents")
+
+    def publish(self):
+        """Merges the staged documents into the live collection by its unique key, and returns their number"""
+        stored_rows = self.staging.count_documents({})
+        if stored_rows != self.staged_rows:
+            raise RuntimeError(f"Staging collection for '{self.name}' has {stored_rows} rows, expected {self.staged_rows}")
+        # Without the staging _id, a matched document keeps its own, and a new one gets a new _id
+        self.staging.aggregate([
+            {'$project': {'_id': 0}},
+            {'$merge': {'into': self.name, 'on': self.key_fields, 'whenMatched': 'replace', 'whenNotMatched': 'insert'}},
+        ])
+        self.staging.drop()
+        return stored_rows
+
+
+def shared_loader(uri, db_name=MONGO_DB_NAME):
+    """The run-wide loader of a database, so that its collection metadata is only fetched once"""
+    with _lock:
+        if (uri, db_name) not in _loaders:
+            _loaders[(uri, db_name)] = MongoLoader(uri, db_name)
+        return _loaders[(uri, db_name)]
@@ -0,0 +1,63 @@
+"""
+This module contains the shared on-chain price oracle, which memoizes subgraph token prices per (token, block).
+"""
+
+import os
+import json
+import threading
+
+from etl_functions.graphql_batch import fetch_prices_at_blocks
+from etl_functions.schema_cache import deployment_id_from_url
+
+PRICE_ORACLE_PATH = os.path.join('cache', 'price_oracle.json')
+
+# When both pipelines run in one process, the second caller waits and then finds the prices cached
+_fetch_lock = threading.Lock()
+
+
+class PriceOracle:
+    """Token prices at historical blocks, persisted on disk so that a (token, block) is only fetched once"""
+
+    def __init__(self, client, path=PRICE_ORACLE_PATH):
+        self.client = client
+        self.path = path
+        self.deployment_id = getattr(client, 'deployment_id', None) or deployment_id_from_url(client.transport.url)
+        self.prices = self._read()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def _key(self, token_id, block):
+        # Prices at a past block never change, so the deployment, token and block fully identify a price point
+        return f"{self.deployment_id}:{token_id.lower()}:{block}"
+
+    def save(self):
+        """Merges with whatever another pipeline saved in the meantime, then replaces the file atomically"""
+        prices = {**self._read(), **self.prices}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(prices, f)
+        os.replace(tmp_path, self.path)
+        self.prices = prices
+
+    def prices_at_blocks(self, token_id, target_blocks, include_bundle=True):
+        """Returns {block: price} and only queries the subgraph for the blocks that are not cached yet"""
+        with _fetch_lock:
+            self.prices = {**self._read(), **self.prices}
+            missing = [
+                block for block in target_blocks
+                if self._key(token_id, block) not in self.prices
+                or (include_bundle and 'ethPriceUSD' not in self.prices[self._key(token_id, block)])
+            ]
+
+            if missing:
+                fetched = fetch_prices_at_blocks(self.client, token_id, missing, include_bundle=include_bundle)
+                for block, price in fetched.items():
+                    self.prices[self._key(token_id, block)] = price
+                self.save()
+
+            return {block: self.prices[self._key(token_id, block)] for block in target_blocks}
@@ -0,0 +1,79 @@
+"""
+This module contains the local BTC price history store, which replaces one Mempool request per timestamp.
+"""
+
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+
+MEMPOOL_HISTORICAL_PRICE_URL = "https://mempool.space/api/v1/historical-price?currency=USD"
+
+PRICE_STORE_PATH = os.path.join('cache', 'btc_price_history.json')
+
+# The report samples one price per day, so the store is filled (and trusted) at a one day resolution
+PRICE_RESOLUTION_SECONDS = 24 * 60 * 60
+
+
+class BtcPriceStore:
+    """BTC price history kept on disk and sorted by 'time', with the same fields as Mempool's price objects"""
+
+    def __init__(self, path=PRICE_STORE_PATH):
+        self.path = path
+        self.prices = []
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.prices = json.load(f)
+        self.times = [price['time'] for price in self.prices]
+
+    def latest_time(self):
+        return self.times[-1] if self.times else None
+
+    def refresh_url(self, now=None):
+        """Returns the URL that brings the store up to date, or None if its latest price is recent enough
+
+        Mempool has no range query, and a monthly run is always about a month behind, so the store is refreshed
+        with one bulk pull of the whole history instead of one request per missing day.
+        """
+        now = int(now or time.time())
+        latest = self.latest_time()
+        if latest is not None and now - latest <= PRICE_RESOLUTION_SECONDS:
+            return None
+        return MEMPOOL_HISTORICAL_PRICE_URL
+
+    def update(self, response):
+        """Merges a response of the refresh URL ({'prices': [...]}) into the store"""
+        merged = {price['time']: price for price in self.prices}
+        for price in response['prices']:
+            merged[price['time']] = price
+
+        self.prices = [merged[t] for t in sorted(merged)]
+        self.times = [price['time'] for price in self.prices]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.prices, f)
+        os.replace(tmp_path, self.path)
+
+    def price_at(self, timestamp):
+        """Returns the stored price nearest to the timestamp, or None if it is farther away than the store's resolution"""
+        if not self.prices:
+            return None
+        index = bisect_left(self.times, timestamp)
+        candidates = [i for i in (index - 1, index) if 0 <= i < len(self.times)]
+        nearest = min(candidates, key=lambda i: abs(self.times[i] - timestamp))
+        if abs(self.times[nearest] - timestamp) > PRICE_RESOLUTION_SECONDS:
+            return None
+        return self.prices[nearest]
+
+    def prices_at(self, timestamps):
+        """Returns the price at every timestamp, and fails if any of them has no stored price close enough"""
+        prices = [self.price_at(ts) for ts in timestamps]
+        missing = [ts for ts, price in zip(timestamps, prices) if price is None]
+        if missing:
+            raise ValueError(f"No stored BTC price within {PRICE_RESOLUTION_SECONDS}s of {len(missing)} timestamps "
+                             f"(first: {missing[0]}); the price history has a gap")
+        return prices
@@ -0,0 +1,151 @@
+"""
+This module contains the stage-level DAG scheduler that runs pipeline tasks as soon as their inputs are ready.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_MAX_WORKERS = 4
+
+
+class Task:
+    """A pipeline stage: 'func' is called with the outputs of the 'inputs' tasks as keyword arguments
+
+    A 'resumable' task also receives a 'checkpoint' keyword argument (a StageCheckpoint, or None) where it can
+    store partial outputs, so that a retry only repeats the part that failed.
+    An extract task names the API 'source' its raw responses are landed under.
+    """
+
+    def __init__(self, name, func, inputs=(), kind='transform', resumable=False, source=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.kind = kind
+        self.resumable = resumable
+        self.source = source
+
+
+def _timed_call(func, kwargs):
+    """Runs a task in the worker and reports its own start/end times, so that queueing is not counted"""
+    start = time.time()
+    result = func(**kwargs)
+    return result, start, time.time()
+
+
+def validate_tasks(tasks):
+    names = [task.name for task in tasks]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate task names: {duplicates}")
+    for task in tasks:
+        missing = set(task.inputs) - set(names)
+        if missing:
+            raise ValueError(f"Task '{task.name}' has unknown inputs: {missing}")
+
+
+def run_tasks(tasks, max_workers=DEFAULT_MAX_WORKERS, checkpoints=None, landing=None, replay=False):
+    """Runs every task whose inputs are ready in a thread pool and returns {name: output}
+
+    With a CheckpointStore, every finished task's output is saved, and tasks that already have a valid
+    checkpoint for this run are restored instead of being run again.
+    With a LandingZone, the raw output of every extract task is landed; in replay mode the extract tasks
+    are not run at all, and their outputs are read back from the landing zone instead.
+    """
+    validate_tasks(tasks)
+    by_name = {task.name: task for task in tasks}
+
+    results = {}
+    timings = {}
+    restored = set()
+    if replay:
+        for name, task in by_name.items():
+            if task.kind == 'extract':
+                results[name] = landing.read(task.source, name)
+                restored.add(name)
+        print(f"Replaying landed responses for stages: {sorted(restored)}")
+    if checkpoints is not None:
+        for name in by_name:
+            try:
+                results[name] = checkpoints.load(name)
+                restored.add(name)
+            except KeyError:
+                pass
+        if restored:
+            print(f"Resuming run '{checkpoints.run_id}', restored stages: {sorted(restored)}")
+    failed = set()
+    skipped = set()
+    pending = {name: task for name, task in by_name.items() if name not in restored}
+    running = {}
+    run_start = time.time()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            # Tasks downstream of a failure can never run
+            for name, task in list(pending.items()):
+                if any(input_name in failed or input_name in skipped for input_name in task.inputs):
+                    skipped.add(name)
+                    del pending[name]
+
+            for name, task in list(pending.items()):
+                if all(input_name in results for input_name in task.inputs):
+                    kwargs = {input_name: results[input_name] for input_name in task.inputs}
+                    if task.resumable:
+                        kwargs['checkpoint'] = checkpoints.stage(name) if checkpoints is not None else None
+                    running[executor.submit(_timed_call, task.func, kwargs)] = name
+                    del pending[name]
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name], start, end = future.result()
+                    timings[name] = (start, end)
+                    if checkpoints is not None:
+                        checkpoints.save(name, results[name])
+                    if landing is not None and by_name[name].kind == 'extract' and not replay:
+                        landing.write(by_name[name].source, name, results[name])
+                except Exception as e:
+                    print(f"Task '{name}' failed: {e}")
+                    failed.add(name)
+
+    print_timing_summary(tasks, timings, run_start, time.time(), restored)
+
+    if failed or skipped:
+        raise RuntimeError(f"Pipeline failed. Failed tasks: {sorted(failed)}, skipped tasks: {sorted(skipped)}")
+    return results
+
+
+def critical_path(tasks, timings):
+    """Walks back from the last task to finish, always through the input that finished last"""
+    by_name = {task.name: task for task in tasks}
+    if not timings:
+        return []
+
+    name = max(timings, key=lambda task_name: timings[task_name][1])
+    path = [name]
+    while True:
+        inputs = [input_name for input_name in by_name[name].inputs if input_name in timings]
+        if not inputs:
+            break
+        name = max(inputs, key=lambda input_name: timings[input_name][1])
+        path.append(name)
+    return list(reversed(path))
+
+
+def print_timing_summary(tasks, timings, run_start, run_end, restored=()):
+    print("\nPipeline timing summary")
+    print(f"{'task':<36}{'kind':<12}{'start (s)':>10}{'duration (s)':>14}")
+    for task in sorted(tasks, key=lambda task: timings.get(task.name, (float('inf'),))[0]):
+        if task.name not in timings:
+            status = 'restored' if task.name in restored else '-'
+            print(f"{task.name:<36}{task.kind:<12}{status:>10}{'-':>14}")
+            continue
+        start, end = timings[task.name]
+        print(f"{task.name:<36}{task.kind:<12}{start - run_start:>10.1f}{end - start:>14.1f}")
+
+    path = critical_path(tasks, timings)
+    path_time = sum(timings[name][1] - timings[name][0] for name in path)
+    print(f"\nCritical path ({path_time:.1f}s of {run_end - run_start:.1f}s wall-clock): {' -> '.join(path)}\n")
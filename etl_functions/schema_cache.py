@@ -0,0 +1,81 @@
+"""
+This module contains the GraphQL client that reuses a locally cached subgraph schema instead of introspecting on every run.
+"""
+
+import os
+import json
+import time
+
+from gql import Client
+from graphql import GraphQLError, print_schema
+
+SCHEMA_CACHE_DIR = os.path.join('cache', 'graphql_schemas')
+
+# Subgraph schemas rarely change, so a cached SDL is trusted for a week unless validation fails
+SCHEMA_TTL_SECONDS = 7 * 24 * 60 * 60
+
+def deployment_id_from_url(url):
+    """Returns the subgraph or deployment ID, which is the last path segment of the gateway URL"""
+    return url.rstrip('/').split('/')[-1]
+
+def schema_cache_path(deployment_id):
+    return os.path.join(SCHEMA_CACHE_DIR, f"{deployment_id}.json")
+
+def load_cached_schema(deployment_id, ttl=SCHEMA_TTL_SECONDS):
+    """Returns the cached SDL for a deployment, or None if it is missing or stale"""
+    path = schema_cache_path(deployment_id)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'r') as f:
+        cached = json.load(f)
+
+    if time.time() - cached['fetched_at'] > ttl:
+        return None
+    return cached['sdl']
+
+def save_cached_schema(deployment_id, schema):
+    """Stores the introspected schema as SDL together with the time it was fetched"""
+    os.makedirs(SCHEMA_CACHE_DIR, exist_ok=True)
+    with open(schema_cache_path(deployment_id), 'w') as f:
+        json.dump({'fetched_at': time.time(), 'sdl': print_schema(schema)}, f)
+
+
+class SchemaCachedClient(Client):
+    """GraphQL client that validates against the cached SDL and only introspects when it is stale or invalid"""
+
+    def __init__(self, transport, deployment_id=None, ttl=SCHEMA_TTL_SECONDS, **kwargs):
+        self.deployment_id = deployment_id or deployment_id_from_url(transport.url)
+        sdl = load_cached_schema(self.deployment_id, ttl)
+        self.schema_from_cache = sdl is not None
+
+        super().__init__(
+            transport=transport,
+            schema=sdl,
+            fetch_schema_from_transport=not self.schema_from_cache,
+            **kwargs,
+        )
+
+    def reset_schema(self):
+        """Drops the cached schema so that the next execution introspects the deployment again"""
+        self.schema = None
+        self.introspection = None
+        self.fetch_schema_from_transport = True
+        self.schema_from_cache = False
+
+    def execute(self, document, *args, **kwargs):
+        try:
+            result = super().execute(document, *args, **kwargs)
+        except GraphQLError:
+            if not self.schema_from_cache:
+                raise
+            # The cached SDL no longer matches the deployment, so introspect again and retry once
+            print(f"Cached schema for {self.deployment_id} failed validation, re-introspecting...")
+            self.reset_schema()
+            result = super().execute(document, *args, **kwargs)
+
+        if not self.schema_from_cache and self.schema is not None:
+            save_cached_schema(self.deployment_id, self.schema)
+            self.schema_from_cache = True
+
+        return result
@@ -0,0 +1,83 @@
+"""
+This module contains the declarative registry of subgraph sources and the engine that fetches them concurrently.
+"""
+
+import pandas as pd
+
+from etl_functions.async_fetch import Endpoint, fetch_all
+
+# As in the original TheGraph clients, the path keeps the literal '{thegraph_api}' placeholder, and the API key is
+# only sent in the bearer header (so that it never shows up in the URLs of error messages)
+THEGRAPH_GATEWAY_URL = "https://gateway-arbitrum.network.thegraph.com/api/{{thegraph_api}}/{id_kind}/id/{deployment_id}"
+
+
+class SubgraphSource:
+    """A subgraph entity query declared by its deployment ID and a field -> type mapping ('float', 'int' or 'datetime')"""
+
+    def __init__(self, name, deployment_id, entity, fields, order_by, first=31, id_kind='subgraphs'):
+        self.name = name
+        self.deployment_id = deployment_id
+        self.entity = entity
+        self.fields = fields
+        self.order_by = order_by
+        self.first = first
+        self.id_kind = id_kind
+
+    def url(self):
+        return THEGRAPH_GATEWAY_URL.format(id_kind=self.id_kind, deployment_id=self.deployment_id)
+
+    def query(self):
+        fields = "\n    ".join(self.fields)
+        return f"""
+{{
+  {self.entity}(orderBy: {self.order_by}, orderDirection: desc, first: {self.first}) {{
+    {fields}
+  }}
+}}
+"""
+
+    def to_frame(self, response):
+        """Converts the entity rows into a typed, column-by-column DataFrame"""
+        if 'errors' in response:
+            raise ValueError(f"Subgraph '{self.name}' returned errors: {response['errors']}")
+
+        rows = response['data'][self.entity]
+        columns = {}
+        for field, kind in self.fields.items():
+            values = pd.Series([row[field] for row in rows], dtype=object)
+            if kind == 'float':
+                columns[field] = pd.to_numeric(values).astype(float)
+            elif kind == 'int':
+                columns[field] = pd.to_numeric(values).astype(int)
+            elif kind == 'datetime':
+                columns[field] = pd.to_datetime(pd.to_numeric(values), unit='s')
+            else:
+                columns[field] = values
+        return pd.DataFrame(columns)
+
+
+# Messari-standard lending/staking subgraphs share the same daily financials snapshot entity
+FINANCIALS_DAILY_FIELDS = {'totalValueLockedUSD': 'float', 'timestamp': 'datetime'}
+
+TVL_SOURCES = [
+    SubgraphSource('lido', 'F7qb71hWab6SuRL5sf6LQLTpNahmqMsBnnweYHzLGUyG',
+                   'financialsDailySnapshots', FINANCIALS_DAILY_FIELDS, order_by='timestamp'),
+    SubgraphSource('aave', 'C2zniPn45RnLDGzVeGZCx2Sw3GXrbc9gL4ZfL8B8Em2j',
+                   'financialsDailySnapshots', FINANCIALS_DAILY_FIELDS, order_by='timestamp'),
+    SubgraphSource('makerdao', '8sE6rTNkPhzZXZC6c8UQy2ghFTu5PPdGauwUBm4t7HZ1',
+                   'financialsDailySnapshots', FINANCIALS_DAILY_FIELDS, order_by='timestamp'),
+]
+
+
+def fetch_subgraph_responses(sources, api_key, timeout=10):
+    """Fetches every source concurrently over the gateway's shared session and returns the raw {name: response}"""
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    endpoints = [
+        Endpoint(source.name, url=source.url(), payload={'query': source.query()}, headers=headers)
+        for source in sources
+    ]
+    return fetch_all(endpoints, timeout=timeout)
+
@@ -0,0 +1,261 @@
+"""
+This module contains the time-series layout in MongoDB: one collection per metric, where each observation is stored once and a month is a range query.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from pymongo import ReplaceOne
+
+from etl_functions.mongo_loader import SERIES_VERSION_COLLECTION, append_field, documents_hash, encode_document
+
+TIME_FIELD = 'time'
+META_FIELD = 'meta'
+HASH_FIELD = 'content_hash'
+INDEX_NAME = 'metric_time'
+# A value column named like a document field (e.g. mempool's Unix 'time' next to a 'date' series time) is stored
+# with this suffix, so that it can't overwrite the series key, and is renamed back in the month view
+RESERVED_FIELDS = ('_id', TIME_FIELD, META_FIELD, HASH_FIELD)
+RENAMED_SUFFIX = '_value'
+
+
+def stored_name(column):
+    return f"{column}{RENAMED_SUFFIX}" if column in RESERVED_FIELDS else column
+
+
+def column_name(field):
+    column = field[:-len(RENAMED_SUFFIX)] if field.endswith(RENAMED_SUFFIX) else None
+    return column if column in RESERVED_FIELDS else field
+
+
+class MetricSeries:
+    """How one transformed dataframe is stored as a series of {time, meta, ...values} documents
+
+    'time_field' is the dataframe column that becomes the document time, and 'meta_fields' are the columns that tell
+    apart several observations at the same time (e.g. the mining pool name). 'derived' columns are relative to the
+    reporting window (normalized prices, row numbers), so they are not stored but recomputed for every month view.
+    A 'snapshot' metric has no time column of its own, and is stored at the end of the period it was fetched for.
+    'resolution' floors the document time (e.g. 'D' for a daily snapshot whose timestamp moves during the day).
+    """
+
+    def __init__(self, frame, collection, time_field, meta_fields=(), derived=(), snapshot=False, finish=None,
+                 resolution=None):
+        self.frame = frame
+        self.collection = collection
+        self.time_field = time_field
+        self.meta_fields = tuple(meta_fields)
+        self.derived = tuple(derived)
+        self.snapshot = snapshot
+        self.finish = finish
+        self.resolution = resolution
+
+    def index_keys(self):
+        # Metric and time first, so that a month view is an index range scan, then the meta fields for uniqueness
+        return [(f"{META_FIELD}.metric", 1), (TIME_FIELD, 1)] + [(f"{META_FIELD}.{field}", 1) for field in self.meta_fields]
+
+    def key_of(self, document):
+        key = {f"{META_FIELD}.{field}": value for field, value in document[META_FIELD].items()}
+        key[TIME_FIELD] = document[TIME_FIELD]
+        return key
+
+    def row_key(self, document):
+        """Hashable (time, meta) key, to match the rows of a run with the stored ones"""
+        return document[TIME_FIELD], tuple(sorted(document[META_FIELD].items()))
+
+    def documents(self, df, snapshot_time=None):
+        skipped = set(self.meta_fields) | set(self.derived) | ({self.time_field} if not self.snapshot else set())
+        value_columns = [column for column in df.columns if column not in skipped]
+        for row in _iter_records(df):
+            time = pd.Timestamp(snapshot_time if self.snapshot else row[self.time_field])
+            # Stored as naive UTC, which is what MongoDB returns, so that keys compare equal to the stored ones
+            if time.tzinfo is not None:
+                time = time.tz_convert('UTC').tz_localize(None)
+            yield {
+                # BSON dates have millisecond precision, so the key is truncated the same way the stored time is
+                TIME_FIELD: time.floor(self.resolution or 'ms').to_pydatetime(),
+                META_FIELD: {'metric': self.collection, **{field: row[field] for field in self.meta_fields}},
+                **{stored_name(column): row[column] for column in value_columns},
+            }
+
+
+def _iter_records(df):
+    columns = list(df.columns)
+    for values in df.itertuples(index=False, name=None):
+        yield dict(zip(columns, values))
+
+
+def _normalize_prices(columns):
+    """Normalizes each price column against the first day of the month view"""
+    def finish(df):
+        for normalized, price in columns.items():
+            df[normalized] = df[price] / df[price].iloc[0]
+        return df
+    return finish
+
+
+def _number_tvl_rows(df):
+    # Same numbering as the ETL: row 0 is the latest day, and 'day_num' counts the days from the first one
+    df = df.sort_values('timestamp', ascending=False).reset_index(drop=True)
+    df['row_index'] = np.arange(len(df))
+    df['day_num'] = df['row_index'].max() - df['row_index']
+    return df
+
+
+METRIC_SERIES = {series.frame: series for series in [
+    MetricSeries('btc_1m_w_external', 'btc_w_external', 'time',
+                 derived=('btc_price_normalized', 'gold_price_normalized'),
+                 finish=_normalize_prices({'btc_price_normalized': 'wbtc_price_in_usd',
+                                           'gold_price_normalized': 'paxg_price_in_usd'})),
+    MetricSeries('btc_1m_mempool_fee', 'btc_mempool_fee', 'time'),
+    MetricSeries('btc_1m_mempool_price', 'btc_mempool_price', 'date'),
+    MetricSeries('btc_mempool_mining_pools', 'btc_mining_pools', 'time', meta_fields=('name',), snapshot=True),
+    MetricSeries('btc_1m_mempool_lightning', 'btc_lightning', 'added'),
+    MetricSeries('btc_1m_mempool_hashrate', 'btc_hashrate', 'time'),
+    MetricSeries('btc_1m_dune_fee_breakdown', 'btc_fee_breakdown', 'Day'),
+    # Aggregated series, materialized by the ETL for the report figures
+    MetricSeries('btc_1m_mempool_fee_daily', 'btc_fee_daily', 'date'),
+    MetricSeries('btc_mempool_mining_pools_top', 'btc_mining_pools_top', 'time', meta_fields=('name',), snapshot=True),
+    MetricSeries('btc_1m_hashrate_vs_price', 'btc_hashrate_price', 'date'),
+    MetricSeries('eth_1m_w_external', 'eth_w_external', 'time',
+                 derived=('eth_price_normalized', 'btc_price_normalized'),
+                 finish=_normalize_prices({'eth_price_normalized': 'eth_price_in_usd',
+                                           'btc_price_normalized': 'wbtc_price_in_usd'})),
+    MetricSeries('eth_1m_gas_fee', 'eth_gas_fee', 'timestamp'),
+    MetricSeries('eth_1m_uniswap_data', 'eth_uniswap', 'date'),
+    # The latest Aave snapshot is updated during the day, so the series is keyed on the day rather than its timestamp
+    MetricSeries('eth_1m_tvl', 'eth_tvl', 'timestamp', derived=('row_index', 'day_num'), finish=_number_tvl_rows,
+                 resolution='D'),
+    MetricSeries('eth_1m_l2_bridge_all', 'eth_l2_bridges', 'day'),
+]}
+
+
+def month_range(month_year):
+    """'june_2024' (or 'JUNE 2024') -> [2024-06-01, 2024-07-01)"""
+    start = datetime.strptime(month_year.replace(' ', '_').lower(), '%B_%Y')
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+
+def month_of(time):
+    """2024-06-14 -> 'june_2024', the month key of the reports"""
+    return time.strftime('%B_%Y').lower()
+
+
+class TimeSeriesStore:
+    """Writes transformed dataframes into their metric's collection through a MongoLoader"""
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def stored_hashes(self, series, documents):
+        """Content hashes of the stored rows at the times of this chunk's rows, fetched in one indexed query"""
+        if not documents:
+            return {}
+        times = list({document[TIME_FIELD] for document in documents})
+        query = {f"{META_FIELD}.metric": series.collection, TIME_FIELD: {'$in': times}}
+        projection = {'_id': 0, TIME_FIELD: 1, META_FIELD: 1, HASH_FIELD: 1}
+        return {series.row_key(stored): stored.get(HASH_FIELD)
+                for stored in self.loader.db[series.collection].find(query, projection)}
+
+    def write(self, frame, df, snapshot_time=None, run_id=None):
+        """Upserts the rows that are new or changed since they were stored, and skips the identical ones
+
+        Every row is keyed by (metric, meta, time) and carries the SHA-256 of its content, so an observation that is
+        in several windows is stored once, and the write volume of a run is proportional to its new data.
+        The rows are encoded, compared and written one batch at a time, so only the content hashes of the run are
+        kept in memory. The changes are verified in a staging collection before they reach the live one (see StagedPublish).
+        Returns the inserted/updated/skipped counts, and the 'months' whose rows changed (e.g. ['may_2024', 'june_2024']).
+        """
+        series = METRIC_SERIES[frame]
+        self.loader.ensure_index(series.collection, series.index_keys(), unique=True, name=INDEX_NAME)
+
+        digests = []
+        counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        changed_months = set()
+        staged = None
+        documents = series.documents(df, snapshot_time)
+        while True:
+            chunk = list(islice(documents, self.loader.batch_size))
+            if not chunk:
+                break
+            stored = self.stored_hashes(series, chunk)
+
+            operations = []
+            hashes = []
+            for document in chunk:
+                encoded = encode_document(document)
+                digest = hashlib.sha256(encoded.raw).digest()
+                digests.append(digest)
+                content_hash = digest.hex()
+                stored_hash = stored.get(series.row_key(document))
+                if stored_hash == content_hash:
+                    counts['skipped'] += 1
+                    continue
+                counts['inserted' if stored_hash is None else 'updated'] += 1
+                # The hash is appended to the bytes that were hashed, rather than encoding the document twice
+                operations.append(ReplaceOne(series.key_of(document), append_field(encoded, HASH_FIELD, content_hash),
+                                             upsert=True))
+                hashes.append(content_hash)
+                changed_months.add(document[TIME_FIELD].replace(day=1, hour=0, minute=0, second=0, microsecond=0))
+
+            if operations:
+                # Written to a staging collection, which is merged into the live one once verified
+                if staged is None:
+                    staged = self.loader.stage(series.collection, series.index_keys(), INDEX_NAME)
+                staged.write(operations, HASH_FIELD, hashes)
+
+        counts['months'] = [month_of(month) for month in sorted(changed_months)]
+
+        written_at = datetime.now(timezone.utc)
+        if staged is not None:
+            try:
+                staged.publish()
+            finally:
+                # Only a write that changed rows invalidates the cached month views of the app, and only those of its
+                # months (also when the merge failed halfway, since some of them may already have changed)
+                self.loader.bump_version(series.collection, written_at, counts['months'])
+        if run_id is not None:
+            self.loader.record_publish(run_id, series.collection, {
+                'rows': len(df), **counts, 'sha256': documents_hash(digests), 'written_at': written_at,
+            })
+        return counts
+
+
+def read_month_view(db, frame, month_year):
+    """Returns a metric's observations in the given month, with the same columns as the transformed dataframe"""
+    series = METRIC_SERIES[frame]
+    start, end = month_range(month_year)
+    query = {f"{META_FIELD}.metric": series.collection, TIME_FIELD: {'$gte': start, '$lt': end}}
+    documents = list(db[series.collection].find(query, {'_id': 0, HASH_FIELD: 0}).sort(TIME_FIELD, 1))
+
+    # A snapshot metric only shows the latest snapshot of the month
+    if series.snapshot and documents:
+        latest = documents[-1][TIME_FIELD]
+        documents = [document for document in documents if document[TIME_FIELD] == latest]
+
+    rows = []
+    for document in documents:
+        meta = document.pop(META_FIELD)
+        meta.pop('metric', None)
+        time = document.pop(TIME_FIELD)
+        values = {column_name(field): value for field, value in document.items()}
+        rows.append({**({} if series.snapshot else {series.time_field: time}), **meta, **values})
+
+    df = pd.DataFrame(rows)
+    if series.finish is not None and not df.empty:
+        df = series.finish(df)
+    return df
+
+
+def read_series_versions(db, collections=None):
+    """Returns {collection: {month_year: version}} for the given metric collections (all of them by default)
+
+    A month's version is bumped by every write that changes rows in that month, and a month view only depends on
+    the rows of its month, so a view is current as long as its month's version is.
+    """
+    query = {} if collections is None else {'_id': {'$in': list(collections)}}
+    return {document['_id']: document.get('months', {})
+            for document in db[SERIES_VERSION_COLLECTION].find(query, {'months': 1})}
@@ -0,0 +1,82 @@
+"""
+Migration - Monthly Collections to Time-Series Collections (one-off)
+"""
+
+import os
+import re
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from etl_functions.mongo_loader import shared_loader
+from etl_functions.timeseries_store import METRIC_SERIES, TimeSeriesStore, read_month_view
+from shared_functions.figure_artifacts import publish_report_figures
+from btc_etl import transform_btc_1m_mempool_fee_daily, transform_btc_mempool_mining_pools_top, transform_btc_1m_hashrate_vs_price
+
+## Connect to environment variables
+load_dotenv()
+mongodb_uri = os.getenv('MONGODB_URI')
+
+# The per-month collection of each chain that decided the report period
+PERIOD_FRAMES = {'btc': ('btc_1m_mempool_fee', 'time'), 'eth': ('eth_1m_gas_fee', 'timestamp')}
+
+# The aggregated series didn't exist as monthly collections, so they are derived from the migrated data
+DERIVED_FRAMES = {
+    'btc_1m_mempool_fee_daily': (transform_btc_1m_mempool_fee_daily, ['btc_1m_mempool_fee']),
+    'btc_mempool_mining_pools_top': (transform_btc_mempool_mining_pools_top, ['btc_mempool_mining_pools']),
+    'btc_1m_hashrate_vs_price': (transform_btc_1m_hashrate_vs_price, ['btc_1m_mempool_hashrate', 'btc_1m_mempool_price']),
+}
+
+MONTHLY_COLLECTION = re.compile(r'^(?P<frame>\w+?)_(?P<month_year>[a-z]+_\d{4})$')
+
+
+def read_monthly(db, frame, month_year):
+    return pd.DataFrame(list(db[f"{frame}_{month_year}"].find({}, {'_id': 0})))
+
+
+def add_missing_time(frame, df, period_end):
+    """The older collections don't have a time column for the block-sampled prices and the TVL, so it is rebuilt
+    from the row order: one row per day, ending at the last day of the report period"""
+    if frame.endswith('_w_external') and 'time' not in df.columns:
+        df = df.sort_values('target_block').reset_index(drop=True)
+        df['time'] = [period_end - pd.Timedelta(days=len(df) - 1 - i) for i in range(len(df))]
+    if frame == 'eth_1m_tvl' and 'timestamp' not in df.columns:
+        df['timestamp'] = [period_end - pd.Timedelta(days=int(df['day_num'].max() - day_num)) for day_num in df['day_num']]
+    return df
+
+
+if __name__ == '__main__':
+    loader = shared_loader(mongodb_uri)
+    store = TimeSeriesStore(loader)
+    migrated = set()
+
+    for name in sorted(loader.collection_names()):
+        match = MONTHLY_COLLECTION.match(name)
+        if not match or match['frame'] not in METRIC_SERIES:
+            continue
+        frame, month_year = match['frame'], match['month_year']
+
+        period_frame, period_column = PERIOD_FRAMES[frame.split('_')[0]]
+        period_end = pd.to_datetime(read_monthly(loader.db, period_frame, month_year)[period_column]).max().normalize()
+
+        df = add_missing_time(frame, read_monthly(loader.db, frame, month_year), period_end)
+        counts = store.write(frame, df, snapshot_time=period_end, run_id=f"migration-{month_year}")
+        print(f"{name} -> {METRIC_SERIES[frame].collection}: {counts}")
+        migrated.add((frame.split('_')[0], month_year))
+
+    for chain, month_year in sorted(migrated):
+        if chain != 'btc':
+            continue
+        period_end = read_month_view(loader.db, 'btc_1m_mempool_fee', month_year)['time'].max().normalize()
+        for frame, (transform, inputs) in DERIVED_FRAMES.items():
+            df = transform(*[read_month_view(loader.db, name, month_year) for name in inputs])
+            counts = store.write(frame, df, snapshot_time=period_end, run_id=f"migration-{month_year}")
+            print(f"{frame} ({month_year}) -> {METRIC_SERIES[frame].collection}: {counts}")
+
+    # The migrated months also get their figure artifacts, so the app doesn't build their figures on every visit,
+    # and the existing artifacts of the other months whose data changed are rendered again
+    for chain in ('btc', 'eth'):
+        publish_report_figures(chain, [month_year for migrated_chain, month_year in migrated if migrated_chain == chain],
+                               loader.db)
+
+    print("Migration finished. The monthly collections are left in place, and can be dropped once the reports look right.")
@@ -0,0 +1,18 @@
+"""
+Dash Page - ETH Monthly Report
+"""
+
+import dash
+
+from shared_functions.report_engine import report_layout, report_title
+from shared_functions.utils import month_key
+
+# Every month is served by this one page, e.g. /eth/june-2024
+dash.register_page(
+    __name__,
+    path_template='/eth/<month>',
+    title=lambda month=None, **kwargs: report_title('eth', month_key(month)),
+)
+
+def layout(month=None, **kwargs):
+    return report_layout('eth', month_key(month))
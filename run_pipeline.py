@@ -0,0 +1,37 @@
+"""
+Pipeline Runner - Monthly
+"""
+
+import subprocess
+import sys
+
+from btc_etl import BTC_TASKS
+from eth_etl import ETH_TASKS
+from etl_functions.scheduler import Task, run_tasks
+from etl_functions.checkpoint import CheckpointStore
+from etl_functions.http_client import report_latency
+from etl_functions.landing_zone import LandingZone, replay_args
+
+# The BTC and ETH extracts share nothing, so they run side by side, and the AI analysis waits for both loads
+# (it reads the staged Parquet frames, and the report period from month_year.txt)
+def run_ai_analysis():
+    subprocess.run([sys.executable, 'ai_analysis_fetch.py'], check=True)
+
+PIPELINE_TASKS = BTC_TASKS + ETH_TASKS + [
+    Task('ai_analysis', run_ai_analysis, inputs=['btc_load', 'eth_load', 'btc_stage', 'eth_stage'], kind='analyze'),
+]
+
+if __name__ == '__main__':
+    replay, replay_date = replay_args(sys.argv[1:])
+    if replay:
+        # Re-runs every transform and load from the landed responses; the AI analysis needs the network, so it is left out
+        replay_tasks = [task for task in PIPELINE_TASKS if task.kind != 'analyze']
+        run_tasks(replay_tasks, max_workers=8, landing=LandingZone(replay_date), replay=True)
+    else:
+        # Every finished stage is checkpointed, so a retry with the same PIPELINE_RUN_ID resumes from the first failed stage
+        checkpoints = CheckpointStore()
+        try:
+            run_tasks(PIPELINE_TASKS, max_workers=8, checkpoints=checkpoints, landing=LandingZone())
+        finally:
+            report_latency()
+        checkpoints.clear()
@@ -0,0 +1,314 @@
+"""
+This module contains the figures of the Bitcoin monthly report, built from the month's dataframes.
+"""
+
+from plotly.subplots import make_subplots
+import plotly.express as px
+import plotly.graph_objects as go
+
+
+def build_btc_figures(btc_1m_w_external, btc_1m_mempool_fee_daily, btc_1m_hashrate_vs_price, btc_mempool_mining_pools_top, btc_1m_mempool_lightning, btc_1m_dune_fee_breakdown):
+    """Returns the report's figures in section order: fig1, fig2, fig3, fig4, fig5, fig6, fig7"""
+    ## fig1: Bitcoin's Price Action Chart vs. Gold (Normalized)
+    btc_1m_w_external.sort_values(by='target_block', inplace=True)
+
+    fig1_trace1 = go.Scatter(
+        x=btc_1m_w_external['target_block'], 
+        y=btc_1m_w_external['btc_price_normalized'], 
+        mode='lines', 
+        name='BTC', 
+        line={'color': 'green'},
+        hovertemplate='BTC Normalized: %{y}<extra></extra>'
+    )
+
+    fig1_trace2 = go.Scatter(
+        x=btc_1m_w_external['target_block'], 
+        y=btc_1m_w_external['gold_price_normalized'], 
+        mode='lines', 
+        name='Gold', 
+        line={'color': 'gold'},
+        hovertemplate='Gold Normalized: %{y}<extra></extra>'
+    )
+
+    index_values = list(range(1, len(btc_1m_w_external['target_block'])+1))
+
+    fig1_layout = go.Layout(
+        height=400,
+        xaxis=dict(
+            tickvals=btc_1m_w_external['target_block'],
+            ticktext=index_values,
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            showticklabels=False
+        ),
+        title='BTC vs. Gold - Normalized',
+        titlefont={'color': 'white'},
+        title_x=0.05,
+        yaxis=dict(
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            titlefont={'color': 'white'},
+            title=''
+        ),
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        legend={'font': {'color': 'white'}}
+    )
+
+    fig1 = go.Figure(data=[fig1_trace1, fig1_trace2], layout=fig1_layout)
+
+    ## fig2: Scatter Plot Between BTC vs. Gold (Normalized)
+    fig2 = px.scatter(btc_1m_w_external, x='btc_price_normalized',
+                      y='gold_price_normalized',
+                      labels={'btc_price_normalized': 'BTC',
+                      'gold_price_normalized': 'Gold'}, 
+                      title='BTC vs. Gold')
+
+    fig2_layout = fig2.layout
+
+    fig2_layout.update(
+        height=400,
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        yaxis={
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white'},
+            'titlefont': {'color': 'white'}
+        },
+        xaxis={
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white'},
+            'titlefont': {'color': 'white'}
+        },
+        legend={'font': {'color': 'white'}},
+        title_font={'color': 'white'}
+    )
+
+    fig2 = {"data": fig2.data, "layout": fig2_layout}
+
+    ## fig3: Line Chart Showing BTC Hashrate and Price
+    # The hashrate and price are joined on their day by the ETL
+    btc_1m_hashrate_vs_price.sort_values(by='date', inplace=True)
+
+    fig3 = make_subplots(rows=2, cols=1)
+    fig3.add_trace(
+        go.Scatter(
+            x=btc_1m_hashrate_vs_price['date'],
+            y=btc_1m_hashrate_vs_price['USD'],
+            mode='lines',
+            name='USD',
+            line={'color': 'green'},
+            hovertemplate='Price: %{y}<extra></extra>'
+        ),
+        row=1, col=1
+    )
+
+    fig3.add_trace(
+        go.Scatter(
+            x=btc_1m_hashrate_vs_price['date'],
+            y=btc_1m_hashrate_vs_price['avgHashrate_EHs'],
+            mode='lines',
+            name='Hashrate (EH/s)',
+            line={'color': 'red'},
+            hovertemplate='Hashrate (EH/s): %{y}<extra></extra>'
+        ),
+        row=2, col=1
+    )
+
+    # Update yaxis properties
+    fig3.update_yaxes(title_text="BTC Price", row=1, col=1, gridcolor='#636363', zerolinecolor='#636363', tickfont={'color': 'white'}, titlefont={'color': 'white'})
+    fig3.update_yaxes(title_text="BTC Hashrate (EH/s)", row=2, col=1, gridcolor='#636363', zerolinecolor='#636363', tickfont={'color': 'white'}, titlefont={'color': 'white'})
+
+    # Update xaxis properties
+    fig3.update_xaxes(title_text="Date", row=1, col=1, gridcolor='#636363', zerolinecolor='#636363', tickfont={'color': 'white'}, titlefont={'color': 'white'}, showticklabels=False)
+    fig3.update_xaxes(title_text="Date", row=2, col=1, gridcolor='#636363', zerolinecolor='#636363', tickfont={'color': 'white'}, titlefont={'color': 'white'}, showticklabels=False)
+
+    # Layout adjustments
+    fig3.update_layout(
+        autosize=True,
+        height=600,
+        title_text="BTC Price and Hashrate",
+        titlefont={'color': 'white'},
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        legend={'font': {'color': 'white'}},
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+
+
+    ## fig4: Bitcoin Median Tx Fee Over Time
+    # The daily average of 'avgFee_50' is computed by the ETL
+    btc_1m_mempool_fee_daily.sort_values(by='date', inplace=True)
+
+    fig4 = px.bar(btc_1m_mempool_fee_daily, x="date", y="avgFee_50", \
+                  title="Bitcoin Median Tx Fee Over Time", \
+                  color_discrete_sequence=['#a2823c'], \
+                  custom_data=['date', 'avgFee_50'])
+
+    fig4.update_traces(hovertemplate="<b>Median Fee:</b> %{customdata[1]:.0f} sat/vB")
+
+    fig4.update_layout(
+        yaxis={
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white'},
+            'titlefont': {'color': 'white'},
+            'title': ''
+        },
+        xaxis={
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white'},
+            'titlefont': {'color': 'white'},
+            'showticklabels': False,
+            'title': ''
+        },
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        legend={'font': {'color': 'white'}},
+        title_font={'color': 'white'}
+    )
+
+
+    ## fig5: Bitcoin Mining Pools
+    # The top 10 mining pools, the "Others" group and their percentages are computed by the ETL
+    pools = btc_mempool_mining_pools_top
+
+    fig5 = px.pie(pools, values='blockCount', names='name', title='Bitcoin Mining Pools',\
+                  hover_data=['percentage'])
+
+    fig5.update_traces(
+        hovertemplate='<b>%{label}</b><br>' +
+                      'blockCount: %{value}<br>' +
+                      'Percentage: %{customdata[0]:.2f}%<extra></extra>',
+        textposition='outside',
+        textinfo='percent+label',
+        insidetextorientation='radial',
+        textfont={'color': 'white'}
+    )
+
+    fig5.update_layout(
+        yaxis={
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white'},
+            'titlefont': {'color': 'white'},
+            'title': ''
+        },
+        xaxis={
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white'},
+            'titlefont': {'color': 'white'},
+            'showticklabels': False,
+            'title': ''
+        },
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        legend={'font': {'color': 'white'}},
+        title_font={'color': 'white'}
+    )
+
+
+    ## fig6: Lightning Network Stats
+    btc_1m_mempool_lightning.sort_values(by='added', inplace=True)
+
+    trace1 = go.Scatter(x=btc_1m_mempool_lightning['added'],
+                        y=btc_1m_mempool_lightning['total_capacity'],
+                        mode='lines',
+                        name='Total Capacity',
+                        yaxis='y1',
+                        text=['Total Capacity: {:.0f}'.format(val) \
+                              for val in btc_1m_mempool_lightning['total_capacity']],
+                        hoverinfo='text+y',
+                        hovertemplate='<b>%{text}</b>')
+
+    trace2 = go.Scatter(x=btc_1m_mempool_lightning['added'],
+                        y=btc_1m_mempool_lightning['channel_count'],
+                        mode='lines',
+                        name='Channel Count',
+                        yaxis='y2',
+                        text=['Channel Count: {:.0f}'.format(val) \
+                              for val in btc_1m_mempool_lightning['channel_count']],
+                        hoverinfo='text+y',
+                        hovertemplate='<b>%{text}</b>')
+
+    layout_fig6 = go.Layout(
+        title='Mempool Stats - Lightning Network',
+        title_font={'color': 'white'},
+        xaxis={
+            'title': 'Date',
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white', 'size': 10},
+            'titlefont': {'color': 'white'},
+            'showticklabels': False,
+            'title': ''
+        },
+        yaxis={
+            'title': 'Total Capacity',
+            'side': 'left',
+            'showgrid': False,
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white', 'size': 8},
+            'titlefont': {'color': 'white'}
+        },
+        yaxis2={
+            'title': 'Channel Count',
+            'side': 'right',
+            'overlaying': 'y',
+            'showgrid': False,
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white', 'size': 8},
+            'titlefont': {'color': 'white'}
+        },
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        legend={'font': {'color': 'white'}}
+    )
+
+    fig6 = go.Figure(data=[trace1, trace2], layout=layout_fig6)
+
+    ## fig7: Bitcoin Fee Breakdown from Dune Analytics
+    btc_1m_dune_fee_breakdown.sort_values(by='Day', inplace=True)
+
+    fig7 = go.Figure(data=[
+        go.Bar(name='BRC20 Tx', x=btc_1m_dune_fee_breakdown['Day'], y=btc_1m_dune_fee_breakdown['BRC20_Tx'], hovertemplate='BRC20 Tx: %{y}<extra></extra>'),
+        go.Bar(name='Non-BRC20 Tx', x=btc_1m_dune_fee_breakdown['Day'], y=btc_1m_dune_fee_breakdown['non_BRC20_Ordi_Tx'], hovertemplate='Non-BRC20 Ordinals Tx: %{y}<extra></extra>'),
+        go.Bar(name='Non-Ordinal Tx', x=btc_1m_dune_fee_breakdown['Day'], y=btc_1m_dune_fee_breakdown['non_Odrdinal_Tx'], hovertemplate='Non-Ordinals Tx: %{y}<extra></extra>')
+    ])
+
+    fig7.update_layout(
+        barmode='stack',
+        title='Bitcoin Fee Breakdown',
+        title_font={'color': 'white'},
+        xaxis={
+            'title': 'Date',
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white', 'size': 10},
+            'titlefont': {'color': 'white'},
+            'showticklabels': False,
+            'title': ''
+        },
+        yaxis={
+            'title': 'Transaction Count',
+            'side': 'left',
+            'showgrid': False,
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white', 'size': 8},
+            'titlefont': {'color': 'white'}
+        },
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        legend={'font': {'color': 'white'}}
+    )
+
+    return [fig1, fig2, fig3, fig4, fig5, fig6, fig7]
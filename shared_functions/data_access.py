@@ -0,0 +1,88 @@
+"""
+This module contains the data access of the app and the AI analysis: one pooled MongoDB client per process, and the typed fetch helpers that all pages go through.
+"""
+
+import os
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from etl_functions.mongo_loader import MONGO_DB_NAME, shared_client
+from etl_functions.timeseries_store import read_month_view, read_series_versions
+
+## Connect to environment variables
+load_dotenv()
+mongodb_uri = os.getenv('MONGODB_URI')
+
+# Column types of the month views that the figures and the AI analysis read. BSON keeps ints and floats apart
+# per value, so a price column could come back as object or int64 depending on the month; numeric values are
+# floats so that a missing value stays NaN.
+DATETIME = 'datetime64[ns]'
+DATETIME_UTC = 'datetime64[ns, UTC]'
+FRAME_DTYPES = {
+    'btc_1m_w_external': {'time': DATETIME, 'target_block': 'int64', 'wbtc_price_in_usd': 'float64',
+                          'paxg_price_in_usd': 'float64', 'btc_price_normalized': 'float64',
+                          'gold_price_normalized': 'float64'},
+    'btc_1m_mempool_fee': {'time': DATETIME, 'timestamp': 'int64', 'avgHeight': 'float64', 'avgFee_50': 'float64'},
+    'btc_1m_mempool_price': {'date': DATETIME, 'time': 'int64', 'USD': 'float64'},
+    'btc_1m_mempool_hashrate': {'time': DATETIME, 'avgHashrate_EHs': 'float64'},
+    'btc_mempool_mining_pools': {'blockCount': 'int64'},
+    'btc_1m_mempool_lightning': {'added': DATETIME_UTC, 'channel_count': 'float64', 'total_capacity': 'float64'},
+    'btc_1m_dune_fee_breakdown': {'Day': DATETIME, 'BRC20_Tx': 'float64', 'non_BRC20_Ordi_Tx': 'float64',
+                                  'non_Odrdinal_Tx': 'float64'},
+    'btc_1m_mempool_fee_daily': {'date': DATETIME, 'avgFee_50': 'float64'},
+    'btc_mempool_mining_pools_top': {'blockCount': 'int64', 'percentage': 'float64'},
+    'btc_1m_hashrate_vs_price': {'date': DATETIME, 'avgHashrate_EHs': 'float64', 'USD': 'float64'},
+    'eth_1m_w_external': {'time': DATETIME, 'target_block': 'int64', 'wbtc_price_in_usd': 'float64',
+                          'eth_price_in_usd': 'float64', 'btc_price_normalized': 'float64',
+                          'eth_price_normalized': 'float64'},
+    'eth_1m_gas_fee': {'timestamp': DATETIME, 'gasPrice_close': 'float64', 'samples': 'float64'},
+    'eth_1m_uniswap_data': {'date': DATETIME, 'feesUSD': 'float64', 'tvlUSD': 'float64', 'volumeUSD': 'float64',
+                            'txCount': 'int64'},
+    'eth_1m_tvl': {'row_index': 'int64', 'day_num': 'int64', 'timestamp': DATETIME, 'tvl_aave': 'float64',
+                   'tvl_lido': 'float64', 'tvl_makerdao': 'float64'},
+    'eth_1m_l2_bridge_all': {'day': DATETIME, 'users_arbitrum': 'float64', 'users_base': 'float64',
+                             'users_optimism': 'float64', 'users_starknet': 'float64', 'users_zksync': 'float64'},
+}
+
+
+def database():
+    """The report database over the process-wide client (pool size, timeouts and compression are set in mongo_loader)
+
+    The client is created on first use rather than at import, so that every Gunicorn worker opens its own pool
+    after the fork, and a page that is never opened never connects.
+    """
+    return shared_client(mongodb_uri)[MONGO_DB_NAME]
+
+
+def typed_frame(frame, df):
+    """Casts the known columns of a month view to their FRAME_DTYPES type
+
+    A month without data has the typed columns but no rows, so the figures still find the columns they plot.
+    """
+    dtypes = FRAME_DTYPES.get(frame, {})
+    if df.empty:
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in dtypes.items()})
+
+    df = df.copy()
+    for column, dtype in dtypes.items():
+        if column not in df:
+            continue
+        if dtype.startswith('datetime64'):
+            df[column] = pd.to_datetime(df[column], utc=dtype == DATETIME_UTC).astype(dtype)
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def fetch_month_view(frame, month_year, db=None):
+    """Returns a metric's month as a typed dataframe, with the same columns as the transformed dataframe
+
+    The query projects out '_id' and the content hash, which only the ETL uses.
+    """
+    return typed_frame(frame, read_month_view(db if db is not None else database(), frame, month_year))
+
+
+def fetch_series_versions(collections=None, db=None):
+    """Returns {collection: {month_year: version}} of the metric collections, which the ETL bumps when a month's data changes"""
+    return read_series_versions(db if db is not None else database(), collections)
@@ -0,0 +1,257 @@
+"""
+This module contains the figures of the Ethereum monthly report, built from the month's dataframes.
+"""
+
+from plotly.subplots import make_subplots
+import plotly.express as px
+import plotly.graph_objects as go
+
+
+def build_eth_figures(eth_1m_w_external, eth_1m_gas_fee, eth_1m_uniswap_data, eth_1m_tvl, eth_1m_l2_bridge_all):
+    """Returns the report's figures in section order: fig1, fig2, fig3, fig4, fig5"""
+    ## fig1: Ethereum's Price Action Chart vs. Bitcoin (Normalized)
+    eth_1m_w_external.sort_values(by='target_block', inplace=True)
+    fig1_trace1 = go.Scatter(
+        x=eth_1m_w_external['target_block'], 
+        y=eth_1m_w_external['btc_price_normalized'], 
+        mode='lines', 
+        name='BTC', 
+        line={'color': 'green'},
+        hovertemplate='BTC Normalized: %{y}<extra></extra>'
+    )
+
+    fig1_trace2 = go.Scatter(
+        x=eth_1m_w_external['target_block'], 
+        y=eth_1m_w_external['eth_price_normalized'], 
+        mode='lines', 
+        name='ETH', 
+        line={'color': 'blue'},
+        hovertemplate='ETH Normalized: %{y}<extra></extra>'
+    )
+
+    index_values = list(range(1, len(eth_1m_w_external['target_block'])+1))
+
+    fig1_layout = go.Layout(
+        height=400,
+        xaxis=dict(
+            tickvals=eth_1m_w_external['target_block'],
+            ticktext=index_values,
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            showticklabels=False
+        ),
+        title='ETH vs. BTC - Normalized',
+        titlefont={'color': 'white'},
+        title_x=0.05,
+        yaxis=dict(
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            titlefont={'color': 'white'},
+            title=''
+        ),
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        legend={'font': {'color': 'white'}}
+    )
+
+    fig1 = go.Figure(data=[fig1_trace1, fig1_trace2], layout=fig1_layout)
+
+    ## fig2: Ethereum Gas Fees (GWEI)
+    eth_1m_gas_fee.sort_values(by='timestamp', inplace=True)
+
+    fig2 = px.bar(eth_1m_gas_fee, x="timestamp", y="gasPrice_close", \
+                  title="ETH Gas Fees (GWEI)", \
+                  color_discrete_sequence=['#a2823c'])
+
+    fig2.update_traces(hovertemplate="<b>Gas Price (Close):</b> %{y} GWEI")
+
+    fig2.update_layout(
+        yaxis={
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white'},
+            'titlefont': {'color': 'white'},
+            'title': ''
+        },
+        xaxis={
+            'gridcolor': '#636363',
+            'zerolinecolor': '#636363',
+            'tickfont': {'color': 'white'},
+            'titlefont': {'color': 'white'},
+            'showticklabels': False,
+            'title': ''
+        },
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        legend={'font': {'color': 'white'}},
+        title_font={'color': 'white'}
+    )
+
+    ## fig3: Ethereum Uniswap Data
+    eth_1m_uniswap_data.sort_values(by='date', inplace=True)
+
+    fig3 = make_subplots(rows=2, cols=1)
+
+    fig3.add_trace(
+        go.Scatter(
+            x=eth_1m_uniswap_data['date'], 
+            y=eth_1m_uniswap_data['tvlUSD'], 
+            mode='lines', 
+            name='tvlUSD', 
+            line={'color': 'green'},
+            hovertemplate='tvlUSD: %{y}<extra></extra>'
+        ),
+        row=1, col=1
+    )
+    fig3.add_trace(
+        go.Scatter(
+            x=eth_1m_uniswap_data['date'], 
+            y=eth_1m_uniswap_data['volumeUSD'], 
+            mode='lines', 
+            name='volumeUSD', 
+            line={'color': 'red'},
+            hovertemplate='volumeUSD: %{y}<extra></extra>'
+        ),
+        row=2, col=1
+    )
+
+    fig3.update_layout(
+        autosize=True,
+        height=600,
+        xaxis=dict(
+            tickvals=eth_1m_uniswap_data['date'],
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            showticklabels=False
+        ),
+        xaxis2=dict(
+            tickvals=eth_1m_uniswap_data['date'],
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            showticklabels=False
+        ),
+        yaxis=dict(
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            titlefont={'color': 'white'},
+            title=''
+        ),
+        yaxis2=dict(
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            titlefont={'color': 'white'},
+            title=''
+        ),
+        title='Ethereum Uniswap Data',
+        titlefont={'color': 'white'},
+        title_x=0.05,
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        legend={'font': {'color': 'white'}},
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+
+
+    ## fig4: Ethereum Top DeFi TVL Historical Data Comparison (Minus Uniswap)
+    eth_1m_tvl.sort_values(by='row_index', inplace=True)
+
+    fig4_trace1 = go.Scatter(
+        x=eth_1m_tvl['row_index'], 
+        y=eth_1m_tvl['tvl_aave'], 
+        mode='lines', 
+        name='Aave', 
+        line={'color': 'green'},
+        hovertemplate='Aave TVL: %{y}<extra></extra>'
+    )
+
+    fig4_trace2 = go.Scatter(
+        x=eth_1m_tvl['row_index'], 
+        y=eth_1m_tvl['tvl_lido'], 
+        mode='lines', 
+        name='Lido', 
+        line={'color': 'blue'},
+        hovertemplate='Lido TVL: %{y}<extra></extra>'
+    )
+
+    fig4_trace3 = go.Scatter(
+        x=eth_1m_tvl['row_index'], 
+        y=eth_1m_tvl['tvl_makerdao'], 
+        mode='lines', 
+        name='MakerDao', 
+        line={'color': 'yellow'},
+        hovertemplate='MakerDao TVL: %{y}<extra></extra>'
+    )
+
+    index_values = list(range(1, len(eth_1m_tvl['row_index'])))
+
+    fig4_layout = go.Layout(
+        height=400,
+        xaxis=dict(
+            tickvals=eth_1m_tvl['row_index'],
+            ticktext=index_values,
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            autorange='reversed',
+            showticklabels=False
+        ),
+        title='ETH TVL Comparison',
+        titlefont={'color': 'white'},
+        title_x=0.05,
+        yaxis=dict(
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            titlefont={'color': 'white'},
+            title=''
+        ),
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        legend={'font': {'color': 'white'}}
+    )
+
+    fig4 = go.Figure(data=[fig4_trace1, fig4_trace2, fig4_trace3], layout=fig4_layout)
+
+
+    ## fig5: Ethereum L2 Bridge Data
+    eth_1m_l2_bridge_all.sort_values(by='day', inplace=True)
+
+    fig5 = go.Figure(data=[
+        go.Bar(name='users_arbitrum', x=eth_1m_l2_bridge_all['day'], y=eth_1m_l2_bridge_all['users_arbitrum'], hovertemplate='users_arbitrum: %{y}<extra></extra>'),
+        go.Bar(name='users_base', x=eth_1m_l2_bridge_all['day'], y=eth_1m_l2_bridge_all['users_base'], hovertemplate='users_base: %{y}<extra></extra>'),
+        go.Bar(name='users_optimism', x=eth_1m_l2_bridge_all['day'], y=eth_1m_l2_bridge_all['users_optimism'], hovertemplate='users_optimism: %{y}<extra></extra>'),
+        go.Bar(name='users_starknet', x=eth_1m_l2_bridge_all['day'], y=eth_1m_l2_bridge_all['users_starknet'], hovertemplate='users_starknet: %{y}<extra></extra>'),
+        go.Bar(name='users_zksync', x=eth_1m_l2_bridge_all['day'], y=eth_1m_l2_bridge_all['users_zksync'], hovertemplate='users_zksync: %{y}<extra></extra>')
+    ])
+
+    fig5.update_layout(barmode='stack')
+
+    fig5.update_layout(
+        yaxis=dict(
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            titlefont={'color': 'white'},
+            title=''
+        ),
+        xaxis=dict(
+            gridcolor='#636363',
+            zerolinecolor='#636363',
+            tickfont={'color': 'white'},
+            titlefont={'color': 'white'},
+            showticklabels=False,
+            title=''
+        ),
+        plot_bgcolor='#171713',
+        paper_bgcolor='#171713',
+        legend={'font': {'color': 'white'}},
+        title_font={'color': 'white'}
+    )
+
+    return [fig1, fig2, fig3, fig4, fig5]
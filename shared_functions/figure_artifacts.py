@@ -0,0 +1,128 @@
+"""
+This module contains the figure artifacts: the report figures rendered once at ETL time to compressed JSON files, which the app reads instead of rebuilding them.
+"""
+
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+import zstandard
+from plotly.io.json import from_json_plotly, to_json_plotly
+
+from shared_functions.btc_figures import build_btc_figures
+from shared_functions.eth_figures import build_eth_figures
+from etl_functions.timeseries_store import METRIC_SERIES, read_series_versions
+from shared_functions.data_access import fetch_month_view
+
+# Kept next to the AI analysis results, since the app is deployed with both
+FIGURES_DIR = os.path.join('pages', 'figures')
+# Bumped whenever btc_figures.py or eth_figures.py change, so that the app ignores artifacts rendered by older code
+FIGURE_FORMAT_VERSION = 2
+ZSTD_LEVEL = 10
+
+# The dataframes of each report, in the order of the figure function's arguments
+REPORT_FIGURES = {
+    'btc': (['btc_1m_w_external', 'btc_1m_mempool_fee_daily', 'btc_1m_hashrate_vs_price', 'btc_mempool_mining_pools_top',
+             'btc_1m_mempool_lightning', 'btc_1m_dune_fee_breakdown'], build_btc_figures),
+    'eth': (['eth_1m_w_external', 'eth_1m_gas_fee', 'eth_1m_uniswap_data', 'eth_1m_tvl', 'eth_1m_l2_bridge_all'],
+            build_eth_figures),
+}
+
+
+def artifact_path(chain, month_year, figures_dir=FIGURES_DIR):
+    return os.path.join(figures_dir, f"{chain}_{month_year}.v{FIGURE_FORMAT_VERSION}.json.zst")
+
+
+def report_versions(chain, month_year, versions):
+    """The month's versions of a report's collections, out of {collection: {month_year: version}}
+
+    A collection that was never written in that month has none, so that writes to other months don't change the result.
+    """
+    frame_names, _ = REPORT_FIGURES[chain]
+    collections = {METRIC_SERIES[name].collection for name in frame_names}
+    return {collection: months[month_year] for collection, months in versions.items()
+            if collection in collections and month_year in months}
+
+
+def build_figures(chain, frames):
+    """Builds a report's figures from its dataframes (a dict of frame name -> dataframe)"""
+    frame_names, build = REPORT_FIGURES[chain]
+    return build(*[frames[name] for name in frame_names])
+
+
+def write_figures(chain, month_year, figures, data_versions=None, figures_dir=FIGURES_DIR):
+    """Writes the figure specs with the collection versions they were built from, and returns the artifact path"""
+    artifact = {
+        'chain': chain,
+        'month_year': month_year,
+        'format_version': FIGURE_FORMAT_VERSION,
+        'data_versions': data_versions or {},
+        'built_at': datetime.now(timezone.utc).isoformat(),
+        'figures': [figure.to_plotly_json() for figure in figures],
+    }
+    # The plotly encoder handles the numpy arrays and timestamps of the traces
+    content = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(to_json_plotly(artifact).encode('utf-8'))
+
+    path = artifact_path(chain, month_year, figures_dir)
+    os.makedirs(figures_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_artifact(chain, month_year, figures_dir=FIGURES_DIR):
+    path = artifact_path(chain, month_year, figures_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return from_json_plotly(zstandard.ZstdDecompressor().decompress(f.read()))
+
+
+def read_figures(chain, month_year, versions, figures_dir=FIGURES_DIR):
+    """Returns the figure specs of a report (dicts that dcc.Graph renders as they are), or None without an artifact
+
+    'versions' are the current {collection: {month_year: version}}. An artifact built from an older version of the
+    month's data is stale, and None is returned as well, so that the figures are built from the current data
+    until the month is published again.
+    """
+    artifact = read_artifact(chain, month_year, figures_dir)
+    if artifact is None or artifact['data_versions'] != report_versions(chain, month_year, versions):
+        return None
+    return artifact['figures']
+
+
+def published_months(chain, figures_dir=FIGURES_DIR):
+    """The months of a report that have an artifact in the current format"""
+    pattern = re.compile(rf"{chain}_(?P<month_year>[a-z]+_\d{{4}})\.v{FIGURE_FORMAT_VERSION}\.json\.zst")
+    if not os.path.isdir(figures_dir):
+        return []
+    return sorted(match['month_year'] for match in map(pattern.fullmatch, os.listdir(figures_dir)) if match)
+
+
+def publish_figures(chain, month_year, db, figures_dir=FIGURES_DIR):
+    """Publish step of the ETL: renders a report month from its MongoDB view, the same data the app would read"""
+    frame_names, _ = REPORT_FIGURES[chain]
+    collections = [METRIC_SERIES[name].collection for name in frame_names]
+    # Read before the data, so that a write in between makes the artifact look stale rather than fresh
+    data_versions = report_versions(chain, month_year, read_series_versions(db, collections))
+
+    frames = {name: fetch_month_view(name, month_year, db) for name in frame_names}
+    path = write_figures(chain, month_year, build_figures(chain, frames), data_versions, figures_dir)
+    print(f"Published the {chain.upper()} {month_year} figures to {path}")
+    return path
+
+
+def publish_report_figures(chain, months, db, figures_dir=FIGURES_DIR):
+    """Publishes the given months, and re-publishes every other artifact of the report that has gone stale
+
+    A load only changes the versions of the months it wrote rows in, so the other artifacts stay current;
+    a month without an artifact is built from its current data by the app, so only the existing artifacts can be stale.
+    """
+    frame_names, _ = REPORT_FIGURES[chain]
+    versions = read_series_versions(db, [METRIC_SERIES[name].collection for name in frame_names])
+    stale = [month_year for month_year in published_months(chain, figures_dir)
+             if month_year not in months and read_figures(chain, month_year, versions, figures_dir) is None]
+    return [publish_figures(chain, month_year, db, figures_dir) for month_year in sorted(set(months)) + stale]
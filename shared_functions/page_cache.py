@@ -0,0 +1,69 @@
+"""
+This module contains the process-wide cache of the report dataframes, with size-bounded LRU eviction and version-based invalidation.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from etl_functions.timeseries_store import METRIC_SERIES
+from shared_functions.data_access import fetch_month_view, fetch_series_versions
+
+DEFAULT_CACHE_MB = 256
+# How long the collection versions are trusted before they are read again from MongoDB
+VERSION_CHECK_SECONDS = 30
+
+
+class FrameCache:
+    """Month views of the metric collections, read from MongoDB on first use and kept until their collection changes
+
+    Every entry is tagged with the version of its collection's month, which the ETL bumps whenever a run changes
+    rows in that month, so a stale entry is re-read on its next use. The least recently used entries are evicted once the cached
+    dataframes exceed the size limit (PAGE_CACHE_MB).
+    """
+
+    def __init__(self, max_bytes=None, check_interval=VERSION_CHECK_SECONDS):
+        self.max_bytes = max_bytes or int(os.environ.get('PAGE_CACHE_MB') or DEFAULT_CACHE_MB) * 1024 * 1024
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.size = 0
+        self.versions = {}
+        self.versions_checked = None
+
+    def series_versions(self):
+        """Version of every collection, read in one query at most once per check interval"""
+        now = time.monotonic()
+        with self.lock:
+            if self.versions_checked is not None and now - self.versions_checked < self.check_interval:
+                return self.versions
+        versions = fetch_series_versions()
+        with self.lock:
+            self.versions = versions
+            self.versions_checked = now
+        return versions
+
+    def get(self, frame, month_year):
+        """Returns a copy of the month view, since the figure functions sort and add columns in place"""
+        key = (frame, month_year)
+        version = self.series_versions().get(METRIC_SERIES[frame].collection, {}).get(month_year, 0)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                return entry[1].copy()
+
+        df = fetch_month_view(frame, month_year)
+        size = int(df.memory_usage(deep=True).sum())
+        with self.lock:
+            stale = self.entries.pop(key, None)
+            if stale is not None:
+                self.size -= stale[2]
+            if size <= self.max_bytes:
+                self.entries[key] = (version, df, size)
+                self.size += size
+                while self.size > self.max_bytes:
+                    _, (_, _, evicted_size) = self.entries.popitem(last=False)
+                    self.size -= evicted_size
+        return df.copy()
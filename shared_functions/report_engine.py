@@ -0,0 +1,94 @@
+"""
+This module contains the report engine, which builds the monthly BTC and ETH report layouts on demand from the month in the URL.
+"""
+
+import os
+import json
+
+from dash import html
+
+import shared_functions.main_pane as main_pane
+from shared_functions.figure_artifacts import REPORT_FIGURES, build_figures, read_figures
+from shared_functions.page_cache import FrameCache
+from shared_functions.utils import AI_TEXT_DIR, available_months, month_label
+
+# The month views are shared by every page (the homepage reuses the latest BTC report's data),
+# and read over the app's one pooled client (shared_functions/data_access.py)
+frame_cache = FrameCache()
+
+
+class Report:
+    """A report: its heading, and a (title, AI analysis key) per figure"""
+
+    def __init__(self, heading, sections):
+        self.heading = heading
+        self.sections = sections
+
+
+REPORTS = {
+    'btc': Report(
+        'Bitcoin (BTC)',
+        [
+            ("Bitcoin Price Action vs. Gold", 'btc_1m_w_external'),
+            ("Correlation Analysis: Bitcoin vs. Gold", 'btc_1m_w_external_correlation'),
+            ("Bitcoin Price and Hashrate", 'btc_1m_mempool_hashrate'),
+            ("Bitcoin Block Analysis - Median Tx Fee", 'btc_1m_mempool_fee'),
+            ("Bitcoin Mining Pools", 'btc_mempool_mining_pools'),
+            ("Lightning Network (LN) Data", 'btc_1m_mempool_lightning'),
+            ("Bitcoin Fee Breakdown", 'btc_1m_dune_fee_breakdown'),
+        ],
+    ),
+    'eth': Report(
+        'Ethereum (ETH)',
+        [
+            ("Ethereum Price Action vs. Bitcoin", 'eth_1m_w_external'),
+            ("Ethereum Gas Fees (GWEI)", 'eth_1m_gas_fee'),
+            ("Ethereum Uniswap Data", 'eth_1m_uniswap_data'),
+            ("Ethereum TVL Comparison (without Uniswap)", 'eth_1m_tvl'),
+            ("Ethereum L2 Users", 'eth_1m_l2_bridge_all'),
+        ],
+    ),
+}
+
+
+def report_title(chain, month_year=None):
+    if month_year not in available_months():
+        return f"{chain.upper()} Report"
+    return f"{chain.upper()} {month_label(month_year).upper()} Report"
+
+
+def load_analysis(month_year):
+    with open(os.path.join(AI_TEXT_DIR, f"analysis_result_{month_year}.json"), 'r') as json_file:
+        return json.load(json_file)
+
+
+def page_frame(content):
+    return html.Div([
+        html.Div([content], className='main'),
+        html.Div([
+            html.Img(src="/assets/icons/ellipse.svg", alt=""),
+        ], className="ellipse")
+    ], id='main-container')
+
+
+def report_layout(chain, month_year):
+    """Builds the whole report of a month: its figures and AI analysis texts"""
+    if month_year not in available_months():
+        return page_frame(html.H1(f"There is no {chain.upper()} report for this month.", className="title-text"))
+
+    report = REPORTS[chain]
+    # The figures published by the ETL are a file read; a month without an up-to-date artifact is built from its data
+    figures = read_figures(chain, month_year, frame_cache.series_versions())
+    if figures is None:
+        frame_names, _ = REPORT_FIGURES[chain]
+        figures = build_figures(chain, {name: frame_cache.get(name, month_year) for name in frame_names})
+    analysis = load_analysis(month_year)
+
+    key_insights = html.Div([
+        html.H1(f"{report.heading} {month_label(month_year).upper()} Report", className="title-text", id="title_text_1"),
+    ])
+    return page_frame(main_pane.generate(
+        None,
+        key_insights,
+        *[(figure, title, analysis[key]) for figure, (title, key) in zip(figures, report.sections)]
+    ))
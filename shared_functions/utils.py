@@ -1,64 +1,59 @@
 # Import Libraries
 from dash import html
-import dash
 import dash_bootstrap_components as dbc
 
 from datetime import datetime
+import os
 import re
 
-# Function to handle the title format
-def format_title(words):
-    if words == "Home":
-        return words
+# Folder of the AI analysis results, one json file per reported month
+AI_TEXT_DIR = os.path.join('pages', 'ai_text_result')
 
-    word = words.split()
-    if len(word) > 0:
-        word[0] = word[0].upper()
-        word[1] = word[1].title()
-    return " ".join(word)
+# Function to list the reported months (e.g. 'june_2024'), latest first
+def available_months():
+    months = []
+    for filename in os.listdir(AI_TEXT_DIR):
+        match = re.fullmatch(r'analysis_result_([a-z]+_\d{4})\.json', filename)
+        if match:
+            months.append(match.group(1))
+    return sorted(months, key=lambda month: datetime.strptime(month, '%B_%Y'), reverse=True)
 
-# Function to extract the date
-def extract_date(title):
-    match = re.search(r'(\w+ \d{4})', title)
-    if match:
-        return datetime.strptime(match.group(1), '%B %Y')
-    return datetime.min
+# Functions to convert a month between its URL form ('june-2024'), its key ('june_2024') and its label ('June 2024')
+def month_slug(month_year):
+    return month_year.replace('_', '-')
+
+def month_key(slug):
+    return slug.replace('-', '_').lower() if slug else None
+
+def month_label(month_year):
+    return month_year.replace('_', ' ').title()
 
 # Function for the header
 def header():
-    btc_pages = sorted(
-        [page for page in dash.page_registry.values() if 'BTC' in page['title']],
-        key=lambda page: extract_date(page['title']),
-        reverse=True
-    )
-    eth_pages = sorted(
-        [page for page in dash.page_registry.values() if 'ETH' in page['title']],
-        key=lambda page: extract_date(page['title']),
-        reverse=True
-    )
+    months = available_months()
 
     return html.Div([
         html.Div([
             html.A(
-                html.Img(src="assets/icons/icon-deftify.svg", alt="Deftify"),
+                html.Img(src="/assets/icons/icon-deftify.svg", alt="Deftify"),
                 href="/"
             ),
             html.Div([
                 html.Div([
                     html.A(
-                        html.Img(src="assets/icons/icon-twitter.svg", alt="Deftify"),
+                        html.Img(src="/assets/icons/icon-twitter.svg", alt="Deftify"),
                         href="https://x.com/",
                         className="socials_link",
                         target='_blank'
                     ),
                     html.A(
-                        html.Img(src="assets/icons/icon-medium.svg", alt="Deftify"),
+                        html.Img(src="/assets/icons/icon-medium.svg", alt="Deftify"),
                         href="https://medium.com/",
                         className="socials_link",
                         target='_blank'
                     ),
                     html.A(
-                        html.Img(src="assets/icons/icon-telegram.svg", alt="Deftify"),
+                        html.Img(src="/assets/icons/icon-telegram.svg", alt="Deftify"),
                         href="https://telegram.org/",
                         className="socials_link",
                         target='_blank'
@@ -77,30 +72,30 @@ def header():
                 dbc.DropdownMenu(
                     label=html.Div([
                         html.Div([
-                            html.Img(src="assets/icons/btc.png", alt="btc"),
+                            html.Img(src="/assets/icons/btc.png", alt="btc"),
                         ], className="link_img"),
                         html.H4('Bitcoin')
                     ], className="header_small_row"),
                     children=[
                         dbc.DropdownMenuItem(
-                            format_title(page['name'].replace('BTC ', '')),
-                            href=page["relative_path"],
-                            ) for page in btc_pages
+                            month_label(month),
+                            href=f"/btc/{month_slug(month)}",
+                            ) for month in months
                     ],
                     className="page_link",
                 ),
                 dbc.DropdownMenu(
                     label=html.Div([
                         html.Div([
-                            html.Img(src="assets/icons/eth.png", alt="btc"),
+                            html.Img(src="/assets/icons/eth.png", alt="btc"),
                         ], className="link_img"),
                         html.H4('Ethereum')
                     ], className="header_small_row"),
                     children=[
                         dbc.DropdownMenuItem(
-                            format_title(page['name'].replace('ETH ', '')),
-                            href=page["relative_path"],
-                            ) for page in eth_pages
+                            month_label(month),
+                            href=f"/eth/{month_slug(month)}",
+                            ) for month in months
                     ],
                     className="page_link",
                 ),
@@ -0,0 +1,197 @@
+"""
+An in-memory stand-in for the few pymongo calls the loader, the time-series store and the app make.
+Documents go through a BSON round trip, so that dates come back naive and truncated to milliseconds, as from MongoDB.
+"""
+
+import copy
+
+import bson
+from bson.raw_bson import RawBSONDocument
+
+
+def _decode(document):
+    if isinstance(document, RawBSONDocument):
+        return bson.decode(document.raw)
+    return bson.decode(bson.encode(document))
+
+
+def _get(document, path):
+    for part in path.split('.'):
+        if not isinstance(document, dict) or part not in document:
+            return None
+        document = document[part]
+    return document
+
+
+def _set(document, path, value):
+    *parents, last = path.split('.')
+    for part in parents:
+        document = document.setdefault(part, {})
+    document[last] = value
+
+
+OPERATORS = {
+    '$in': lambda value, arg: value in arg,
+    '$gte': lambda value, arg: value is not None and value >= arg,
+    '$gt': lambda value, arg: value is not None and value > arg,
+    '$lte': lambda value, arg: value is not None and value <= arg,
+    '$lt': lambda value, arg: value is not None and value < arg,
+}
+
+
+def matches(document, query):
+    for path, condition in (query or {}).items():
+        value = _get(document, path)
+        if isinstance(condition, dict) and condition and all(key.startswith('$') for key in condition):
+            if not all(OPERATORS[op](value, arg) for op, arg in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def project(document, projection):
+    document = copy.deepcopy(document)
+    if not projection:
+        return document
+    included = [field for field, flag in projection.items() if flag and field != '_id']
+    if included:
+        result = {field: document[field] for field in included if field in document}
+        if projection.get('_id', 1) and '_id' in document:
+            result['_id'] = document['_id']
+        return result
+    for field, flag in projection.items():
+        if not flag:
+            document.pop(field, None)
+    return document
+
+
+class Result:
+    def __init__(self, **counts):
+        self.__dict__.update(counts)
+
+
+class Cursor(list):
+    def sort(self, key, direction=1):
+        return Cursor(sorted(self, key=lambda document: _get(document, key), reverse=direction < 0))
+
+
+class FakeCollection:
+
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.documents = []
+        self.unique_keys = []
+        self.next_id = 0
+
+    def _insert(self, document):
+        document = _decode(document)
+        for keys in self.unique_keys:
+            if any(all(_get(stored, key) == _get(document, key) for key in keys) for stored in self.documents):
+                raise ValueError(f"Duplicate key on {keys}")
+        if '_id' not in document:
+            self.next_id += 1
+            document['_id'] = self.next_id
+        self.documents.append(document)
+
+    def create_index(self, keys, unique=False, name=None):
+        self.database.collections[self.name] = self
+        if unique and [key for key, _ in keys] not in self.unique_keys:
+            self.unique_keys.append([key for key, _ in keys])
+        return name
+
+    def find(self, query=None, projection=None):
+        return Cursor(project(document, projection) for document in self.documents if matches(document, query))
+
+    def count_documents(self, query):
+        return len(self.find(query))
+
+    def insert_many(self, documents, ordered=True):
+        self.database.collections[self.name] = self
+        for document in documents:
+            self._insert(document)
+        return Result(inserted_ids=list(range(len(documents))))
+
+    def bulk_write(self, operations, ordered=True):
+        self.database.collections[self.name] = self
+        counts = {'inserted_count': 0, 'upserted_count': 0, 'matched_count': 0, 'modified_count': 0}
+        for applied, operation in enumerate(operations):
+            if self.database.fail_after is not None and applied >= self.database.fail_after:
+                raise ConnectionError("connection lost in the middle of a bulk write")
+            replacement = _decode(operation._doc)
+            stored = next((document for document in self.documents if matches(document, operation._filter)), None)
+            if stored is None:
+                if operation._upsert:
+                    self._insert(replacement)
+                    counts['upserted_count'] += 1
+                continue
+            counts['matched_count'] += 1
+            replacement['_id'] = stored['_id']
+            if replacement != stored:
+                self.documents[self.documents.index(stored)] = replacement
+                counts['modified_count'] += 1
+        return Result(**counts)
+
+    def update_one(self, query, update, upsert=False):
+        stored = next((document for document in self.documents if matches(document, query)), None)
+        if stored is None:
+            if not upsert:
+                return Result(matched_count=0)
+            stored = {key: value for key, value in query.items() if not isinstance(value, dict)}
+            self._insert(stored)
+            stored = self.documents[-1]
+        for path, value in update.get('$set', {}).items():
+            _set(stored, path, value)
+        for path, value in update.get('$inc', {}).items():
+            _set(stored, path, (_get(stored, path) or 0) + value)
+        return Result(matched_count=1)
+
+    def aggregate(self, pipeline):
+        documents = [copy.deepcopy(document) for document in self.documents]
+        for stage in pipeline:
+            if '$match' in stage:
+                documents = [document for document in documents if matches(document, stage['$match'])]
+            elif '$project' in stage:
+                documents = [project(document, stage['$project']) for document in documents]
+            elif '$merge' in stage:
+                self.database[stage['$merge']['into']]._merge(documents, stage['$merge']['on'])
+                documents = []
+        return iter(documents)
+
+    def _merge(self, documents, on):
+        # whenMatched 'replace' (keeping the matched _id) and whenNotMatched 'insert'
+        fail_after = self.database.fail_merge_after
+        if fail_after is not None:
+            documents = documents[:fail_after]
+        self.database.collections[self.name] = self
+        for document in documents:
+            stored = next((stored for stored in self.documents if all(_get(stored, key) == _get(document, key) for key in on)), None)
+            if stored is None:
+                self._insert(document)
+            else:
+                self.documents[self.documents.index(stored)] = {**document, '_id': stored['_id']}
+        if fail_after is not None:
+            raise ConnectionError("connection lost in the middle of a merge")
+
+    def drop(self):
+        self.database.collections.pop(self.name, None)
+        self.documents = []
+        self.unique_keys = []
+
+
+class FakeDatabase:
+
+    def __init__(self):
+        self.collections = {}
+        # Set to make every bulk_write (or every $merge) apply only this many documents, then fail
+        self.fail_after = None
+        self.fail_merge_after = None
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
+
+    def list_collection_names(self):
+        return list(self.collections)
@@ -0,0 +1,42 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from etl_functions.async_fetch import AsyncFetcher, Endpoint
+
+
+class AsyncFetcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stored = {}
+
+    def run_endpoints(self, endpoints, failing_url):
+        async def get_json(url, payload=None, headers=None):
+            if url == failing_url:
+                raise ConnectionError("connection reset")
+            return {'url': url}
+
+        fetcher = AsyncFetcher()
+        with mock.patch.object(fetcher, 'get_json', side_effect=get_json):
+            return asyncio.run(fetcher.run(endpoints, on_result=self.stored.__setitem__))
+
+    def test_a_failed_item_fails_the_whole_fan_out(self):
+        endpoints = [
+            Endpoint('fee_rates', url='https://mempool.space/fee-rates'),
+            Endpoint('days', urls=lambda dependencies: [f'https://mempool.space/day/{day}' for day in range(3)]),
+        ]
+        with self.assertRaises(ValueError):
+            self.run_endpoints(endpoints, failing_url='https://mempool.space/day/1')
+
+        # The endpoints that succeeded are still reported (and checkpointed), but not a partial fan-out
+        self.assertEqual(list(self.stored), ['fee_rates'])
+
+    def test_a_fan_out_returns_every_response_in_order(self):
+        endpoints = [Endpoint('days', urls=lambda dependencies: [f'https://mempool.space/day/{day}' for day in range(3)])]
+        results = self.run_endpoints(endpoints, failing_url=None)
+
+        self.assertEqual(results['days'], [{'url': f'https://mempool.space/day/{day}'} for day in range(3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
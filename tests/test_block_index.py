@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from etl_functions.block_index import BlockIndex
+
+
+class FakeBlockSource:
+    """A chain of 100k blocks with irregular block times, which counts the batched requests it gets"""
+
+    def __init__(self, blocks=100_000):
+        self.timestamps = []
+        timestamp = 1_700_000_000
+        for block in range(blocks):
+            timestamp += 1 + (block * 7919) % 23
+            self.timestamps.append(timestamp)
+        self.requests = 0
+
+    def block_timestamps(self, blocks):
+        self.requests += 1
+        return {block: self.timestamps[block] for block in blocks}
+
+    def first_block_at_or_after(self, timestamp):
+        return next(block for block, ts in enumerate(self.timestamps) if ts >= timestamp)
+
+
+class BlockIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'index.json')
+        self.source = FakeBlockSource()
+        self.latest_block = len(self.source.timestamps) - 1
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def daily_timestamps(self):
+        start = self.source.timestamps[50_000]
+        return [start + day * 86_400 // 8 for day in range(30)] + [self.source.timestamps[60_000]]
+
+    def test_resolve_returns_the_first_block_at_or_after_each_timestamp(self):
+        timestamps = self.daily_timestamps()
+        resolved = BlockIndex(self.path).resolve(timestamps, self.source, self.latest_block)
+        for timestamp in timestamps:
+            self.assertEqual(resolved[timestamp], self.source.first_block_at_or_after(timestamp))
+
+    def test_probes_are_batched_per_round(self):
+        BlockIndex(self.path).resolve(self.daily_timestamps(), self.source, self.latest_block)
+        # One request for the latest block, then a few rounds for all 31 timestamps together
+        self.assertLessEqual(self.source.requests, 10)
+
+    def test_the_saved_index_resolves_known_timestamps_without_requests(self):
+        timestamps = self.daily_timestamps()
+        expected = BlockIndex(self.path).resolve(timestamps, self.source, self.latest_block)
+
+        self.source.requests = 0
+        index = BlockIndex(self.path)
+        self.assertEqual({ts: index.lookup(ts) for ts in timestamps}, expected)
+        self.assertEqual(index.resolve(timestamps, self.source, self.latest_block), expected)
+        self.assertEqual(self.source.requests, 0)
+
+    def test_timestamps_after_the_latest_block_are_rejected(self):
+        with self.assertRaises(ValueError):
+            BlockIndex(self.path).resolve([self.source.timestamps[-1] + 1], self.source, self.latest_block)
+
+
+if __name__ == '__main__':
+    unittest.main()
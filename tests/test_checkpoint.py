@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from etl_functions.checkpoint import CheckpointStore
+from etl_functions.scheduler import Task, run_tasks
+
+
+class CheckpointStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def store(self):
+        return CheckpointStore('run-1', checkpoint_dir=self.tmp.name)
+
+    def test_outputs_survive_a_new_store_for_the_same_run(self):
+        self.store().save('extract', {'rows': [1, 2, 3]})
+        self.assertEqual(self.store().load('extract'), {'rows': [1, 2, 3]})
+
+    def test_a_corrupted_checkpoint_is_not_restored(self):
+        store = self.store()
+        store.save('extract', [1, 2, 3])
+        with open(store._path('extract'), 'ab') as f:
+            f.write(b'garbage')
+        with self.assertRaises(KeyError):
+            self.store().load('extract')
+
+    def test_a_retry_resumes_from_the_first_failed_stage(self):
+        calls = []
+
+        def extract():
+            calls.append('extract')
+            return 10
+
+        def transform(extract):
+            calls.append('transform')
+            if len(calls) < 3:
+                raise ValueError("upstream hiccup")
+            return extract + 1
+
+        tasks = [Task('extract', extract, kind='extract'), Task('transform', transform, inputs=['extract'])]
+        with self.assertRaises(RuntimeError):
+            run_tasks(tasks, checkpoints=self.store())
+
+        results = run_tasks(tasks, checkpoints=self.store())
+        self.assertEqual(results, {'extract': 10, 'transform': 11})
+        # The extract ran once, and only the failed transform was repeated
+        self.assertEqual(calls, ['extract', 'transform', 'transform'])
+
+    def test_a_failed_extract_is_fetched_again_on_retry(self):
+        calls = []
+
+        def extract():
+            calls.append('extract')
+            if len(calls) == 1:
+                raise ValueError("TheGraph timed out")
+            return [1.0, 2.0]
+
+        def transform(extract):
+            return sum(extract)
+
+        tasks = [Task('extract', extract, kind='extract'), Task('transform', transform, inputs=['extract'])]
+        with self.assertRaises(RuntimeError):
+            run_tasks(tasks, checkpoints=self.store())
+
+        self.assertEqual(run_tasks(tasks, checkpoints=self.store()), {'extract': [1.0, 2.0], 'transform': 3.0})
+        self.assertEqual(calls, ['extract', 'extract'])
+
+    def test_a_resumable_stage_keeps_its_partial_outputs(self):
+        fetched = []
+
+        def extract(checkpoint=None):
+            for key in ('a', 'b'):
+                if not checkpoint.has(key):
+                    fetched.append(key)
+                    if key == 'b' and fetched.count('b') == 1:
+                        raise ValueError("endpoint b failed")
+                    checkpoint.put(key, key.upper())
+            return [checkpoint.get('a'), checkpoint.get('b')]
+
+        tasks = [Task('extract', extract, kind='extract', resumable=True)]
+        with self.assertRaises(RuntimeError):
+            run_tasks(tasks, checkpoints=self.store())
+        self.assertEqual(run_tasks(tasks, checkpoints=self.store()), {'extract': ['A', 'B']})
+        self.assertEqual(fetched, ['a', 'b', 'b'])
+
+    def test_clear_removes_the_run(self):
+        store = self.store()
+        store.save('extract', 1)
+        store.clear()
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'run-1')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from etl_functions.mongo_loader import MongoLoader
+from etl_functions.timeseries_store import TimeSeriesStore
+from shared_functions.data_access import fetch_month_view
+from tests.fake_mongo import FakeDatabase
+
+
+class FetchMonthViewTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = FakeDatabase()
+        with mock.patch('etl_functions.mongo_loader.shared_client', return_value={'deftify_research': self.db}):
+            self.store = TimeSeriesStore(MongoLoader('mongodb://fake'))
+
+    def test_a_month_view_has_the_typed_columns(self):
+        times = pd.date_range('2024-06-01', periods=3, freq='D')
+        # Whole-dollar prices, which BSON would otherwise hand back as ints
+        self.store.write('btc_1m_mempool_price', pd.DataFrame({
+            'time': [int(time.timestamp()) for time in times],
+            'USD': [60000, 61000, 62000],
+            'date': times,
+        }))
+
+        df = fetch_month_view('btc_1m_mempool_price', 'june_2024', self.db)
+        self.assertEqual(df['USD'].dtype, 'float64')
+        self.assertEqual(df['time'].dtype, 'int64')
+        self.assertEqual(df['date'].dtype, 'datetime64[ns]')
+        self.assertNotIn('_id', df)
+        self.assertNotIn('content_hash', df)
+
+    def test_a_month_without_data_keeps_the_columns(self):
+        df = fetch_month_view('eth_1m_uniswap_data', 'june_2024', self.db)
+
+        self.assertTrue(df.empty)
+        self.assertEqual(df['tvlUSD'].dtype, 'float64')
+        self.assertEqual(df['date'].dtype, 'datetime64[ns]')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from etl_functions.dune_fetch import DuneResultCache, DuneResultsClient, date_filter
+
+
+class FakeDuneResults:
+    """Serves a query result of 'total' rows in pages, like Dune's results endpoint"""
+
+    def __init__(self, total, execution_id='01H'):
+        self.rows = [{'Day': f"2024-06-{i % 28 + 1:02d}", 'value': i} for i in range(total)]
+        self.execution_id = execution_id
+        self.calls = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls.append(dict(params))
+        offset, limit = params.get('offset', 0), params['limit']
+        page = self.rows[offset:offset + limit]
+        next_offset = offset + limit if offset + limit < len(self.rows) else None
+        response = mock.Mock()
+        response.json.return_value = {
+            'execution_id': self.execution_id,
+            'result': {'rows': page},
+            'next_offset': next_offset,
+        }
+        return response
+
+
+class DuneResultsClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = DuneResultCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def client(self, results):
+        patcher = mock.patch('etl_functions.dune_fetch.http_client', results)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return DuneResultsClient('key', cache=self.cache)
+
+    def test_pages_through_the_whole_result(self):
+        results = FakeDuneResults(2500)
+        rows = self.client(results).get_latest_rows(1, page_size=1000)
+
+        self.assertEqual([row['value'] for row in rows], list(range(2500)))
+        # One metadata call, then three pages at increasing offsets
+        self.assertEqual([call.get('offset') for call in results.calls[1:]], [0, 1000, 2000])
+
+    def test_limit_stops_paging_early(self):
+        results = FakeDuneResults(2500)
+        rows = self.client(results).get_latest_rows(1, limit=1200, page_size=1000)
+
+        self.assertEqual(len(rows), 1200)
+        self.assertEqual(len(results.calls), 3)
+
+    def test_columns_filters_and_sort_are_sent_to_dune(self):
+        results = FakeDuneResults(10)
+        self.client(results).get_latest_rows(1, columns=['Day', 'value'], filters="\"Day\" >= '2024-06-01'",
+                                             sort_by='Day')
+        params = results.calls[-1]
+        self.assertEqual(params['columns'], 'Day,value')
+        self.assertEqual(params['filters'], "\"Day\" >= '2024-06-01'")
+        self.assertEqual(params['sort_by'], 'Day')
+
+
+    def test_runs_on_different_days_of_the_same_execution_hit_the_cache(self):
+        results = FakeDuneResults(1500)
+        client = self.client(results)
+        first = client.get_latest_rows(1, filters=date_filter('Day', datetime(2024, 5, 30, 8)))
+
+        results.calls = []
+        second = client.get_latest_rows(1, filters=date_filter('Day', datetime(2024, 5, 31, 17)))
+        self.assertEqual(second, first)
+        # Only the metadata call, no page download
+        self.assertEqual(len(results.calls), 1)
+
+    def test_a_new_execution_is_downloaded_again(self):
+        results = FakeDuneResults(10)
+        client = self.client(results)
+        client.get_latest_rows(1)
+
+        results.execution_id = '01J'
+        results.calls = []
+        client.get_latest_rows(1)
+        self.assertEqual(len(results.calls), 2)
+
+    def test_date_filter_only_moves_at_the_month_boundary(self):
+        self.assertEqual(date_filter('Day', datetime(2024, 5, 1)), date_filter('Day', datetime(2024, 5, 31, 23)))
+        self.assertEqual(date_filter('Day', datetime(2024, 5, 17)), "\"Day\" >= '2024-05-01'")
+
+
+if __name__ == '__main__':
+    unittest.main()
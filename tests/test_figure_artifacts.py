@@ -0,0 +1,61 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import plotly.graph_objects as go
+
+from shared_functions.figure_artifacts import publish_report_figures, read_figures, write_figures
+
+VERSIONS = {
+    'btc_w_external': {'may_2024': 1, 'june_2024': 3},
+    'btc_fee_daily': {'may_2024': 1, 'june_2024': 7},
+    'eth_gas_fee': {'june_2024': 2},
+}
+# The june_2024 versions of the BTC report's collections
+BTC_VERSIONS = {'btc_w_external': 3, 'btc_fee_daily': 7}
+
+
+class FigureArtifactsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.figures_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.figures_dir)
+        self.figures = [go.Figure(go.Scatter(x=[1, 2, 3], y=[4, 5, 6]))]
+
+    def test_an_artifact_of_the_current_data_is_read(self):
+        write_figures('btc', 'june_2024', self.figures, BTC_VERSIONS, figures_dir=self.figures_dir)
+
+        # Neither the other months nor the other report's collections matter
+        versions = {**VERSIONS, 'btc_fee_daily': {'may_2024': 1, 'june_2024': 7, 'july_2024': 1},
+                    'eth_gas_fee': {'june_2024': 3}}
+        figures = read_figures('btc', 'june_2024', versions, figures_dir=self.figures_dir)
+        self.assertEqual(list(figures[0]['data'][0]['y']), [4, 5, 6])
+
+    def test_an_artifact_of_older_data_is_stale(self):
+        write_figures('btc', 'june_2024', self.figures, BTC_VERSIONS, figures_dir=self.figures_dir)
+
+        versions = {**VERSIONS, 'btc_fee_daily': {'may_2024': 1, 'june_2024': 8}}
+        self.assertIsNone(read_figures('btc', 'june_2024', versions, figures_dir=self.figures_dir))
+        # A collection written in the month for the first time since the artifact was built also makes it stale
+        versions = {**VERSIONS, 'btc_lightning': {'june_2024': 1}}
+        self.assertIsNone(read_figures('btc', 'june_2024', versions, figures_dir=self.figures_dir))
+
+    def test_a_month_without_an_artifact_is_none(self):
+        self.assertIsNone(read_figures('btc', 'june_2024', VERSIONS, figures_dir=self.figures_dir))
+
+    def test_only_the_stale_artifacts_are_published_again(self):
+        may_versions = {'btc_w_external': 1, 'btc_fee_daily': 1}
+        write_figures('btc', 'april_2024', self.figures, {}, figures_dir=self.figures_dir)
+        write_figures('btc', 'may_2024', self.figures, may_versions, figures_dir=self.figures_dir)
+        # The june load changed a few rows of april, but none of may
+        versions = {**VERSIONS, 'btc_fee_daily': {'april_2024': 1, 'may_2024': 1, 'june_2024': 7}}
+
+        with mock.patch('shared_functions.figure_artifacts.read_series_versions', return_value=versions), \
+                mock.patch('shared_functions.figure_artifacts.publish_figures') as publish_figures:
+            publish_report_figures('btc', ['june_2024'], db=None, figures_dir=self.figures_dir)
+
+        self.assertEqual([call.args[1] for call in publish_figures.call_args_list], ['june_2024', 'april_2024'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import time
+import unittest
+from unittest import mock
+
+from etl_functions import http_client
+from etl_functions.http_client import HedgePolicy, LatencyHistogram, hedged_call
+
+URL = 'https://slow.example/api'
+
+
+class LatencyHistogramTest(unittest.TestCase):
+
+    def test_percentile(self):
+        histogram = LatencyHistogram([i / 100 for i in range(1, 101)])
+        self.assertEqual(histogram.percentile(50), 0.51)
+        self.assertEqual(histogram.percentile(95), 0.95)
+        self.assertEqual(histogram.percentile(100), 1.0)
+
+    def test_no_hedge_delay_without_enough_history(self):
+        policy = HedgePolicy(percentile=90, min_samples=20)
+        self.assertIsNone(LatencyHistogram([0.1] * 19).hedge_delay(policy))
+        self.assertEqual(LatencyHistogram([0.1] * 20).hedge_delay(policy), 0.1)
+
+    def test_the_burst_allows_hedges_from_the_first_request(self):
+        policy = HedgePolicy(budget=0.05, burst=2)
+        histogram = LatencyHistogram()
+        histogram.count_request()
+        self.assertEqual([histogram.take_hedge(policy) for _ in range(3)], [True, True, False])
+
+    def test_hedge_tokens_are_refilled_by_the_budget_up_to_the_burst(self):
+        policy = HedgePolicy(budget=0.1, burst=2)
+        histogram = LatencyHistogram()
+        self.assertEqual(sum(histogram.take_hedge(policy) for _ in range(5)), 2)
+
+        for _ in range(10):
+            histogram.count_request()
+        self.assertEqual(sum(histogram.take_hedge(policy) for _ in range(5)), 1)
+
+        for _ in range(1000):
+            histogram.count_request()
+        self.assertEqual(sum(histogram.take_hedge(policy) for _ in range(5)), 2)
+
+
+class HedgedCallTest(unittest.TestCase):
+
+    def setUp(self):
+        self.histogram = LatencyHistogram([0.05] * 50)
+        for _ in range(100):
+            self.histogram.count_request()
+        patches = [
+            mock.patch.object(http_client, 'hedging_enabled', return_value=True),
+            mock.patch.dict(http_client.HEDGE_POLICIES, {'slow.example': HedgePolicy(percentile=95, budget=0.5)}),
+            mock.patch.object(http_client, 'histogram_for', return_value=self.histogram),
+            mock.patch.object(http_client, 'limiter_for', return_value=mock.Mock()),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_a_slow_request_is_raced_by_a_hedge_that_wins(self):
+        calls = []
+
+        def request():
+            calls.append(None)
+            # The first attempt hangs, the hedge answers right away
+            if len(calls) == 1:
+                time.sleep(1)
+                return 'primary'
+            return 'hedge'
+
+        self.assertEqual(hedged_call(URL, request), 'hedge')
+        self.assertEqual(self.histogram.hedges, 1)
+        self.assertEqual(self.histogram.hedge_wins, 1)
+
+    def test_a_fast_request_is_not_hedged(self):
+        self.assertEqual(hedged_call(URL, lambda: 'fast'), 'fast')
+        self.assertEqual(self.histogram.hedges, 0)
+
+    def test_no_hedge_once_the_budget_is_spent(self):
+        self.histogram.hedge_tokens = 0
+        self.histogram.refilled_at = self.histogram.requests
+        self.histogram.hedges = 1000
+
+        def request():
+            time.sleep(0.2)
+            return 'primary'
+
+        self.assertEqual(hedged_call(URL, request), 'primary')
+        self.assertEqual(self.histogram.hedges, 1000)
+
+    def test_a_host_with_one_request_per_run_can_hedge(self):
+        # Owlracle gets a single request per run, with its latency history from the previous runs
+        histogram = LatencyHistogram([0.05] * 10)
+        policies = {'slow.example': http_client.HEDGE_POLICIES['api.owlracle.info']}
+
+        def request():
+            time.sleep(0.3)
+            return 'slow'
+
+        with mock.patch.object(http_client, 'histogram_for', return_value=histogram), \
+                mock.patch.dict(http_client.HEDGE_POLICIES, policies):
+            self.assertEqual(hedged_call(URL, request), 'slow')
+        self.assertEqual(histogram.hedges, 1)
+
+    def test_hedging_is_off_by_default(self):
+        with mock.patch.object(http_client, 'hedging_enabled', return_value=False):
+            def request():
+                time.sleep(0.2)
+                return 'primary'
+            self.assertEqual(hedged_call(URL, request), 'primary')
+        self.assertEqual(self.histogram.hedges, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from unittest import mock
+
+import requests
+from gql.transport.exceptions import TransportConnectionFailed
+
+from etl_functions import http_client
+from etl_functions.http_client import AdaptiveTokenBucket, RateLimitedHTTPTransport, parse_retry_after, retry_delay
+
+
+def response(status, headers=None, body='{"data": {"ok": true}}'):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers or {})
+    resp._content = body.encode()
+    resp.url = 'https://gateway.example/api'
+    return resp
+
+
+class RetryTest(unittest.TestCase):
+
+    def test_retry_after_is_read_as_seconds_or_http_date(self):
+        self.assertEqual(parse_retry_after('3'), 3)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_retry_after_takes_precedence_over_backoff(self):
+        self.assertEqual(retry_delay(0, retry_after=7), 7)
+        self.assertLessEqual(retry_delay(3), http_client.BACKOFF_BASE_SECONDS * 2 ** 3)
+
+    def test_throttling_halves_the_rate_and_success_recovers_it(self):
+        bucket = AdaptiveTokenBucket(10)
+        bucket.throttled()
+        self.assertEqual(bucket.rate, 5)
+        for _ in range(20):
+            bucket.succeeded()
+        self.assertEqual(bucket.rate, 10)
+
+    def test_graphql_transport_honours_retry_after_on_429(self):
+        transport = RateLimitedHTTPTransport(url='https://gateway.example/api', max_retries=2)
+        transport.session = mock.Mock()
+        transport.session.request.side_effect = [response(429, {'Retry-After': '4'}, body='rate limited'),
+                                                 response(200)]
+        limiter = mock.Mock()
+
+        with mock.patch.object(http_client, 'limiter_for', return_value=limiter), \
+                mock.patch.object(http_client.time, 'sleep') as sleep, \
+                mock.patch.object(http_client, 'hedging_enabled', return_value=False):
+            result = transport.execute(mock.MagicMock())
+
+        self.assertEqual(result.data, {'ok': True})
+        limiter.throttled.assert_called_once_with(4)
+        sleep.assert_called_once_with(4)
+
+    def test_graphql_transport_retries_a_timeout(self):
+        transport = RateLimitedHTTPTransport(url='https://gateway.example/api', max_retries=2)
+        transport.session = mock.Mock()
+        transport.session.request.side_effect = [requests.Timeout("read timed out"), response(200)]
+
+        with mock.patch.object(http_client, 'limiter_for', return_value=mock.Mock()), \
+                mock.patch.object(http_client.time, 'sleep') as sleep, \
+                mock.patch.object(http_client, 'hedging_enabled', return_value=False):
+            result = transport.execute(mock.MagicMock())
+
+        self.assertEqual(result.data, {'ok': True})
+        self.assertEqual(transport.session.request.call_count, 2)
+        sleep.assert_called_once()
+
+    def test_graphql_transport_gives_up_after_max_retries(self):
+        transport = RateLimitedHTTPTransport(url='https://gateway.example/api', max_retries=2)
+        transport.session = mock.Mock()
+        transport.session.request.side_effect = requests.ConnectionError("connection refused")
+
+        with mock.patch.object(http_client, 'limiter_for', return_value=mock.Mock()), \
+                mock.patch.object(http_client.time, 'sleep') as sleep, \
+                mock.patch.object(http_client, 'hedging_enabled', return_value=False):
+            with self.assertRaises(TransportConnectionFailed):
+                transport.execute(mock.MagicMock())
+
+        self.assertEqual(transport.session.request.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import copy
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from shared_functions.page_cache import FrameCache
+
+
+def month_frame(rows=100):
+    return pd.DataFrame({'time': pd.date_range('2024-06-01', periods=rows, freq='h'), 'value': range(rows)})
+
+
+FRAME_BYTES = int(month_frame().memory_usage(deep=True).sum())
+
+
+class FrameCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.versions = {'btc_mempool_fee': {'june_2024': 1}, 'eth_gas_fee': {'june_2024': 1}, 'eth_tvl': {'june_2024': 1}}
+        patches = [
+            mock.patch('shared_functions.page_cache.fetch_month_view', side_effect=lambda frame, month: month_frame()),
+            mock.patch('shared_functions.page_cache.fetch_series_versions', side_effect=lambda: copy.deepcopy(self.versions)),
+        ]
+        self.fetch_month_view, self.fetch_series_versions = [patch.start() for patch in patches]
+        for patch in patches:
+            self.addCleanup(patch.stop)
+
+    def test_a_month_view_is_read_once(self):
+        cache = FrameCache(max_bytes=10 * FRAME_BYTES)
+        cache.get('btc_1m_mempool_fee', 'june_2024')
+        cache.get('btc_1m_mempool_fee', 'june_2024')
+
+        self.assertEqual(self.fetch_month_view.call_count, 1)
+
+    def test_a_version_bump_invalidates_the_collection(self):
+        cache = FrameCache(max_bytes=10 * FRAME_BYTES, check_interval=0)
+        cache.get('btc_1m_mempool_fee', 'june_2024')
+        cache.get('eth_1m_gas_fee', 'june_2024')
+
+        self.versions['btc_mempool_fee']['june_2024'] = 2
+        cache.get('btc_1m_mempool_fee', 'june_2024')
+        cache.get('eth_1m_gas_fee', 'june_2024')
+
+        self.assertEqual([call.args[0] for call in self.fetch_month_view.call_args_list],
+                         ['btc_1m_mempool_fee', 'eth_1m_gas_fee', 'btc_1m_mempool_fee'])
+
+    def test_a_change_in_another_month_keeps_the_entry(self):
+        cache = FrameCache(max_bytes=10 * FRAME_BYTES, check_interval=0)
+        cache.get('btc_1m_mempool_fee', 'june_2024')
+        self.versions['btc_mempool_fee']['july_2024'] = 1
+        cache.get('btc_1m_mempool_fee', 'june_2024')
+
+        self.assertEqual(self.fetch_month_view.call_count, 1)
+
+    def test_versions_are_read_once_per_check_interval(self):
+        cache = FrameCache(max_bytes=10 * FRAME_BYTES, check_interval=60)
+        cache.get('btc_1m_mempool_fee', 'june_2024')
+        self.versions['btc_mempool_fee']['june_2024'] = 2
+        cache.get('btc_1m_mempool_fee', 'june_2024')
+
+        self.assertEqual(self.fetch_series_versions.call_count, 1)
+        self.assertEqual(self.fetch_month_view.call_count, 1)
+
+    def test_the_least_recently_used_entry_is_evicted(self):
+        cache = FrameCache(max_bytes=2 * FRAME_BYTES)
+        cache.get('btc_1m_mempool_fee', 'june_2024')
+        cache.get('eth_1m_gas_fee', 'june_2024')
+        # Used again, so the gas fee view is now the least recently used one
+        cache.get('btc_1m_mempool_fee', 'june_2024')
+        cache.get('eth_1m_tvl', 'june_2024')
+
+        self.assertEqual(list(cache.entries), [('btc_1m_mempool_fee', 'june_2024'), ('eth_1m_tvl', 'june_2024')])
+        self.assertEqual(cache.size, 2 * FRAME_BYTES)
+
+    def test_a_view_larger_than_the_cache_is_not_kept(self):
+        cache = FrameCache(max_bytes=FRAME_BYTES - 1)
+        cache.get('btc_1m_mempool_fee', 'june_2024')
+
+        self.assertEqual(len(cache.entries), 0)
+        self.assertEqual(cache.size, 0)
+
+    def test_a_returned_view_is_a_copy(self):
+        cache = FrameCache(max_bytes=10 * FRAME_BYTES)
+        df = cache.get('btc_1m_mempool_fee', 'june_2024')
+        df['value'] = 0
+        df.sort_values('time', ascending=False, inplace=True)
+
+        cached = cache.get('btc_1m_mempool_fee', 'june_2024')
+        self.assertEqual(list(cached['value']), list(range(100)))
+
+
+if __name__ == '__main__':
+    unittest.main()
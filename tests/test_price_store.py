@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from etl_functions.price_store import MEMPOOL_HISTORICAL_PRICE_URL, PRICE_RESOLUTION_SECONDS, BtcPriceStore
+
+DAY = PRICE_RESOLUTION_SECONDS
+
+
+def price(time, usd):
+    return {'time': time, 'USD': usd}
+
+
+class BtcPriceStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BtcPriceStore(os.path.join(self.tmp.name, 'prices.json'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_empty_store_pulls_the_whole_history(self):
+        self.assertEqual(self.store.refresh_url(now=10 * DAY), MEMPOOL_HISTORICAL_PRICE_URL)
+
+    def test_a_store_behind_is_refreshed_with_one_bulk_pull(self):
+        self.store.update({'prices': [price(0, 100)]})
+        self.assertEqual(self.store.refresh_url(now=31 * DAY), MEMPOOL_HISTORICAL_PRICE_URL)
+
+    def test_an_up_to_date_store_needs_no_request(self):
+        self.store.update({'prices': [price(0, 100)]})
+        self.assertIsNone(self.store.refresh_url(now=DAY - 5))
+
+    def test_update_merges_the_response_into_the_stored_history(self):
+        self.store.update({'prices': [price(2 * DAY, 120), price(0, 100)]})
+        self.store.update({'prices': [price(DAY, 110), price(2 * DAY, 125)]})
+        self.assertEqual(self.store.times, [0, DAY, 2 * DAY])
+        self.assertEqual(self.store.price_at(2 * DAY)['USD'], 125)
+        self.store.save()
+        self.assertEqual(BtcPriceStore(self.store.path).prices, self.store.prices)
+
+    def test_price_at_returns_the_nearest_price(self):
+        self.store.update({'prices': [price(0, 100), price(DAY, 110)]})
+        self.assertEqual(self.store.price_at(DAY - 10)['USD'], 110)
+        self.assertEqual(self.store.price_at(10)['USD'], 100)
+
+    def test_a_gap_in_the_history_fails_instead_of_returning_a_stale_price(self):
+        self.store.update({'prices': [price(0, 100), price(10 * DAY, 200)]})
+        self.assertIsNone(self.store.price_at(5 * DAY))
+        with self.assertRaises(ValueError):
+            self.store.prices_at([0, 5 * DAY, 10 * DAY])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from etl_functions.scheduler import Task, critical_path, run_tasks
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def test_tasks_get_their_inputs_as_keyword_arguments(self):
+        tasks = [
+            Task('a', lambda: 2, kind='extract'),
+            Task('b', lambda a: a * 3, inputs=['a']),
+            Task('c', lambda a, b: a + b, inputs=['a', 'b'], kind='load'),
+        ]
+        self.assertEqual(run_tasks(tasks), {'a': 2, 'b': 6, 'c': 8})
+
+    def test_a_failure_skips_the_downstream_tasks_only(self):
+        ran = []
+
+        def fail():
+            raise ValueError("boom")
+
+        tasks = [
+            Task('bad', fail),
+            Task('after_bad', lambda bad: ran.append('after_bad'), inputs=['bad']),
+            Task('good', lambda: ran.append('good')),
+        ]
+        with self.assertRaises(RuntimeError):
+            run_tasks(tasks)
+        self.assertEqual(ran, ['good'])
+
+    def test_unknown_inputs_are_rejected(self):
+        with self.assertRaises(ValueError):
+            run_tasks([Task('a', lambda missing: None, inputs=['missing'])])
+
+    def test_critical_path_follows_the_input_that_finished_last(self):
+        tasks = [Task('a', None), Task('b', None), Task('c', None, inputs=['a', 'b'])]
+        timings = {'a': (0, 1), 'b': (0, 5), 'c': (5, 6)}
+        self.assertEqual(critical_path(tasks, timings), ['b', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import hashlib
+import unittest
+from unittest import mock
+
+import bson
+import pandas as pd
+
+from etl_functions.mongo_loader import (
+    MongoLoader, SERIES_VERSION_COLLECTION, STAGING_SUFFIX, StagedPublish, append_field, encode_document,
+)
+from etl_functions.timeseries_store import HASH_FIELD, TimeSeriesStore, read_month_view, read_series_versions
+from tests.fake_mongo import FakeDatabase
+
+
+def fee_frame(days, fee=10.0, start='2024-06-01'):
+    times = pd.date_range(start, periods=days, freq='D')
+    return pd.DataFrame({
+        'avgHeight': range(days),
+        'timestamp': [int(time.timestamp()) for time in times],
+        'avgFee_50': [fee + day for day in range(days)],
+        'time': times,
+    })
+
+
+def price_frame(days, start='2024-06-01'):
+    # The shape of transform_btc_1m_mempool_price: mempool's Unix 'time' and USD price, keyed on 'date'
+    dates = pd.date_range(start, periods=days, freq='D')
+    return pd.DataFrame({
+        'time': [int(date.timestamp()) for date in dates],
+        'USD': [60000.0 + day for day in range(days)],
+        'date': dates,
+    })
+
+
+def tvl_frame(latest, days=3):
+    # Past daily snapshots keep their time, and the latest one moves with every update during the day
+    times = [pd.Timestamp('2024-06-01 00:00:00') + pd.Timedelta(days=day) for day in range(days - 1)]
+    times.append(pd.Timestamp(latest))
+    return pd.DataFrame({
+        'row_index': range(days),
+        'day_num': range(days),
+        'timestamp': times,
+        'tvl_aave': [1.0e9 + day for day in range(days)],
+        'tvl_lido': [2.0e9] * days,
+        'tvl_makerdao': [3.0e9] * days,
+    })
+
+
+class TimeSeriesStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = FakeDatabase()
+        with mock.patch('etl_functions.mongo_loader.shared_client', return_value={'deftify_research': self.db}):
+            self.loader = MongoLoader('mongodb://fake', batch_size=4)
+        self.store = TimeSeriesStore(self.loader)
+
+    def stored(self, collection='btc_mempool_fee'):
+        return self.db[collection].find({}, {'_id': 0})
+
+    def test_a_write_is_published_through_a_staging_collection(self):
+        counts = self.store.write('btc_1m_mempool_fee', fee_frame(10))
+
+        self.assertEqual(counts, {'inserted': 10, 'updated': 0, 'skipped': 0, 'months': ['june_2024']})
+        self.assertEqual(len(self.stored()), 10)
+        self.assertNotIn(f"btc_mempool_fee{STAGING_SUFFIX}", self.db.list_collection_names())
+
+    def test_only_the_changed_rows_are_staged(self):
+        self.store.write('btc_1m_mempool_fee', fee_frame(10))
+        df = fee_frame(10)
+        df.loc[[3, 7], 'avgFee_50'] = 99.0
+
+        staged_rows = []
+        publish = StagedPublish.publish
+
+        def spy(staged):
+            staged_rows.append(staged.staging.count_documents({}))
+            return publish(staged)
+        with mock.patch.object(StagedPublish, 'publish', autospec=True, side_effect=spy):
+            counts = self.store.write('btc_1m_mempool_fee', df)
+
+        self.assertEqual(staged_rows, [2])
+        self.assertEqual(counts, {'inserted': 0, 'updated': 2, 'skipped': 8, 'months': ['june_2024']})
+        self.assertEqual(sorted(row['avgFee_50'] for row in self.stored())[-2:], [99.0, 99.0])
+        self.assertEqual(len(self.stored()), 10)
+
+    def test_a_merge_that_failed_halfway_is_completed_by_the_retry(self):
+        self.store.write('btc_1m_mempool_fee', fee_frame(5))
+        self.db.fail_merge_after = 3
+        with self.assertRaises(ConnectionError):
+            self.store.write('btc_1m_mempool_fee', fee_frame(10, fee=50.0))
+        # The months of a partial merge are invalidated all the same
+        self.assertEqual(self.version(), 2)
+
+        self.db.fail_merge_after = None
+        counts = self.store.write('btc_1m_mempool_fee', fee_frame(10, fee=50.0))
+        self.assertEqual(counts['skipped'], 3)
+        self.assertEqual(sorted(row['avgFee_50'] for row in self.stored()), [50.0 + day for day in range(10)])
+        self.assertEqual(self.version(), 3)
+
+    def version(self, collection='btc_mempool_fee'):
+        return self.db[SERIES_VERSION_COLLECTION].find({'_id': collection})[0]['version']
+
+    def test_an_identical_rewrite_is_skipped(self):
+        self.store.write('btc_1m_mempool_fee', fee_frame(10))
+        with mock.patch.object(self.loader, 'stage') as stage:
+            counts = self.store.write('btc_1m_mempool_fee', fee_frame(10))
+
+        self.assertEqual(counts, {'inserted': 0, 'updated': 0, 'skipped': 10, 'months': []})
+        stage.assert_not_called()
+        self.assertEqual(self.version(), 1)
+
+    def test_only_new_and_changed_rows_are_upserted(self):
+        self.store.write('btc_1m_mempool_fee', fee_frame(6))
+        df = fee_frame(10)
+        df.loc[2, 'avgFee_50'] = 99.0
+        counts = self.store.write('btc_1m_mempool_fee', df)
+
+        self.assertEqual(counts, {'inserted': 4, 'updated': 1, 'skipped': 5, 'months': ['june_2024']})
+        self.assertEqual(len(self.stored()), 10)
+        self.assertEqual(self.version(), 2)
+
+    def test_the_changed_months_are_returned(self):
+        self.store.write('btc_1m_mempool_fee', fee_frame(45, start='2024-05-20'))
+        df = fee_frame(45, start='2024-05-20')
+        df.loc[0, 'avgFee_50'] = 99.0
+        df.loc[44, 'avgFee_50'] = 99.0
+
+        self.assertEqual(self.store.write('btc_1m_mempool_fee', df)['months'], ['may_2024', 'july_2024'])
+
+    def test_only_the_changed_months_get_a_new_version(self):
+        self.store.write('btc_1m_mempool_fee', fee_frame(45, start='2024-05-20'))
+        df = fee_frame(45, start='2024-05-20')
+        df.loc[20, 'avgFee_50'] = 99.0
+        self.store.write('btc_1m_mempool_fee', df)
+
+        self.assertEqual(read_series_versions(self.db, ['btc_mempool_fee']),
+                         {'btc_mempool_fee': {'may_2024': 1, 'june_2024': 2, 'july_2024': 1}})
+
+    def test_the_stored_hash_is_the_hash_of_the_row_content(self):
+        self.store.write('btc_1m_mempool_fee', fee_frame(3))
+        for row in self.stored():
+            content_hash = row.pop(HASH_FIELD)
+            self.assertEqual(content_hash, hashlib.sha256(encode_document(row).raw).hexdigest())
+
+    def test_an_appended_field_is_encoded_like_the_whole_document(self):
+        document = {'time': pd.Timestamp('2024-06-01').to_pydatetime(), 'meta': {'metric': 'm'}, 'value': 1.5}
+        appended = append_field(encode_document(document), HASH_FIELD, 'abc')
+
+        self.assertEqual(appended.raw, bson.encode({**document, HASH_FIELD: 'abc'}))
+
+    def test_a_failed_write_leaves_the_live_collection_untouched(self):
+        self.store.write('btc_1m_mempool_fee', fee_frame(5))
+        before = self.stored()
+
+        self.db.fail_after = 2
+        with self.assertRaises(ConnectionError):
+            self.store.write('btc_1m_mempool_fee', fee_frame(10, fee=50.0))
+        self.assertEqual(self.stored(), before)
+
+        # The retry rebuilds the staging collection and merges the whole write
+        self.db.fail_after = None
+        counts = self.store.write('btc_1m_mempool_fee', fee_frame(10, fee=50.0))
+        self.assertEqual(counts, {'inserted': 5, 'updated': 5, 'skipped': 0, 'months': ['june_2024']})
+        self.assertEqual(sorted(row['avgFee_50'] for row in self.stored()), [50.0 + day for day in range(10)])
+
+    def test_a_month_view_has_the_columns_of_the_transformed_frame(self):
+        self.store.write('btc_1m_mempool_fee', fee_frame(45, start='2024-05-20'))
+        view = read_month_view(self.db, 'btc_1m_mempool_fee', 'june_2024')
+
+        self.assertEqual(len(view), 30)
+        self.assertEqual(set(view.columns), {'avgHeight', 'timestamp', 'avgFee_50', 'time'})
+        self.assertEqual(view['time'].min(), pd.Timestamp('2024-06-01'))
+
+    def test_a_same_day_rerun_updates_the_day_instead_of_adding_one(self):
+        self.store.write('eth_1m_tvl', tvl_frame('2024-06-03 08:15:00'))
+        counts = self.store.write('eth_1m_tvl', tvl_frame('2024-06-03 17:40:00').assign(tvl_lido=2.5e9))
+
+        self.assertEqual(counts, {'inserted': 0, 'updated': 3, 'skipped': 0, 'months': ['june_2024']})
+        stored = self.stored('eth_tvl')
+        self.assertEqual(sorted(row['time'] for row in stored),
+                         list(pd.date_range('2024-06-01', periods=3, freq='D').to_pydatetime()))
+
+        view = read_month_view(self.db, 'eth_1m_tvl', 'june_2024')
+        self.assertEqual(len(view), 3)
+        self.assertEqual(list(view['row_index']), [0, 1, 2])
+
+    def test_a_value_column_named_time_does_not_replace_the_series_time(self):
+        counts = self.store.write('btc_1m_mempool_price', price_frame(5))
+        self.assertEqual(counts, {'inserted': 5, 'updated': 0, 'skipped': 0, 'months': ['june_2024']})
+
+        view = read_month_view(self.db, 'btc_1m_mempool_price', 'june_2024')
+        pd.testing.assert_frame_equal(view[['time', 'USD', 'date']], price_frame(5), check_dtype=False)
+
+
+if __name__ == '__main__':
+    unittest.main()